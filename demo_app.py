@@ -1,20 +1,17 @@
 import streamlit as st
-import matplotlib.pyplot as plt
-import numpy as np
 from typing import List, Dict, Optional
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 
 # Explicitly add current directory to sys.path
 import sys
 import os
 sys.path.append(os.getcwd())
 
-from run_scriptpulse import run_scriptpulse
-from scriptpulse.engine.validator import validate_script
-from scriptpulse.engine.preprocess import preprocess_lines
-from scriptpulse.engine.segment import segment_scenes
-from scriptpulse.engine.features import extract_scene_features
-from scriptpulse.engine.effort import compute_effort
-from scriptpulse.engine.temporal_graph import build_temporal_graph
+# Engine modules, NumPy and matplotlib are imported where they are first
+# needed, so reruns that do not analyze or plot never pay for them.
 
 # --- CONFIGURATION & STYLING ---
 st.set_page_config(page_title="ScriptPulse", page_icon="📝", layout="wide")
@@ -106,6 +103,74 @@ with st.sidebar:
     """, unsafe_allow_html=True)
     
     view_mode = st.radio("View Mode", ["Writer View", "Technical View"], index=0)
+    
+    # Filled in at the end of the run, once this run's cache activity is known
+    telemetry_panel = st.empty()
+
+# --- RESULT CACHE ---
+class ResultCache:
+    """
+    Process-wide LRU of analysis results keyed by input hash.
+    Bounded by entry count and by approximate size; shared by all sessions.
+    """
+    def __init__(self, max_entries: int = 32, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value, size: int) -> None:
+        with self._lock:
+            if size > self.max_bytes:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._bytes}
+
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    return ResultCache()
+
+@st.cache_resource
+def get_figure_cache() -> ResultCache:
+    # Rendered timeline PNGs keyed by input hash and scene range
+    return ResultCache(max_entries=128, max_bytes=64 * 1024 * 1024)
+
+# Focus cards rendered per page
+FOCUS_PAGE_SIZE = 20
+
+def input_digest(data) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def approx_result_bytes(result, input_size: int) -> int:
+    # Scene text is held roughly three times (scene, block and sentence lists)
+    # plus the per-scene arrays
+    arrays = [result.normalization_inputs, result.features_norm, result.effort,
+              result.decayed, result.probabilities]
+    arrays += [result.features[k] for k in result.features.columns]
+    return 3 * input_size + sum(a.nbytes for a in arrays)
 
 # --- HELPER FUNCTIONS ---
 def get_arrow_text(curr, prev):
@@ -114,6 +179,45 @@ def get_arrow_text(curr, prev):
     if curr < prev * 0.95: return "Pressure Releasing"
     return "Pressure Holding"
 
+def get_focus_card_html(i, scenes, features, decayed):
+    prev_eff = decayed[i-1] if i > 0 else 0
+    curr_eff = decayed[i]
+    arrow_txt = get_arrow_text(curr_eff, prev_eff)
+
+    header = scenes[i].header.strip()
+
+    # Comparison logic (Observational)
+    obs = []
+    if features["ActionLines"][i] > features["DialogueLines"][i]:
+        obs.append("Action-heavy structure")
+    else:
+        obs.append("Dialogue-heavy structure")
+
+    if i > 0 and abs(features["AvgSentenceLength"][i] - features["AvgSentenceLength"][i-1]) < 2:
+         obs.append("Similar rhythm to previous scene")
+
+    return f"""
+    <div class="focus-card">
+        <div class="focus-header">Scene {i}: {header}</div>
+        <div style="display:flex; justify-content:space-between; margin-bottom:15px; font-size:0.9em; color:#555;">
+            <span><strong>Context:</strong> {arrow_txt}</span>
+        </div>
+        <div style="margin-bottom:15px;">
+            <span class="metric-label">Observation</span><br>
+            <ul>
+                <li>{"</li><li>".join(obs)}</li>
+                <li>Contributes to sustained structural pressure</li>
+            </ul>
+        </div>
+        <div>
+            <span class="metric-label">Inquiry</span><br>
+            <span style="font-size:0.95em; color:#444;">
+            Do I want the audience to stay under pressure this long? Is this repetition intentional?
+            </span>
+        </div>
+    </div>
+    """
+
 def get_structural_summary_text(alert_count, total_scenes):
     if total_scenes == 0: return "No scenes detected.", "status-text-normal"
     
@@ -140,160 +244,142 @@ with input_col:
     paste_input = st.text_area("Screenplay Text", height=200, placeholder="Paste your scene here...")
     file_input = st.file_uploader("Or upload .txt", type=["txt"])
 
-input_lines = []
-if paste_input: input_lines = paste_input.splitlines()
-elif file_input: input_lines = file_input.getvalue().decode("utf-8").splitlines()
+# Analyses are keyed by a hash of the input bytes; text is split into lines
+# only when the engine actually has to run
+input_key: Optional[str] = None
+input_size = 0
+if paste_input:
+    paste_bytes = paste_input.encode("utf-8", "surrogatepass")
+    input_key, input_size = input_digest(paste_bytes), len(paste_bytes)
+elif file_input:
+    input_key, input_size = input_digest(file_input.getbuffer()), file_input.size
+
+def load_input_lines():
+    # Only called on a cache miss
+    if paste_input:
+        return paste_input.splitlines()
+    # Lines are found over the uploaded bytes and decoded only when read
+    from scriptpulse.reader import ScriptLines
+    return ScriptLines(file_input.getbuffer())
 
 if st.button("Analyze Structure", type="primary"):
-    if not input_lines:
+    if input_key is None:
         st.warning("Please provide a script to analyze.")
     else:
-        try:
-            # --- ENGINE EXECUTION ---
-            validate_script(input_lines)
-            clean_lines = preprocess_lines(input_lines)
-            scenes = segment_scenes(clean_lines)
-            features = extract_scene_features(scenes)
-            
-            # Normalization
-            raw_for_norm = []
-            for f in features:
-                lines_count = f["Lines"]
-                act_dens = float(f["ActionLines"])/lines_count if lines_count>0 else 0.0
-                vis_pen = float(f["MaxContinuousLines"]) - float(f["WhitespaceRatio"])
-                raw_for_norm.append({
-                    "AvgSentenceLength": float(f["AvgSentenceLength"]),
-                    "ActionDensity": act_dens,
-                    "DialogueTurnCount": f["DialogueTurnCount"],
-                    "RepetitionScore": 0.0,
-                    "VisualDensityPenalty": vis_pen,
-                    "AuditoryLoad": f["AuditoryLoad"]
-                })
+        cache = get_result_cache()
+        result = cache.get(input_key)
+        st.session_state["last_lookup"] = "hit" if result is not None else "miss"
+        if result is None:
+            try:
+                from run_scriptpulse import run_scriptpulse_detailed
+
+                # --- ENGINE EXECUTION (single run, cached by input hash) ---
+                started = time.perf_counter()
+                result = run_scriptpulse_detailed(load_input_lines())
+                st.session_state["last_compute_ms"] = (time.perf_counter() - started) * 1000
+                cache.put(input_key, result, approx_result_bytes(result, input_size))
+            except ValueError as ve:
+                st.session_state.pop("analysis", None)
+                st.error(f"Validation Error: {ve}")
+            except Exception as e:
+                st.session_state.pop("analysis", None)
+                st.error(f"Error: {e}")
+        if result is not None:
+            st.session_state["analysis"] = {"key": input_key, "result": result}
+
+# Reruns (view switches, widget changes) render the stored result without
+# re-running the engine, as long as the input is unchanged
+analysis = st.session_state.get("analysis")
+if analysis is not None and analysis["key"] == input_key:
+    result = analysis["result"]
+    try:
+        scenes = result.scenes
+        features = result.features
+        effort = result.effort
+        decayed = result.decayed
+        messages = result.messages
+        alert_indices = result.alert_indices
+
+        # --- WRITER COGNITION UI (REFINED) ---
+        st.divider()
+
+        # 3. Structural Summary
+        summary, status_class = get_structural_summary_text(len(alert_indices), len(scenes))
+        st.markdown(f'<div class="{status_class}" style="font-size:1.1em; margin-bottom:20px;">{summary}</div>', unsafe_allow_html=True)
+        
+        if view_mode == "Writer View":
+            # 4. Audience Energy Timeline
+            st.caption("AUDIENCE ENERGY LOAD")
             
-            keys = ["AvgSentenceLength", "ActionDensity", "DialogueTurnCount", "RepetitionScore", "VisualDensityPenalty", "AuditoryLoad"]
-            stats = {k: (min(d[k] for d in raw_for_norm), max(d[k] for d in raw_for_norm)) for k in keys}
+            # Drawn from a min/max pyramid (scriptpulse.timeline) built once
+            # per result, so a view costs the same at any scene count
+            from scriptpulse.timeline import TIMELINE_POINTS, build_timeline, render_timeline_png
+
+            if analysis.get("timeline") is None:
+                analysis["timeline"] = build_timeline(decayed, alert_indices)
+            timeline = analysis["timeline"]
+
+            view_start, view_stop = 0, len(scenes)
+            if len(scenes) > TIMELINE_POINTS:
+                first, last = st.slider("Scene range", 0, len(scenes) - 1, (0, len(scenes) - 1))
+                view_start, view_stop = first, last + 1
+
+            figure_cache = get_figure_cache()
+            figure_key = f"{input_key}:{view_start}:{view_stop}"
+            png = figure_cache.get(figure_key)
+            if png is None:
+                png = render_timeline_png(timeline, view_start, view_stop)
+                figure_cache.put(figure_key, png, len(png))
+            st.image(png)
+
+            # 5. Focus Points (Typography-based), one page at a time
+            st.write("")
+            st.caption("FOCUS POINTS")
             
-            features_norm = []
-            for item in raw_for_norm:
-                n_item = {}
-                for k in keys:
-                    mn, mx = stats[k]
-                    n_item[k] = (item[k] - mn) / (mx - mn + 1e-8)
-                features_norm.append(n_item)
-                
-            effort = compute_effort(features_norm)
-            temporal = build_temporal_graph(effort)
-            decayed = temporal["decayed"]
+            if not alert_indices:
+                st.markdown("<p style='color:#666;'>No specific scenes require structural focus.</p>", unsafe_allow_html=True)
+            else:
+                pages = -(-len(alert_indices) // FOCUS_PAGE_SIZE)
+                page = 1
+                if pages > 1:
+                    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1)
+                first = (page - 1) * FOCUS_PAGE_SIZE
+                shown = alert_indices[first:first + FOCUS_PAGE_SIZE]
+                if pages > 1:
+                    st.caption(f"Showing {first + 1}-{first + len(shown)} of {len(alert_indices)}")
+                cards = "".join(get_focus_card_html(i, scenes, features, decayed) for i in shown)
+                st.markdown(cards, unsafe_allow_html=True)
+
+        else:
+            # Technical View
+            st.subheader("Technical Analysis")
+            st.write(f"**Total Scenes:** {len(scenes)}")
             
-            # Get Alerts
-            messages = run_scriptpulse(input_lines)
-            alert_indices = []
-            for msg in messages:
-                try: alert_indices.append(int(msg.strip('.').split(' ')[-1]))
-                except: pass
+            if messages:
+                for m in messages:
+                    st.text(f"• {m}")
+            else:
+                st.text("• No strain detected.")
             
-            # --- WRITER COGNITION UI (REFINED) ---
-            st.divider()
+            col1, col2 = st.columns(2)
+            with col1:
+                st.caption("RAW EFFORT")
+                st.line_chart(effort)
+            with col2:
+                st.caption("ACCUMULATED STRAIN")
+                st.line_chart(decayed)
 
-            # 3. Structural Summary
-            summary, status_class = get_structural_summary_text(len(alert_indices), len(scenes))
-            st.markdown(f'<div class="{status_class}" style="font-size:1.1em; margin-bottom:20px;">{summary}</div>', unsafe_allow_html=True)
-            
-            if view_mode == "Writer View":
-                # 4. Audience Energy Timeline
-                st.caption("AUDIENCE ENERGY LOAD")
-                
-                fig, ax = plt.subplots(figsize=(12, 3))
-                # Cinematic styling: minimalist
-                ax.plot(decayed, color='#333333', linewidth=1.2)
-                ax.fill_between(range(len(decayed)), decayed, color='#e0e0e0', alpha=0.3)
-                
-                # Markers for alerts (Subtle red dots)
-                if alert_indices:
-                    vals = [decayed[i] for i in alert_indices]
-                    ax.scatter(alert_indices, vals, color='#b71c1c', s=30, zorder=5, label='Alert')
-                
-                ax.set_yticks([])
-                ax.set_xticks(range(len(scenes)))
-                ax.set_xticklabels([str(i) for i in range(len(scenes))], fontsize=8, color='#666')
-                
-                # Remove borders
-                for spine in ax.spines.values():
-                    spine.set_visible(False)
-                ax.spines['bottom'].set_visible(True)
-                ax.spines['bottom'].set_color('#ddd')
-                
-                ax.set_ylabel("Pressure", fontsize=9, color='#666')
-                ax.set_xlabel("Scene Index", fontsize=9, color='#666')
-                st.pyplot(fig)
-
-                # 5. Focus Points (Typography-based)
-                st.write("")
-                st.caption("FOCUS POINTS")
-                
-                if not alert_indices:
-                    st.markdown("<p style='color:#666;'>No specific scenes require structural focus.</p>", unsafe_allow_html=True)
-                else:
-                    for i in alert_indices:
-                        prev_eff = decayed[i-1] if i > 0 else 0
-                        curr_eff = decayed[i]
-                        arrow_txt = get_arrow_text(curr_eff, prev_eff)
-                        
-                        header = scenes[i].header.strip()
-                        
-                        # Comparison logic (Observational)
-                        obs = []
-                        if features[i]["ActionLines"] > features[i]["DialogueLines"]:
-                            obs.append("Action-heavy structure")
-                        else:
-                            obs.append("Dialogue-heavy structure")
-                        
-                        if i > 0 and abs(features[i]["AvgSentenceLength"] - features[i-1]["AvgSentenceLength"]) < 2:
-                             obs.append("Similar rhythm to previous scene")
-                        
-                        with st.container():
-                            st.markdown(f"""
-                            <div class="focus-card">
-                                <div class="focus-header">Scene {i}: {header}</div>
-                                <div style="display:flex; justify-content:space-between; margin-bottom:15px; font-size:0.9em; color:#555;">
-                                    <span><strong>Context:</strong> {arrow_txt}</span>
-                                </div>
-                                <div style="margin-bottom:15px;">
-                                    <span class="metric-label">Observation</span><br>
-                                    <ul>
-                                        <li>{"</li><li>".join(obs)}</li>
-                                        <li>Contributes to sustained structural pressure</li>
-                                    </ul>
-                                </div>
-                                <div>
-                                    <span class="metric-label">Inquiry</span><br>
-                                    <span style="font-size:0.95em; color:#444;">
-                                    Do I want the audience to stay under pressure this long? Is this repetition intentional?
-                                    </span>
-                                </div>
-                            </div>
-                            """, unsafe_allow_html=True)
+    except Exception as e:
+        st.error(f"Error: {e}")
 
-            else:
-                # Technical View
-                st.subheader("Technical Analysis")
-                st.write(f"**Total Scenes:** {len(scenes)}")
-                
-                if messages:
-                    for m in messages:
-                        st.text(f"• {m}")
-                else:
-                    st.text("• No strain detected.")
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.caption("RAW EFFORT")
-                    st.line_chart(effort)
-                with col2:
-                    st.caption("ACCUMULATED STRAIN")
-                    st.line_chart(decayed)
-
-        except ValueError as ve:
-             st.error(f"Validation Error: {ve}")
-        except Exception as e:
-             st.error(f"Error: {e}")
+# --- TELEMETRY ---
+with telemetry_panel.container():
+    stats = get_result_cache().stats()
+    st.caption("TELEMETRY")
+    st.text(f"Cache hits:    {stats['hits']}")
+    st.text(f"Cache misses:  {stats['misses']}")
+    st.text(f"Entries:       {stats['entries']} ({stats['bytes'] / 1e6:.1f} MB)")
+    if "last_lookup" in st.session_state:
+        st.text(f"Last lookup:   {st.session_state['last_lookup']}")
+    if "last_compute_ms" in st.session_state:
+        st.text(f"Last compute:  {st.session_state['last_compute_ms']:.0f} ms")
@@ -1,106 +1,208 @@
-from typing import List, Dict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional
 from scriptpulse.engine.validator import validate_script
 from scriptpulse.engine.preprocess import preprocess_lines
 from scriptpulse.engine.segment import segment_scenes
-from scriptpulse.engine.features import extract_scene_features
-from scriptpulse.engine.effort import compute_effort
-from scriptpulse.engine.temporal_graph import build_temporal_graph
 from scriptpulse.engine.accumulate import accumulate_signals
-from scriptpulse.engine.calibration import calibrate_strain
 from scriptpulse.engine.decision import decide_alerts
 from scriptpulse.engine.output import format_output
+from scriptpulse.instrument import StageObserver, current_observer, run_stage
 
-def run_scriptpulse(lines: List[str]) -> List[str]:
+if TYPE_CHECKING:
+    import numpy as np
+    from scriptpulse.engine.features import SceneFeatureArrays
+    from scriptpulse.engine.normalize import NormalizationReference
+
+@dataclass
+class ScriptPulseResult:
+    """
+    Everything one pipeline run computes, indexed by scene.
+    Arrays are the stage outputs themselves, not copies.
+    """
+    # Stage 3 output (SceneSegments or a CompactScript); None when scored from features
+    scenes: Optional[object]
+    # Stage 4 output; None when scored from normalization inputs
+    features: Optional["SceneFeatureArrays"]
+    # (n_scenes, 6) values before and after min-max normalization (EFFORT_FEATURE_KEYS order)
+    normalization_inputs: "np.ndarray"
+    features_norm: "np.ndarray"
+    effort: "np.ndarray"
+    # build_temporal_graph output (windows unpadded)
+    temporal: Dict[str, List[float]]
+    # accumulate_signals output (windows padded with None to scene indices)
+    signals: Dict[str, List[Optional[float]]]
+    decayed: "np.ndarray"
+    probabilities: "np.ndarray"
+    alerts: List[bool]
+    messages: List[str]
+
+    @property
+    def alert_indices(self) -> List[int]:
+        return [i for i, alert in enumerate(self.alerts) if alert]
+
+    def to_dict(self) -> Dict[str, object]:
+        """
+        JSON-serializable per-scene signals, alert indices and messages.
+        """
+        signals = {
+            "effort": self.effort.tolist(),
+            "probability": self.probabilities.tolist()
+        }
+        signals.update(self.signals)
+        return {
+            "scenes": len(self.alerts),
+            "signals": signals,
+            "alerts": self.alert_indices,
+            "messages": self.messages
+        }
+
+
+def run_scriptpulse(
+    lines: List[str],
+    fused: bool = False,
+    compact: bool = False,
+    reference: Optional["NormalizationReference"] = None
+) -> List[str]:
     """
     Runs the full ScriptPulse v1.3.1 engine pipeline.
     """
-    # 1. Validation
-    validate_script(lines)
+    return run_scriptpulse_detailed(lines, fused=fused, compact=compact, reference=reference).messages
+
+def _stage(observer: Optional[StageObserver], name: str, fn, *args):
+    # Reports fn(*args) as one stage when an observer is attached
+    if observer is None:
+        return fn(*args)
+    return run_stage(observer, name, fn, *args)
+
+def run_scriptpulse_detailed(
+    lines: List[str],
+    fused: bool = False,
+    compact: bool = False,
+    observer: Optional[StageObserver] = None,
+    reference: Optional["NormalizationReference"] = None
+) -> ScriptPulseResult:
+    """
+    Runs the full pipeline once and returns every intermediate result.
+    fused=True runs stages 1-3 as a single pass (scriptpulse.engine.scanner);
+    the separate stages remain the reference.
+    compact=True segments into span arrays over the preprocessed lines
+    (scriptpulse.engine.compact) instead of per-scene string lists.
+    observer receives per-stage events (scriptpulse.instrument); defaults to
+    the one attached with instrument.observe().
+    reference normalizes against fixed corpus bounds instead of the script's
+    own min and max (scriptpulse.engine.normalize); None is the v1.3.1 rule.
+    """
+    if fused and compact:
+        raise ValueError("fused and compact front ends cannot be combined")
+    if observer is None:
+        observer = current_observer()
+    # NumPy-backed stages are imported on first use so that importing this
+    # module stays cheap for short-lived workers.
+    from scriptpulse.engine.features import extract_scene_feature_arrays
+
+    if fused:
+        from scriptpulse.engine.scanner import scan_scenes
+
+        # 1.-3. Validation, Preprocessing and Segmentation in one pass
+        scenes = _stage(observer, "scan", scan_scenes, lines)
+    else:
+        # 1. Validation
+        _stage(observer, "validation", validate_script, lines)
+
+        # 2. Preprocessing
+        clean_lines = _stage(observer, "preprocessing", preprocess_lines, lines)
+
+        # 3. Segmentation
+        if compact:
+            from scriptpulse.engine.compact import segment_compact
+
+            scenes = _stage(observer, "segmentation", segment_compact, clean_lines)
+        else:
+            scenes = _stage(observer, "segmentation", segment_scenes, clean_lines)
+
+    # 4. Feature Extraction (columnar: one array per feature)
+    features = _stage(observer, "features", extract_scene_feature_arrays, scenes)
+
+    # 5.-11. Normalization through Output Formatting
+    return score_detailed(None, scenes=scenes, features=features, observer=observer, reference=reference)
+
+def score_features(features, reference: Optional["NormalizationReference"] = None) -> List[str]:
+    """
+    Runs stages 5-11 (normalization through output formatting) on raw
+    per-scene features (a SceneFeatureArrays).
+    """
+    return score_detailed(None, features=features, reference=reference).messages
 
-    # 2. Preprocessing
-    clean_lines = preprocess_lines(lines)
+def score_normalization_inputs(raw_for_norm, reference: Optional["NormalizationReference"] = None) -> List[str]:
+    """
+    Runs stages 5-11 on the (n_scenes, 6) output of normalization_inputs.
+    """
+    return score_detailed(raw_for_norm, reference=reference).messages
 
-    # 3. Segmentation
-    scenes = segment_scenes(clean_lines)
+def score_detailed(
+    raw_for_norm,
+    scenes=None,
+    features=None,
+    observer: Optional[StageObserver] = None,
+    reference: Optional["NormalizationReference"] = None
+) -> ScriptPulseResult:
+    """
+    Runs stages 5-11 on the (n_scenes, 6) output of normalization_inputs and
+    returns every intermediate result. With raw_for_norm=None the inputs are
+    derived from `features`. `scenes` and `features` are passed through to
+    the result.
+    """
+    import numpy as np
+    from scriptpulse.engine.normalize import normalization_inputs, min_max_normalize
+    from scriptpulse.engine.effort import compute_effort_matrix
+    from scriptpulse.engine.temporal_graph import build_temporal_graph
+    from scriptpulse.engine.calibration import calibrate_strain_array
 
-    # 4. Feature Extraction
-    features = extract_scene_features(scenes)
+    if observer is None:
+        observer = current_observer()
 
-    # 5. Normalization (INLINE, MANDATORY)
-    # Per-feature, per-script min–max normalization
+    # 5. Normalization (MANDATORY)
+    # Per-feature, per-script min–max normalization, or fixed corpus bounds
     # Keys: AvgSentenceLength, ActionDensity, DialogueTurnCount, RepetitionScore, VisualDensityPenalty, AuditoryLoad
-    
-    # First, calculate raw values for derived metrics per scene
-    raw_for_norm: List[Dict[str, float]] = []
-    
-    for f in features:
-        # ActionDensity = ActionLines / Lines (Avoid div by zero if Lines=0, though validator prevents empty script)
-        # But a scene *could* technically have 0 lines if we just have header? 
-        # Validator says "Non-Empty Script", but individual scene structure?
-        # A scene has at least a header (raw_lines). So lines >= 1.
-        lines_count = f["Lines"]
-        action_density = float(f["ActionLines"]) / lines_count if lines_count > 0 else 0.0
-        
-        # VisualDensityPenalty = MaxContinuousLines - WhitespaceRatio
-        # Warning: MaxContinuous is int/count. WhitespaceRatio is 0-1.
-        # This seems physically odd (mixing units), but prompt says "Derive: MaxContinuousLines - WhitespaceRatio".
-        # We strictly follow instruction.
-        vis_penalty = float(f["MaxContinuousLines"]) - float(f["WhitespaceRatio"])
-        
-        raw_for_norm.append({
-            "AvgSentenceLength": float(f["AvgSentenceLength"]),
-            "ActionDensity": action_density,
-            "DialogueTurnCount": float(f["DialogueTurnCount"]),
-            "RepetitionScore": 0.0, # Placeholder
-            "VisualDensityPenalty": vis_penalty,
-            "AuditoryLoad": float(f["AuditoryLoad"])
-        })
-
-    # Now apply Min-Max Normalization per key
-    keys_to_normalize = [
-        "AvgSentenceLength", 
-        "ActionDensity", 
-        "DialogueTurnCount", 
-        "RepetitionScore", 
-        "VisualDensityPenalty", 
-        "AuditoryLoad"
-    ]
-    
-    features_norm: List[Dict[str, float]] = []
-    
-    # Pre-calculate min/max for each key to avoid re-iterating too much
-    stats = {}
-    for k in keys_to_normalize:
-        vals = [item[k] for item in raw_for_norm]
-        stats[k] = (min(vals), max(vals))
-
-    for item in raw_for_norm:
-        norm_item = {}
-        for k in keys_to_normalize:
-            val = item[k]
-            min_v, max_v = stats[k]
-            denom = max_v - min_v + 1e-8
-            # x_norm_i = (x_i - min) / denom
-            norm_val = (val - min_v) / denom
-            norm_item[k] = norm_val
-        features_norm.append(norm_item)
+    def normalize(raw_for_norm, features):
+        if raw_for_norm is None:
+            raw_for_norm = normalization_inputs(features)
+        return raw_for_norm, min_max_normalize(raw_for_norm, reference)
+
+    raw_for_norm, features_norm = _stage(observer, "normalization", normalize, raw_for_norm, features)
 
     # 6. Effort Computation
-    effort = compute_effort(features_norm)
+    effort = _stage(observer, "effort", compute_effort_matrix, features_norm)
 
     # 7. Temporal Graph
-    temporal = build_temporal_graph(effort)
+    temporal = _stage(observer, "temporal", build_temporal_graph, effort)
 
     # 8. Accumulation / Alignment
-    signals = accumulate_signals(temporal)
+    signals = _stage(observer, "accumulation", accumulate_signals, temporal)
 
     # 9. Calibration
-    probs = calibrate_strain(signals["decayed"])
+    def calibrate(signals):
+        decayed = np.asarray(signals["decayed"], dtype=np.float64)
+        return decayed, calibrate_strain_array(decayed)
+
+    decayed, probs = _stage(observer, "calibration", calibrate, signals)
 
     # 10. Decision
-    alerts = decide_alerts(probs, signals)
+    alerts = _stage(observer, "decision", lambda probs, signals: decide_alerts(probs.tolist(), signals), probs, signals)
 
     # 11. Output Formatting
-    messages = format_output(alerts)
-    
-    return messages
+    messages = _stage(observer, "output", format_output, alerts)
+
+    return ScriptPulseResult(
+        scenes=scenes,
+        features=features,
+        normalization_inputs=raw_for_norm,
+        features_norm=features_norm,
+        effort=effort,
+        temporal=temporal,
+        signals=signals,
+        decayed=decayed,
+        probabilities=probs,
+        alerts=alerts,
+        messages=messages
+    )
@@ -0,0 +1,44 @@
+"""
+ScriptPulse v1.3.1 engine package.
+
+Public entry points are resolved lazily on first attribute access, so a cold
+`import scriptpulse` loads no engine stage and no NumPy.
+"""
+import importlib
+from typing import Any, Dict, List
+
+__version__ = "1.3.1"
+
+# name -> module that defines it
+_LAZY_ATTRS: Dict[str, str] = {
+    "run_scriptpulse": "run_scriptpulse",
+    "run_scriptpulse_detailed": "run_scriptpulse",
+    "ScriptPulseResult": "run_scriptpulse",
+    "validate_script": "scriptpulse.engine.validator",
+    "preprocess_lines": "scriptpulse.engine.preprocess",
+    "segment_scenes": "scriptpulse.engine.segment",
+    "SceneSegment": "scriptpulse.engine.segment",
+    "Block": "scriptpulse.engine.segment",
+    "extract_scene_features": "scriptpulse.engine.features",
+    "extract_scene_feature_arrays": "scriptpulse.engine.features",
+    "compute_effort": "scriptpulse.engine.effort",
+    "build_temporal_graph": "scriptpulse.engine.temporal_graph",
+    "accumulate_signals": "scriptpulse.engine.accumulate",
+    "calibrate_strain": "scriptpulse.engine.calibration",
+    "decide_alerts": "scriptpulse.engine.decision",
+    "format_output": "scriptpulse.engine.output",
+}
+
+__all__: List[str] = sorted(_LAZY_ATTRS)
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'scriptpulse' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module_name), name)
+    # Cache on the package so the hook runs once per name
+    globals()[name] = value
+    return value
+
+def __dir__() -> List[str]:
+    return sorted(set(__all__) | {"__version__"})
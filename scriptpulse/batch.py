@@ -0,0 +1,272 @@
+"""
+Corpus batch mode.
+
+Analyses many screenplay files in a process pool and streams one result per
+script, either in input order or in completion order. Per-script failures
+(unreadable files, validation or segmentation errors) are captured as
+structured errors instead of aborting the run.
+
+    python -m scriptpulse.batch scripts/ --workers 8 --chunk-size 16 -o results.jsonl
+
+In input order the output is byte-identical for any worker count.
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from scriptpulse.ingest import FDX_EXTENSIONS, FOUNTAIN_EXTENSIONS, iter_script_file
+
+SCRIPT_EXTENSIONS = (".txt",) + FOUNTAIN_EXTENSIONS + FDX_EXTENSIONS
+
+@dataclass
+class BatchResult:
+    index: int
+    path: str
+    messages: Optional[List[str]] = None
+    # {"stage": ..., "type": ..., "message": ...}; None on success
+    error: Optional[Dict[str, str]] = None
+    # Per-scene export columns (scriptpulse.export.result_columns) when requested
+    columns: Optional[Dict[str, Any]] = None
+
+    def to_json(self) -> str:
+        record = {"index": self.index, "path": self.path}
+        if self.error is None:
+            record["messages"] = self.messages
+        else:
+            record["error"] = self.error
+        return json.dumps(record, ensure_ascii=False, sort_keys=True)
+
+def discover_scripts(inputs: Sequence[str], extensions: Sequence[str] = SCRIPT_EXTENSIONS) -> List[str]:
+    """
+    Expands directories (recursively, sorted) and keeps explicit files as given.
+    """
+    paths: List[str] = []
+    for item in inputs:
+        if os.path.isdir(item):
+            found = []
+            for root, dirs, files in os.walk(item):
+                dirs.sort()
+                found.extend(os.path.join(root, f) for f in files if f.endswith(tuple(extensions)))
+            paths.extend(sorted(found))
+        else:
+            paths.append(item)
+    return paths
+
+def read_script_lines(path: str) -> List[str]:
+    """
+    Engine lines of a script file. Fountain and FDX files go through
+    scriptpulse.ingest; anything else is read as plain text.
+    """
+    if path.lower().endswith(FOUNTAIN_EXTENSIONS + FDX_EXTENSIONS):
+        return list(iter_script_file(path))
+    with open(path, "rb") as f:
+        return f.read().decode("utf-8").splitlines()
+
+def _extract_path(index: int, path: str, memory_budget: Optional[int] = None, footprint_models=None):
+    # Stages 1-4 of one script: (features, None), or (None, failed BatchResult).
+    # With a memory budget, segments into span arrays when per-scene lists
+    # would not fit, and fails the script when neither would.
+    from scriptpulse.engine.validator import validate_script
+    from scriptpulse.engine.preprocess import preprocess_lines
+    from scriptpulse.engine.segment import segment_scenes
+    from scriptpulse.engine.features import extract_scene_feature_arrays
+
+    stage = "read"
+    try:
+        lines = read_script_lines(path)
+        segment = segment_scenes
+        if memory_budget is not None:
+            from scriptpulse.memory import MemoryBudgetExceeded, choose_representation, input_shape
+
+            stage = "budget"
+            try:
+                allowed = ("segments", "compact")
+                if choose_representation(input_shape(lines), memory_budget, allowed, footprint_models) == "compact":
+                    from scriptpulse.engine.compact import segment_compact
+
+                    segment = segment_compact
+            except MemoryBudgetExceeded as e:
+                return None, BatchResult(index=index, path=path, error={
+                    "stage": stage,
+                    "type": type(e).__name__,
+                    "message": str(e),
+                    **e.to_dict()
+                })
+        stage = "validation"
+        validate_script(lines)
+        stage = "segmentation"
+        scenes = segment(preprocess_lines(lines))
+        stage = "engine"
+        return extract_scene_feature_arrays(scenes), None
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        return None, BatchResult(index=index, path=path, error={
+            "stage": stage,
+            "type": type(e).__name__,
+            "message": str(e)
+        })
+
+def analyze_path(
+    index: int,
+    path: str,
+    export: bool = False,
+    reference=None,
+    memory_budget: Optional[int] = None,
+    footprint_models=None
+) -> BatchResult:
+    """
+    Reads and analyses one script. Never raises for per-script problems.
+    With export=True the result also carries its per-scene export columns.
+    reference (a NormalizationReference) replaces per-script normalization.
+    memory_budget (bytes) applies scriptpulse.memory's footprint projection,
+    with footprint_models (scriptpulse.memory.load_footprint_models) if given.
+    """
+    return _analyze_chunk([(index, path)], export, reference, memory_budget, footprint_models)[0]
+
+def _analyze_chunk(
+    chunk: List[tuple],
+    export: bool = False,
+    reference=None,
+    memory_budget: Optional[int] = None,
+    footprint_models=None
+) -> List[BatchResult]:
+    # Stages 1-4 per script, then stages 5-11 for the whole chunk in one
+    # ragged pass (scriptpulse.engine.ragged; same results as per script)
+    from scriptpulse.engine.ragged import score_feature_batch
+
+    results: List[BatchResult] = []
+    scored = []
+    for index, path in chunk:
+        features, failed = _extract_path(index, path, memory_budget, footprint_models)
+        if failed is not None:
+            results.append(failed)
+            continue
+        result = BatchResult(index=index, path=path)
+        results.append(result)
+        scored.append((result, features))
+    if not scored:
+        return results
+
+    scores = score_feature_batch([features for _, features in scored], reference)
+    for k, ((result, features), messages) in enumerate(zip(scored, scores.messages())):
+        result.messages = messages
+        if export:
+            from scriptpulse.export import result_columns
+
+            result.columns = result_columns(scores.result(k, features=features))
+    return results
+
+def _warm_up() -> None:
+    # Pay for NumPy and the engine modules once per worker, not per script
+    import numpy  # noqa: F401
+    import run_scriptpulse  # noqa: F401
+    import scriptpulse.engine.features  # noqa: F401
+    import scriptpulse.engine.effort  # noqa: F401
+    import scriptpulse.engine.calibration  # noqa: F401
+    import scriptpulse.engine.ragged  # noqa: F401
+
+def run_batch(
+    paths: Iterable[str],
+    workers: Optional[int] = None,
+    chunk_size: int = 1,
+    ordered: bool = True,
+    export: bool = False,
+    reference=None,
+    memory_budget: Optional[int] = None,
+    footprint_models=None
+) -> Iterator[BatchResult]:
+    """
+    Analyses every path and yields BatchResults.
+    ordered=True yields in input order; ordered=False yields chunks as they complete.
+    workers=1 runs in-process without a pool.
+    export=True attaches per-scene export columns to each successful result.
+    reference (a NormalizationReference) scores every script against fixed
+    corpus bounds (see scriptpulse.reference).
+    memory_budget (bytes) fails scripts whose projected footprint exceeds it
+    (error stage "budget") and uses compact segmentation where that fits;
+    footprint_models replaces scriptpulse.memory's default models.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1")
+    items = list(enumerate(paths))
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+    analyze_chunk = partial(
+        _analyze_chunk, export=export, reference=reference,
+        memory_budget=memory_budget, footprint_models=footprint_models
+    )
+    if workers == 1:
+        for chunk in chunks:
+            yield from analyze_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_up) as pool:
+        if ordered:
+            for results in pool.map(analyze_chunk, chunks):
+                yield from results
+        else:
+            futures = [pool.submit(analyze_chunk, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                yield from future.result()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run ScriptPulse over a corpus of scripts.")
+    parser.add_argument("inputs", nargs="+", help="script files or directories")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count; 1 = in-process)")
+    parser.add_argument("--chunk-size", type=int, default=1, help="scripts per task")
+    parser.add_argument("--order", choices=["input", "completion"], default="input")
+    parser.add_argument("-o", "--output", default="-", help="JSON Lines output file (default: stdout)")
+    parser.add_argument("--export", help="also write per-scene signals here (.npz, .arrow/.feather or .parquet)")
+    parser.add_argument("--reference", help="normalize against corpus statistics (python -m scriptpulse.reference build)")
+    parser.add_argument("--reference-quantiles", type=float, nargs=2, default=(0.0, 1.0), metavar=("LOWER", "UPPER"),
+                        help="bounds taken from the reference (default: min and max)")
+    parser.add_argument("--memory-budget", help="per-script memory budget, e.g. 512M (see scriptpulse.memory)")
+    parser.add_argument("--footprint-models", help="footprint models for --memory-budget (python -m scriptpulse.memory calibrate -o)")
+    args = parser.parse_args(argv)
+
+    paths = discover_scripts(args.inputs)
+    memory_budget = footprint_models = None
+    if args.memory_budget:
+        from scriptpulse.memory import load_footprint_models, parse_size
+
+        memory_budget = parse_size(args.memory_budget)
+        if args.footprint_models:
+            footprint_models = load_footprint_models(args.footprint_models)
+    reference = None
+    if args.reference:
+        from scriptpulse.engine.normalize import NormalizationStats
+
+        reference = NormalizationStats.load(args.reference).reference(*args.reference_quantiles)
+    writer = None
+    if args.export:
+        from scriptpulse.export import open_export_writer
+
+        writer = open_export_writer(args.export)
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="\n")
+    failures = 0
+    try:
+        results = run_batch(
+            paths, args.workers, args.chunk_size, ordered=(args.order == "input"),
+            export=writer is not None, reference=reference,
+            memory_budget=memory_budget, footprint_models=footprint_models
+        )
+        for result in results:
+            failures += result.error is not None
+            out.write(result.to_json() + "\n")
+            if result.columns is not None:
+                writer.write(result.path, result.columns)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if writer is not None:
+            writer.close()
+
+    print(f"{len(paths)} scripts, {failures} failed", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
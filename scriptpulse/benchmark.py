@@ -0,0 +1,309 @@
+"""
+Benchmark suite for the ScriptPulse pipeline.
+
+Generates seeded synthetic scripts (scriptpulse.corpus) at several sizes,
+times every stage of run_scriptpulse separately (through the
+scriptpulse.instrument observer), measures per-stage peak allocation with
+tracemalloc (in a separate pass, so timings are not distorted), and fits a
+scaling exponent per stage (time ~ scenes ** k).
+
+    python -m scriptpulse.benchmark run --sizes 10 100 1000 10000 100000 -o base.json
+    python -m scriptpulse.benchmark compare base.json new.json
+
+compare() applies a two-sided permutation test to the per-repeat timings of
+every stage and size, and reports changes that are both significant and
+larger than a minimum effect size.
+"""
+import argparse
+import gc
+import itertools
+import json
+import math
+import platform
+import random
+import sys
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Sequence
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+
+def _observed_run(lines: List[str], trace_memory: bool = False, **options):
+    # One run_scriptpulse_detailed call; returns (stage records, result)
+    from run_scriptpulse import run_scriptpulse_detailed
+    from scriptpulse.instrument import StageAggregator, observe
+
+    agg = StageAggregator(trace_memory=trace_memory)
+    # Exact per-stage peaks when observe() starts tracing just for this run
+    agg.reset_peak = trace_memory and not tracemalloc.is_tracing()
+    with observe(agg):
+        result = run_scriptpulse_detailed(lines, **options)
+    return agg.records, result
+
+def scaling_exponent(sizes: Sequence[float], times: Sequence[float]) -> Optional[float]:
+    """
+    Least-squares slope of log(time) against log(size); None with < 2 points.
+    """
+    points = [(math.log(n), math.log(t)) for n, t in zip(sizes, times) if n > 0 and t > 0]
+    if len(points) < 2:
+        return None
+    mx = sum(x for x, _ in points) / len(points)
+    my = sum(y for _, y in points) / len(points)
+    sxx = sum((x - mx) ** 2 for x, _ in points)
+    if sxx == 0:
+        return None
+    return sum((x - mx) * (y - my) for x, y in points) / sxx
+
+def _median(values: Sequence[float]) -> float:
+    v = sorted(values)
+    mid = len(v) // 2
+    return v[mid] if len(v) % 2 else 0.5 * (v[mid - 1] + v[mid])
+
+def run_benchmark(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    repeats: int = 5,
+    seed: int = 0,
+    memory: bool = True,
+    generator_options: Optional[dict] = None,
+    pipeline_options: Optional[dict] = None,
+    progress: Optional[Callable[[str], None]] = None
+) -> dict:
+    """
+    Runs the benchmark and returns a JSON-serializable report.
+    Stage timings come from the instrumentation observer on
+    run_scriptpulse_detailed; pipeline_options are passed to it
+    (e.g. {"fused": True}).
+    """
+    from scriptpulse import __version__
+    from scriptpulse.corpus import generate_script
+    import numpy
+
+    if repeats < 1:
+        raise ValueError("repeats must be >= 1")
+    generator_options = dict(generator_options or {})
+    pipeline_options = dict(pipeline_options or {})
+
+    names: List[str] = []
+    results = []
+    for n_scenes in sizes:
+        lines = generate_script(seed, scenes=n_scenes, **generator_options)
+        n_lines = len(lines)
+
+        runs: Dict[str, List[float]] = {}
+        totals = []
+        for _ in range(repeats):
+            gc.collect()
+            records, result = _observed_run(lines, **pipeline_options)
+            for r in records:
+                runs.setdefault(r.stage, []).append(r.wall_ns / 1e9)
+            totals.append(sum(r.wall_ns for r in records) / 1e9)
+        names = list(runs)
+        segmented = next(r for r in records if r.stage in ("segmentation", "scan"))
+        n_blocks = segmented.output_sizes.get("blocks", 0)
+        del result
+
+        peaks = {}
+        if memory:
+            records, _ = _observed_run(lines, trace_memory=True, **pipeline_options)
+            peaks = {r.stage: r.alloc_peak_bytes for r in records}
+
+        stage_reports = {}
+        for name in names:
+            median = _median(runs[name])
+            stage_reports[name] = {
+                "times_s": runs[name],
+                "median_s": median,
+                "lines_per_s": n_lines / median if median > 0 else None,
+                "scenes_per_s": n_scenes / median if median > 0 else None,
+                "peak_bytes": peaks.get(name)
+            }
+        total_median = _median(totals)
+        results.append({
+            "scenes": n_scenes,
+            "lines": n_lines,
+            "blocks": n_blocks,
+            "stages": stage_reports,
+            "total": {
+                "times_s": totals,
+                "median_s": total_median,
+                "lines_per_s": n_lines / total_median if total_median > 0 else None,
+                "scenes_per_s": n_scenes / total_median if total_median > 0 else None,
+                "peak_bytes": max(peaks.values()) if peaks else None
+            }
+        })
+        if progress:
+            progress(f"{n_scenes:>7} scenes  {n_lines:>9} lines  {total_median * 1000:10.1f} ms")
+
+    scaling = {}
+    for name in names + ["total"]:
+        medians = [(r["stages"][name] if name != "total" else r["total"])["median_s"] for r in results]
+        scaling[name] = scaling_exponent([r["scenes"] for r in results], medians)
+
+    return {
+        "engine_version": __version__,
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "platform": platform.platform(),
+        "seed": seed,
+        "repeats": repeats,
+        "generator": generator_options,
+        "pipeline": pipeline_options,
+        "stages": names,
+        "results": results,
+        "scaling_exponents": scaling
+    }
+
+def permutation_p_value(a: Sequence[float], b: Sequence[float], max_permutations: int = 20000, seed: int = 0) -> float:
+    """
+    Two-sided permutation test on the difference of mean log-times.
+    Exact when the number of splits is small, sampled otherwise.
+    """
+    la = [math.log(x) for x in a if x > 0]
+    lb = [math.log(x) for x in b if x > 0]
+    if not la or not lb:
+        return 1.0
+    pooled = la + lb
+    n_a = len(la)
+    total = sum(pooled)
+    observed = abs(sum(la) / n_a - sum(lb) / len(lb))
+
+    def stat(sum_a: float) -> float:
+        return abs(sum_a / n_a - (total - sum_a) / len(lb))
+
+    tol = 1e-12 * max(1.0, observed)
+    n_splits = math.comb(len(pooled), n_a)
+    if n_splits <= max_permutations:
+        hits = sum(
+            stat(sum(pooled[i] for i in idx)) >= observed - tol
+            for idx in itertools.combinations(range(len(pooled)), n_a)
+        )
+        return hits / n_splits
+    r = random.Random(seed)
+    hits = 0
+    for _ in range(max_permutations):
+        r.shuffle(pooled)
+        hits += stat(sum(pooled[:n_a])) >= observed - tol
+    return (hits + 1) / (max_permutations + 1)
+
+def compare_reports(base: dict, new: dict, alpha: float = 0.05, min_effect: float = 0.05) -> List[dict]:
+    """
+    Compares two reports stage by stage for every size present in both.
+    verdict is "slower"/"faster" when p < alpha and the median changed by more
+    than min_effect (relative), otherwise "no change".
+    """
+    base_by_size = {r["scenes"]: r for r in base["results"]}
+    rows = []
+    for r_new in new["results"]:
+        r_base = base_by_size.get(r_new["scenes"])
+        if r_base is None:
+            continue
+        for name in list(r_new["stages"]) + ["total"]:
+            s_new = r_new["total"] if name == "total" else r_new["stages"][name]
+            s_base = r_base["total"] if name == "total" else r_base["stages"].get(name)
+            if s_base is None:
+                continue
+            ratio = s_new["median_s"] / s_base["median_s"] if s_base["median_s"] > 0 else float("inf")
+            p = permutation_p_value(s_base["times_s"], s_new["times_s"])
+            if p < alpha and abs(ratio - 1.0) > min_effect:
+                verdict = "slower" if ratio > 1.0 else "faster"
+            else:
+                verdict = "no change"
+            rows.append({
+                "scenes": r_new["scenes"],
+                "stage": name,
+                "base_median_s": s_base["median_s"],
+                "new_median_s": s_new["median_s"],
+                "ratio": ratio,
+                "p_value": p,
+                "verdict": verdict
+            })
+    return rows
+
+def format_report(report: dict) -> str:
+    names = report["stages"]
+    out = []
+    for r in report["results"]:
+        out.append(f"{r['scenes']} scenes, {r['lines']} lines, {r['blocks']} blocks")
+        out.append(f"  {'stage':<14}{'median ms':>12}{'lines/s':>14}{'scenes/s':>12}{'peak KiB':>12}")
+        for name in names + ["total"]:
+            s = r["total"] if name == "total" else r["stages"][name]
+            peak = "" if s["peak_bytes"] is None else f"{s['peak_bytes'] / 1024:.0f}"
+            lps = f"{s['lines_per_s']:.0f}" if s["lines_per_s"] else "-"
+            sps = f"{s['scenes_per_s']:.0f}" if s["scenes_per_s"] else "-"
+            out.append(f"  {name:<14}{s['median_s'] * 1000:>12.3f}{lps:>14}{sps:>12}{peak:>12}")
+    out.append("scaling exponents (time ~ scenes ** k):")
+    for name, k in report["scaling_exponents"].items():
+        out.append(f"  {name:<14}{'-' if k is None else f'{k:.2f}':>8}")
+    return "\n".join(out)
+
+def format_comparison(rows: List[dict]) -> str:
+    out = [f"{'scenes':>8}  {'stage':<14}{'base ms':>10}{'new ms':>10}{'ratio':>8}{'p':>8}  verdict"]
+    for row in rows:
+        out.append(
+            f"{row['scenes']:>8}  {row['stage']:<14}{row['base_median_s'] * 1000:>10.3f}"
+            f"{row['new_median_s'] * 1000:>10.3f}{row['ratio']:>8.3f}{row['p_value']:>8.3f}  {row['verdict']}"
+        )
+    return "\n".join(out)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the ScriptPulse pipeline.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="time every stage across script sizes")
+    run_p.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="scene counts")
+    run_p.add_argument("--repeats", type=int, default=5)
+    run_p.add_argument("--seed", type=int, default=0)
+    run_p.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    run_p.add_argument("--dialogue-rate", type=float, default=0.5)
+    run_p.add_argument("--blank-rate", type=float, default=0.25)
+    run_p.add_argument("--speakers", type=int, default=8)
+    run_p.add_argument("--parenthetical-rate", type=float, default=0.3)
+    run_p.add_argument("--max-action-words", type=int, default=15)
+    run_p.add_argument("--max-dialogue-words", type=int, default=20)
+    run_p.add_argument("--fused", action="store_true", help="benchmark the fused front end")
+    run_p.add_argument("--compact", action="store_true", help="benchmark the compact segmentation")
+    run_p.add_argument("-o", "--output", help="write the JSON report here")
+
+    cmp_p = sub.add_parser("compare", help="compare two JSON reports")
+    cmp_p.add_argument("base")
+    cmp_p.add_argument("new")
+    cmp_p.add_argument("--alpha", type=float, default=0.05)
+    cmp_p.add_argument("--min-effect", type=float, default=0.05, help="minimum relative change to report")
+    cmp_p.add_argument("--fail-on-regression", action="store_true", help="exit 1 if any stage is slower")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        report = run_benchmark(
+            sizes=args.sizes,
+            repeats=args.repeats,
+            seed=args.seed,
+            memory=not args.no_memory,
+            generator_options={
+                "dialogue_rate": args.dialogue_rate,
+                "blank_rate": args.blank_rate,
+                "speakers": args.speakers,
+                "parenthetical_rate": args.parenthetical_rate,
+                "max_action_words": args.max_action_words,
+                "max_dialogue_words": args.max_dialogue_words
+            },
+            pipeline_options={"fused": args.fused, "compact": args.compact},
+            progress=lambda msg: print(msg, file=sys.stderr)
+        )
+        print(format_report(report))
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=1)
+        return 0
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    rows = compare_reports(base, new, alpha=args.alpha, min_effect=args.min_effect)
+    print(format_comparison(rows))
+    if args.fail_on_regression and any(row["verdict"] == "slower" for row in rows):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+"""
+Persistent content-addressed result cache.
+
+The engine is deterministic and versioned (docs/REPRODUCIBILITY.md), so a
+result depends only on the input lines and the engine version. This cache
+stores detailed results in one SQLite file keyed by a hash of both, evicts
+least recently used entries beyond a size bound, and coalesces concurrent
+computations of the same input: within a process through a shared future,
+across processes through a lease row, so only one of them runs the engine.
+
+    with PersistentResultCache("~/.cache/scriptpulse.sqlite") as cache:
+        result = cache.get_or_compute(lines)     # ScriptPulseResult
+        print(cache.stats())
+
+    python -m scriptpulse.cache stats ~/.cache/scriptpulse.sqlite
+
+Values are pickled; only open cache files this tool wrote.
+"""
+import argparse
+import hashlib
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Optional
+
+if TYPE_CHECKING:
+    from run_scriptpulse import ScriptPulseResult
+
+DEFAULT_MAX_BYTES = 1 << 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_access INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+COUNTER_NAMES = ("hits", "misses", "evictions", "coalesced")
+
+def input_key(lines: Iterable[str], version: Optional[str] = None) -> str:
+    """
+    Content hash of the input lines and the engine version.
+    Lines are length-prefixed, so no two different line lists collide by
+    concatenation.
+    """
+    if version is None:
+        from scriptpulse import __version__ as version
+
+    h = hashlib.blake2b(digest_size=32)
+    h.update(f"scriptpulse {version}\0".encode("utf-8"))
+    for line in lines:
+        data = line.encode("utf-8", "surrogatepass")
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+def _compute(lines) -> "ScriptPulseResult":
+    from run_scriptpulse import run_scriptpulse_detailed
+
+    # Compact scenes keep each entry close to the size of the script itself
+    return run_scriptpulse_detailed(lines, compact=True)
+
+class PersistentResultCache:
+    """
+    SQLite-backed LRU of ScriptPulseResults, bounded by stored bytes.
+    Safe to share between threads and processes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        lease_seconds: float = 300.0,
+        compress: bool = True
+    ):
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be >= 1")
+        from scriptpulse import __version__
+
+        self.path = os.path.expanduser(path)
+        self.version = __version__
+        self.max_bytes = max_bytes
+        self.lease_seconds = lease_seconds
+        self.compress = compress
+        self._owner = f"{os.getpid()}:{id(self)}"
+        self._lock = threading.RLock()
+        self._pending: Dict[str, Future] = {}
+        self._db = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    # Storage
+
+    def _bump(self, name: str, by: int = 1) -> None:
+        self._db.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, by)
+        )
+
+    def get(self, key: str) -> Optional["ScriptPulseResult"]:
+        """
+        Stored result for `key`, or None. Counts a hit or a miss.
+        """
+        return self._fetch(key, count=True)
+
+    def _fetch(self, key: str, count: bool) -> Optional["ScriptPulseResult"]:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                if count:
+                    self._bump("misses")
+                return None
+            self._db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time_ns(), key))
+            if count:
+                self._bump("hits")
+        data = row[0]
+        if self.compress:
+            data = zlib.decompress(data)
+        return pickle.loads(data)
+
+    def put(self, key: str, result: "ScriptPulseResult") -> None:
+        """
+        Stores `result`, then evicts least recently used entries until the
+        cache fits in max_bytes. Results larger than max_bytes are not stored.
+        """
+        data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        if self.compress:
+            data = zlib.compress(data, 1)
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO entries (key, version, value, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, self.version, data, len(data), time.time_ns())
+                )
+                total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                evicted = 0
+                if total > self.max_bytes:
+                    for old_key, size in db.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+                        if total <= self.max_bytes:
+                            break
+                        if old_key == key:
+                            continue
+                        db.execute("DELETE FROM entries WHERE key = ?", (old_key,))
+                        total -= size
+                        evicted += 1
+                if evicted:
+                    self._bump("evictions", evicted)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+    # Single flight
+
+    def _try_lease(self, key: str) -> bool:
+        # True when this process now owns the computation of `key`
+        now = time.time()
+        with self._lock:
+            self._db.execute("DELETE FROM leases WHERE key = ? AND expires < ?", (key, now))
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO leases (key, owner, expires) VALUES (?, ?, ?)",
+                (key, self._owner, now + self.lease_seconds)
+            )
+            return cursor.rowcount == 1
+
+    def _release_lease(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self._owner))
+
+    def get_or_compute(
+        self,
+        lines,
+        compute: Optional[Callable] = None,
+        key: Optional[str] = None,
+        poll_seconds: float = 0.05
+    ) -> "ScriptPulseResult":
+        """
+        Cached result for `lines`, computing it (once across all concurrent
+        callers) on a miss. compute defaults to run_scriptpulse_detailed;
+        engine errors propagate and are not cached.
+        """
+        if key is None:
+            key = input_key(lines, self.version)
+        result = self.get(key)
+        if result is not None:
+            return result
+
+        with self._lock:
+            future = self._pending.get(key)
+            leader = future is None
+            if leader:
+                future = self._pending[key] = Future()
+        if not leader:
+            with self._lock:
+                self._bump("coalesced")
+            return future.result()
+
+        try:
+            result = self._lead(key, lines, compute or _compute, poll_seconds)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._pending[key]
+
+    def _lead(self, key: str, lines, compute: Callable, poll_seconds: float) -> "ScriptPulseResult":
+        # The only caller for `key` in this process; coordinate with other processes
+        waited = False
+        while not self._try_lease(key):
+            waited = True
+            time.sleep(poll_seconds)
+            result = self._fetch(key, count=False)
+            if result is not None:
+                with self._lock:
+                    self._bump("coalesced")
+                return result
+        try:
+            if waited:
+                # The other process may have finished between our polls
+                result = self._fetch(key, count=False)
+                if result is not None:
+                    with self._lock:
+                        self._bump("coalesced")
+                    return result
+            result = compute(lines)
+            self.put(key, result)
+            return result
+        finally:
+            self._release_lease(key)
+
+    def run(self, lines):
+        """
+        Cached equivalent of run_scriptpulse(lines): the alert messages.
+        """
+        return self.get_or_compute(lines).messages
+
+    # Inspection
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            counters = dict(self._db.execute("SELECT name, value FROM counters").fetchall())
+        out: Dict[str, object] = {"entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+        for name in COUNTER_NAMES:
+            out[name] = counters.get(name, 0)
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = out["hits"] / lookups if lookups else 0.0
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._db.execute("DELETE FROM counters")
+        self.vacuum()
+
+    def vacuum(self) -> None:
+        with self._lock:
+            self._db.execute("VACUUM")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "PersistentResultCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect or use a persistent ScriptPulse result cache.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    stats_p = sub.add_parser("stats", help="entries, bytes and hit rate")
+    stats_p.add_argument("cache")
+    clear_p = sub.add_parser("clear", help="remove every entry and reset counters")
+    clear_p.add_argument("cache")
+    run_p = sub.add_parser("run", help="print the alerts for scripts, through the cache")
+    run_p.add_argument("cache")
+    run_p.add_argument("scripts", nargs="+")
+    run_p.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES)
+    args = parser.parse_args(argv)
+
+    with PersistentResultCache(args.cache, max_bytes=getattr(args, "max_bytes", DEFAULT_MAX_BYTES)) as cache:
+        if args.command == "stats":
+            for name, value in cache.stats().items():
+                print(f"{name:<12}{value:.3f}" if isinstance(value, float) else f"{name:<12}{value}")
+        elif args.command == "clear":
+            cache.clear()
+        else:
+            for path in args.scripts:
+                with open(path, "rb") as f:
+                    lines = f.read().decode("utf-8").splitlines()
+                try:
+                    messages = cache.run(lines)
+                except ValueError as e:
+                    print(f"{path}: error: {e}")
+                    continue
+                print(f"{path}: {len(messages)} alerts")
+                for message in messages:
+                    print(f"  {message}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Seeded synthetic screenplay generator.
+
+Produces scripts in the engine's input format (one string per line, no
+newlines) for equivalence checks and benchmarks. The same seed always gives
+the same script. With malformed=True some scripts are corrupted so that each
+of the engine's validation and segmentation errors is exercised.
+"""
+import random
+from typing import Iterator, List
+
+SPEAKERS = ["ALICE", "BOB", "CAROL", "DAVE", "EVE", "MALLORY", "TRENT", "O.S. VOICE"]
+LOCATIONS = ["HOUSE", "STREET - NIGHT", "CAR - DAY", "OFFICE - CONTINUOUS", "ROOFTOP"]
+WORDS = (
+    "the run falls he she it door light dark window quickly slowly looks "
+    "back at turns away and then"
+).split()
+
+# Lines that break a validation or segmentation rule when inserted
+BAD_LINES = ["hello", "BOB", "(beat", "(x)", "X" * 45, "WHAT?", "  INT. X", "INT. lower"]
+
+def _sentence(r: random.Random, n: int) -> str:
+    return " ".join(r.choice(WORDS) for _ in range(n)).capitalize() + r.choice([".", "!", "?", "...", ""])
+
+def speaker_names(count: int) -> List[str]:
+    """
+    `count` distinct valid speaker names (uppercase, no trailing punctuation).
+    """
+    names = SPEAKERS[:count]
+    names += [f"EXTRA {i}" for i in range(count - len(names))]
+    return names
+
+def generate_script(
+    seed: int,
+    scenes: int = 50,
+    dialogue_rate: float = 0.5,
+    blank_rate: float = 0.25,
+    speakers: int = len(SPEAKERS),
+    parenthetical_rate: float = 0.3,
+    max_action_words: int = 15,
+    max_dialogue_words: int = 20,
+    max_elements: int = 12
+) -> List[str]:
+    """
+    Returns a well-formed script with `scenes` scenes; it always passes
+    validate_script. Includes blank and whitespace-only lines, tabs, runs of
+    spaces, parentheticals and empty scenes.
+
+    Each scene has 0..max_elements elements; an element is a blank line
+    (blank_rate), a dialogue exchange (dialogue_rate) or an action paragraph
+    (the rest). Sentence lengths are drawn from 1..max_*_words words.
+    """
+    if blank_rate < 0 or dialogue_rate < 0 or blank_rate + dialogue_rate > 1:
+        raise ValueError("blank_rate and dialogue_rate must be >= 0 and sum to at most 1")
+    if speakers < 1:
+        raise ValueError("speakers must be >= 1")
+    action_cut = 1.0 - dialogue_rate
+    names = speaker_names(speakers)
+
+    r = random.Random(seed)
+    out: List[str] = []
+    if r.random() < 0.3:
+        out += ["", "  "]
+    for _ in range(scenes):
+        out.append(r.choice(["INT. ", "EXT. "]) + r.choice(LOCATIONS))
+        if r.random() < 0.1:
+            continue
+        for _ in range(r.randint(0, max_elements)):
+            k = r.random()
+            if k < blank_rate:
+                out.append("")
+            elif k < action_cut:
+                for _ in range(r.randint(1, 4)):
+                    text = " ".join(_sentence(r, r.randint(1, max_action_words)) for _ in range(r.randint(1, 3)))
+                    if r.random() < 0.1:
+                        text = "\t " + text
+                    if r.random() < 0.1:
+                        text += "  "
+                    out.append(text)
+            else:
+                out.append(r.choice(names[:r.randint(1, len(names))]))
+                if r.random() < parenthetical_rate:
+                    out.append("(beat)")
+                for _ in range(r.randint(0, 3)):
+                    out.append(_sentence(r, r.randint(1, max_dialogue_words)) + "  " + _sentence(r, r.randint(0, 8)))
+                if r.random() < 0.5:
+                    out.append("")
+    return out
+
+def generate_corpus(count: int, seed: int = 0, max_scenes: int = 60, malformed: bool = True) -> Iterator[List[str]]:
+    """
+    Yields `count` scripts of 1..max_scenes scenes. With malformed=True roughly
+    half are corrupted (bad line inserted, text before the first header,
+    headers removed, or whitespace only).
+    """
+    for i in range(count):
+        script_seed = seed * 1_000_003 + i
+        lines = generate_script(script_seed, scenes=1 + i % max_scenes)
+        if malformed:
+            r = random.Random(script_seed)
+            kind = i % 8
+            if kind == 1:
+                lines.insert(r.randint(0, len(lines)), r.choice(BAD_LINES))
+            elif kind == 2:
+                lines.insert(0, "some text")
+            elif kind == 3:
+                lines = [line for line in lines if not line.startswith(("INT", "EXT"))]
+            elif kind == 5:
+                lines = r.choice([[], ["", "  "]])
+        yield lines
@@ -4,6 +4,7 @@ def accumulate_signals(temporal: Dict[str, List[float]]) -> Dict[str, List[Optio
     """
     Aligns and returns accumulated effort signals.
     Prepends None to windowed signals to align indices with the decayed signal.
+    Extra "window_*" horizons from build_temporal_graph are aligned the same way.
     """
     # Validate keys
     required_keys = ["decayed", "window_short", "window_medium", "window_long"]
@@ -32,9 +33,13 @@ def accumulate_signals(temporal: Dict[str, List[float]]) -> Dict[str, List[Optio
         padding = [None] * pad_len
         return padding + list(window_raw)
 
-    return {
+    aligned = {
         "decayed": aligned_decayed,
         "window_short": align_window(temporal["window_short"]),
         "window_medium": align_window(temporal["window_medium"]),
         "window_long": align_window(temporal["window_long"])
     }
+    for k in temporal:
+        if k.startswith("window_") and k not in aligned:
+            aligned[k] = align_window(temporal[k])
+    return aligned
@@ -1,11 +1,23 @@
 from typing import List
 import numpy as np
-from sklearn.linear_model import LogisticRegression
 
 # FROZEN WEIGHTS (MANDATORY)
 W = 1.0
 B = 0.0
 
+def calibrate_strain_array(accum_effort) -> np.ndarray:
+    """
+    Maps accumulated effort values to strain probabilities with the frozen logistic mapping.
+    P = 1 / (1 + exp(-(W * x + B)))
+    Accepts any array shape, e.g. (n_scenes,) or batched (n_scripts, n_scenes).
+    NaN entries (padding) map to NaN.
+    """
+    X = np.asarray(accum_effort, dtype=np.float64)
+    z = X * W + B
+    # exp overflows to inf for z < -709, giving the correct limit 0.0
+    with np.errstate(over='ignore'):
+        return 1.0 / (1.0 + np.exp(-z))
+
 def calibrate_strain(accum_effort: List[float]) -> List[float]:
     """
     Maps accumulated effort values to strain probabilities using a frozen Logistic Regression model.
@@ -14,9 +26,22 @@ def calibrate_strain(accum_effort: List[float]) -> List[float]:
     if not accum_effort:
         return []
 
+    # Return as list of floats
+    return calibrate_strain_array(accum_effort).tolist()
+
+def calibrate_strain_reference(accum_effort: List[float]) -> List[float]:
+    """
+    Reference path: evaluates the frozen model through scikit-learn's LogisticRegression.
+    Requires scikit-learn (optional dependency). Not used by the engine pipeline.
+    """
+    if not accum_effort:
+        return []
+
+    from sklearn.linear_model import LogisticRegression
+
     # Initialize model
     model = LogisticRegression(solver='liblinear')
-    
+
     # Manually set parameters (Inference-only, no training)
     # coef_ shape: (1, n_features) -> (1, 1)
     model.coef_ = np.array([[W]])
@@ -26,12 +51,7 @@ def calibrate_strain(accum_effort: List[float]) -> List[float]:
     model.classes_ = np.array([0, 1])
 
     # Sklearn expects 2D array: (n_samples, n_features)
-    # Our feature is 'accumulated effort' (scalar per sample)
     X = np.array(accum_effort).reshape(-1, 1)
 
-    # Predict probabilities
     # predict_proba returns (n_samples, 2), we want P(class=1) -> column 1
-    probs = model.predict_proba(X)[:, 1]
-
-    # Return as list of floats
-    return probs.tolist()
+    return model.predict_proba(X)[:, 1].tolist()
@@ -0,0 +1,245 @@
+import re
+from array import array
+from typing import Iterator, List, Optional
+
+from scriptpulse.engine.segment import count_words
+
+# Same rules as engine.segment
+scene_header_pattern = re.compile(r'^(INT\.|EXT\.)')
+sentence_split_pattern = re.compile(r'[.!?]')
+
+ACTION = 0
+DIALOGUE = 1
+BLOCK_TYPE_NAMES = ("ACTION", "DIALOGUE")
+
+class CompactScript:
+    """
+    Span-based segmentation of one script.
+
+    All text lives once in `lines` (the preprocessed line buffer); scenes,
+    blocks and sentences are rows in shared integer arrays:
+
+        scene_line_start/end    scene k spans lines[start:end] (header first)
+        scene_block_start/end   blocks of scene k
+        block_type              ACTION or DIALOGUE
+        block_speaker           index into `speakers`, -1 for none
+        block_line_offsets      lines of block b are
+                                lines[block_line_index[offsets[b]:offsets[b + 1]]]
+        block_sentence_offsets  sentences of block b are rows offsets[b]:offsets[b + 1]
+        sentence_start/end      character span in the block's space-joined text
+        line_words              words per line of `lines` (len(line.split()))
+        sentence_words          words per sentence
+
+    Indexing or iterating yields CompactScene views that expose the
+    SceneSegment attributes lazily.
+    """
+    __slots__ = (
+        "lines", "speakers",
+        "scene_line_start", "scene_line_end", "scene_block_start", "scene_block_end",
+        "block_type", "block_speaker", "block_line_offsets", "block_line_index",
+        "block_sentence_offsets", "sentence_start", "sentence_end",
+        "line_words", "sentence_words",
+    )
+
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+        self.speakers: List[str] = []
+        self.scene_line_start = array("q")
+        self.scene_line_end = array("q")
+        self.scene_block_start = array("q")
+        self.scene_block_end = array("q")
+        self.block_type = array("b")
+        self.block_speaker = array("q")
+        self.block_line_offsets = array("q", [0])
+        self.block_line_index = array("q")
+        self.block_sentence_offsets = array("q", [0])
+        self.sentence_start = array("q")
+        self.sentence_end = array("q")
+        self.line_words = array("q")
+        self.sentence_words = array("q")
+
+    def __len__(self) -> int:
+        return len(self.scene_line_start)
+
+    def __getitem__(self, k: int) -> "CompactScene":
+        n = len(self)
+        if k < 0:
+            k += n
+        if not 0 <= k < n:
+            raise IndexError("scene index out of range")
+        return CompactScene(self, k)
+
+    def __iter__(self) -> Iterator["CompactScene"]:
+        for k in range(len(self)):
+            yield CompactScene(self, k)
+
+    def block_text(self, b: int) -> str:
+        """
+        Space-joined text of block b (what sentence spans index into).
+        """
+        lines = self.lines
+        index = self.block_line_index[self.block_line_offsets[b]:self.block_line_offsets[b + 1]]
+        return " ".join([lines[i] for i in index])
+
+class CompactScene:
+    """
+    Read-only view of one scene; attributes match SceneSegment.
+    """
+    __slots__ = ("_script", "scene_index")
+
+    def __init__(self, script: CompactScript, scene_index: int):
+        self._script = script
+        self.scene_index = scene_index
+
+    @property
+    def header(self) -> str:
+        return self._script.lines[self._script.scene_line_start[self.scene_index]]
+
+    @property
+    def raw_lines(self) -> List[str]:
+        s = self._script
+        return s.lines[s.scene_line_start[self.scene_index]:s.scene_line_end[self.scene_index]]
+
+    @property
+    def blocks(self) -> List["CompactBlock"]:
+        s = self._script
+        k = self.scene_index
+        return [CompactBlock(s, b) for b in range(s.scene_block_start[k], s.scene_block_end[k])]
+
+class CompactBlock:
+    """
+    Read-only view of one block; attributes match Block.
+    """
+    __slots__ = ("_script", "_index")
+
+    def __init__(self, script: CompactScript, index: int):
+        self._script = script
+        self._index = index
+
+    @property
+    def block_type(self) -> str:
+        return BLOCK_TYPE_NAMES[self._script.block_type[self._index]]
+
+    @property
+    def speaker(self) -> Optional[str]:
+        speaker_id = self._script.block_speaker[self._index]
+        return self._script.speakers[speaker_id] if speaker_id >= 0 else None
+
+    @property
+    def lines(self) -> List[str]:
+        s = self._script
+        index = s.block_line_index[s.block_line_offsets[self._index]:s.block_line_offsets[self._index + 1]]
+        return [s.lines[i] for i in index]
+
+    @property
+    def sentences(self) -> List[str]:
+        s = self._script
+        text = s.block_text(self._index)
+        lo, hi = s.block_sentence_offsets[self._index], s.block_sentence_offsets[self._index + 1]
+        return [text[a:b] for a, b in zip(s.sentence_start[lo:hi], s.sentence_end[lo:hi])]
+
+def segment_compact(lines: List[str]) -> CompactScript:
+    """
+    Compact equivalent of segment_scenes: same scenes, blocks and sentences,
+    same errors, but stored as spans over `lines` instead of copied lists.
+    `lines` must be the preprocessed lines and is kept, not copied.
+    """
+    if not isinstance(lines, list):
+        lines = list(lines)
+    script = CompactScript(lines)
+    speaker_ids = {}
+
+    scene_line_start = script.scene_line_start
+    block_line_index = script.block_line_index
+    sentence_start = script.sentence_start
+    sentence_end = script.sentence_end
+    sentence_words = script.sentence_words
+    n_scenes = 0
+    open_block: Optional[int] = None  # type of the block under construction
+    last_non_blank_type = None
+
+    def finalize_block():
+        nonlocal open_block
+        if open_block is None:
+            return
+        b = len(script.block_type) - 1
+        script.block_line_offsets.append(len(block_line_index))
+        # Sentence Splitting: the stripped, non-empty pieces between . ! ?
+        # Each piece is followed by exactly one delimiter character
+        pos = 0
+        for piece in sentence_split_pattern.split(script.block_text(b)):
+            stripped = piece.strip()
+            if stripped:
+                start = pos + piece.index(stripped)
+                sentence_start.append(start)
+                sentence_end.append(start + len(stripped))
+                sentence_words.append(len(stripped.split()))
+            pos += len(piece) + 1
+        script.block_sentence_offsets.append(len(script.sentence_start))
+        open_block = None
+
+    def open_new_block(block_type: int, speaker: Optional[str]):
+        nonlocal open_block
+        script.block_type.append(block_type)
+        if speaker is None:
+            script.block_speaker.append(-1)
+        else:
+            speaker_id = speaker_ids.get(speaker)
+            if speaker_id is None:
+                speaker_id = speaker_ids[speaker] = len(script.speakers)
+                script.speakers.append(speaker)
+            script.block_speaker.append(speaker_id)
+        open_block = block_type
+
+    def close_scene(end: int):
+        finalize_block()
+        script.scene_line_end.append(end)
+        script.scene_block_end.append(len(script.block_type))
+
+    for i, line in enumerate(lines):
+        if line.isupper() and scene_header_pattern.match(line):
+            if n_scenes:
+                close_scene(i)
+            scene_line_start.append(i)
+            script.scene_block_start.append(len(script.block_type))
+            n_scenes += 1
+            last_non_blank_type = None
+            continue
+
+        if not n_scenes:
+            if line == "":
+                continue
+            raise ValueError("Content before first scene header")
+
+        if line == "":
+            # BLANK
+            finalize_block()
+        elif line.isupper() and len(line) <= 40:
+            # SPEAKER
+            finalize_block()
+            open_new_block(DIALOGUE, line)
+            last_non_blank_type = "SPEAKER"
+        elif line.startswith('(') and line.endswith(')'):
+            # PARENTHETICAL
+            if open_block == DIALOGUE:
+                block_line_index.append(i)
+            last_non_blank_type = "PARENTHETICAL"
+        elif last_non_blank_type == "SPEAKER" or last_non_blank_type == "PARENTHETICAL":
+            # DIALOGUE
+            if open_block == DIALOGUE:
+                block_line_index.append(i)
+            last_non_blank_type = "DIALOGUE"
+        else:
+            # ACTION
+            if open_block == DIALOGUE:
+                finalize_block()
+            if open_block is None:
+                open_new_block(ACTION, None)
+            block_line_index.append(i)
+            last_non_blank_type = "ACTION"
+
+    if not n_scenes:
+        raise ValueError("No scenes detected")
+    close_scene(len(lines))
+    script.line_words = count_words(lines)
+    return script
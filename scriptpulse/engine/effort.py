@@ -1,4 +1,5 @@
 from typing import List, Dict
+import numpy as np
 
 # MANDATORY CONSTANTS (FROZEN)
 ALPHA   = 1.0
@@ -8,6 +9,16 @@ DELTA   = 1.0
 EPSILON = 1.0
 ZETA    = 1.0
 
+# Column order of the normalized feature matrix
+EFFORT_FEATURE_KEYS = [
+    "AvgSentenceLength",
+    "ActionDensity",
+    "DialogueTurnCount",
+    "RepetitionScore",
+    "VisualDensityPenalty",
+    "AuditoryLoad"
+]
+
 def compute_effort(features_norm: List[Dict[str, float]]) -> List[float]:
     """
     Computes per-scene Effort values using the fixed linear formula.
@@ -37,3 +48,22 @@ def compute_effort(features_norm: List[Dict[str, float]]) -> List[float]:
         effort_values.append(effort)
         
     return effort_values
+
+def compute_effort_matrix(features_norm: np.ndarray) -> np.ndarray:
+    """
+    Computes per-scene Effort values for a normalized feature matrix.
+    Rows are scenes, columns follow EFFORT_FEATURE_KEYS.
+    Terms are added in the same order as compute_effort, so results are bit-identical.
+    """
+    X = np.asarray(features_norm, dtype=np.float64)
+    if X.ndim != 2 or X.shape[1] != len(EFFORT_FEATURE_KEYS):
+        raise ValueError("Feature matrix must have shape (n_scenes, 6)")
+
+    return (
+        ALPHA   * X[:, 0] +
+        BETA    * X[:, 1] +
+        GAMMA   * X[:, 2] +
+        DELTA   * X[:, 3] +
+        EPSILON * X[:, 4] +
+        ZETA    * X[:, 5]
+    )
@@ -1,186 +1,339 @@
 
-from typing import List, Dict, Union
+from array import array
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple, Union
 import math
-# Type checking import only to avoid runtime circular dependency or just for clarity
-# In python runtime, if we just type hint with strings it is fine.
-# But for users of this function, they will pass SceneSegment objects.
-# We assume the module is importable if needed, but we don't need to import the class definition 
-# to run the logic if we just access attributes. 
-# However, for type hints to be useful to static analysis, we usually suggest importing.
-# But "Allowed Imports" did not list the module. 
+import numpy as np
 # "SceneSegment and Block are imported only from engine.segment" -> OK to import.
 from scriptpulse.engine.segment import SceneSegment, Block
+from scriptpulse.engine.compact import CompactScript, ACTION, DIALOGUE
 
-def extract_scene_features(scenes: List[SceneSegment]) -> List[Dict[str, Union[float, int]]]:
+# Canonical feature order (matches the per-scene dict layout)
+FEATURE_KEYS = [
+    "Lines",
+    "Words",
+    "Sentences",
+    "ActionLines",
+    "DialogueLines",
+    "DialogueTurns",
+    "Speakers",
+
+    "AvgSentenceLength",
+    "MaxSentenceLength",
+    "SentenceVariance",
+
+    "DialogueTurnCount",
+    "SpeakerSwitchCount",
+    "DialogueActionRatio",
+
+    "AvgActionBlockLength",
+    "MaxContinuousLines",
+    "WhitespaceRatio",
+
+    "AuditoryLoad",
+]
+
+# Features that are ratios/means; all others are integer counts
+FLOAT_FEATURE_KEYS = {
+    "AvgSentenceLength",
+    "SentenceVariance",
+    "DialogueActionRatio",
+    "AvgActionBlockLength",
+    "WhitespaceRatio",
+    "AuditoryLoad",
+}
+
+@dataclass
+class SceneFeatureArrays:
     """
-    Computes raw per-scene structural features.
-    Deterministic, raw calculation only.
+    Struct-of-arrays view of the raw per-scene features.
+    One NumPy array per feature key, indexed by scene.
+    """
+    columns: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.columns["Lines"])
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        return self.columns[key]
+
+    def to_dicts(self) -> List[Dict[str, Union[float, int]]]:
+        """
+        Returns the legacy list-of-dicts layout (one dict per scene, Python scalars).
+        """
+        return [dict(zip(FEATURE_KEYS, row)) for row in self.to_rows()]
+
+    def to_rows(self) -> List[tuple]:
+        """
+        Returns one tuple per scene with values in FEATURE_KEYS order.
+        """
+        return list(zip(*[self.columns[k].tolist() for k in FEATURE_KEYS]))
+
+    @classmethod
+    def from_rows(cls, rows: List[tuple]) -> "SceneFeatureArrays":
+        """
+        Inverse of to_rows.
+        """
+        cols = list(zip(*rows)) if rows else [()] * len(FEATURE_KEYS)
+        return cls(columns={
+            k: np.array(col, dtype=np.float64 if k in FLOAT_FEATURE_KEYS else np.int64)
+            for k, col in zip(FEATURE_KEYS, cols)
+        })
+
+    @classmethod
+    def concatenate(cls, parts: List["SceneFeatureArrays"]) -> "SceneFeatureArrays":
+        """
+        Features of consecutive runs of scenes, joined in order. Per-scene
+        features do not depend on other scenes, so this equals extracting
+        all scenes at once.
+        """
+        if not parts:
+            return cls.from_rows([])
+        return cls(columns={k: np.concatenate([p.columns[k] for p in parts]) for k in FEATURE_KEYS})
+
+def _segment_sum(values: np.ndarray, seg_ids: np.ndarray, n: int) -> np.ndarray:
+    # Integer-valued sums are exact in float64 well beyond any script size
+    return np.bincount(seg_ids, weights=values, minlength=n).astype(np.int64)
+
+def _segment_max(values: np.ndarray, seg_ids: np.ndarray, n: int) -> np.ndarray:
+    # Empty segments report 0, matching the scalar definition
+    out = np.zeros(n, dtype=np.int64)
+    np.maximum.at(out, seg_ids, values)
+    return out
+
+def _segment_fsum(values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    # Exactly rounded per-segment sums (math.fsum), so variances stay bit-identical
+    # to the scalar definition. Only the final summation is done per segment.
+    flat = values.tolist()
+    ends = np.cumsum(counts).tolist()
+    starts = [0] + ends[:-1]
+    return np.array([math.fsum(flat[a:b]) for a, b in zip(starts, ends)], dtype=np.float64)
+
+@dataclass
+class _FlatScript:
+    """
+    Per-line, per-block and per-sentence arrays the feature reductions run on.
+    Speaker IDs only need to be consistent within one script.
     """
-    features_list = []
+    lines_per_scene: np.ndarray
+    line_words: np.ndarray
+    blocks_per_scene: np.ndarray
+    block_lines: np.ndarray
+    is_action: np.ndarray
+    is_dialogue: np.ndarray
+    sentences_per_block: np.ndarray
+    sentence_lengths: np.ndarray
+    # Per dialogue block
+    speaker_ids: np.ndarray
+    speaker_named: np.ndarray
+    n_speakers: int
 
+def _recorded_counts(scenes: List[SceneSegment]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    # Concatenated per-line and per-sentence token counts from segmentation,
+    # or None when any scene lacks them or was edited since
+    line_words, sentence_words = array("q"), array("q")
     for scene in scenes:
-        # Pre-calc collections
-        all_blocks = scene.blocks
-        action_blocks = [b for b in all_blocks if b.block_type == "ACTION"]
-        dialogue_blocks = [b for b in all_blocks if b.block_type == "DIALOGUE"]
-        
-        # 1. Basic Counts
-        # Lines_i: Total raw lines
-        lines_count = len(scene.raw_lines)
-        
-        # Words_i: Total word count across all non-blank lines
-        words_count = 0
-        for line in scene.raw_lines:
-            stripped = line.strip()
-            if stripped:
-                # "Split on whitespace"
-                words_count += len(stripped.split())
-        
-        # Sentences_i: Total detected sentences
-        # Sentences are in block.sentences
-        all_sentences = []
-        for b in all_blocks:
-            all_sentences.extend(b.sentences)
-        sentences_count = len(all_sentences)
-        
-        # ActionLines_i: Total lines in ACTION blocks
-        action_lines_count = sum(len(b.lines) for b in action_blocks)
-        
-        # DialogueLines_i: Total lines in DIALOGUE blocks (exclude speaker name line)
-        # Block structure: speaker is a field, not in lines. lines are just the speech/paren.
-        # So len(b.lines) is correct.
-        dialogue_lines_count = sum(len(b.lines) for b in dialogue_blocks)
-        
-        # DialogueTurns_i: number of dialogue blocks
-        dialogue_turns_count = len(dialogue_blocks)
-        
-        # Speakers_i: unique speakers
-        unique_speakers = set()
-        for b in dialogue_blocks:
-            if b.speaker:
-                unique_speakers.add(b.speaker)
-        speakers_count = len(unique_speakers)
-        
-        # 2. Sentence Metrics
-        sentence_lengths = [len(s.split()) for s in all_sentences]
-        
-        # AvgSentenceLength_i
-        if sentences_count > 0:
-            avg_sentence_len = words_count / sentences_count # Wait says "Using sentence word counts"
-            # Text: "AvgSentenceLength_i = Words_i / Sentences_i"
-            # But Words_i includes words from lines that might not be in "sentences"? 
-            # (e.g. headers, or if splitting logic discarded something?)
-            # Prompt says "Using sentence word counts" then formulas.
-            # "Words_i" was defined as "total word count across all non-blank lines".
-            # "Sentences_i" is total detected.
-            # Formula: Words_i / Sentences_i. We follow formula strictly.
-            # (Note: Words_i includes Header line words usually? Header is in raw_lines.)
-            avg_sentence_len = float(words_count) / sentences_count
-        else:
-            avg_sentence_len = 0.0
-            
-        # MaxSentenceLength_i
-        # "max words in any sentence" -> From detected sentences.
-        if sentence_lengths:
-            max_sentence_len = max(sentence_lengths)
-        else:
-            max_sentence_len = 0
-            
-        # SentenceVariance_i
-        # "population variance of sentence word counts"
-        if sentences_count < 2:
-            sentence_variance = 0.0
-        else:
-            # Pop Variance: sum((x - mean)^2) / N
-            # Mean of sentences specifically, or use logic? "variance of sentence word counts"
-            # Implies we use the specific sentence lengths, NOT Words_i/Sentences_i (which uses global words)
-            mean_s = sum(sentence_lengths) / sentences_count
-            variance_sum = math.fsum((x - mean_s) ** 2 for x in sentence_lengths)
-            sentence_variance = variance_sum / sentences_count # Population variance uses N
-        
-        # 3. Dialogue Structure
-        
-        # DialogueTurnCount_i (Same as above)
-        
-        # SpeakerSwitchCount_i
-        # "changes between consecutive dialogue blocks"
-        # Iterate through *dialogue blocks only* or all blocks? 
-        # "consecutive dialogue blocks". 
-        # Usually implies if D1(Bob), A1, D2(Bob) -> No switch? Or switch?
-        # "between consecutive dialogue blocks" -> could mean ignoring Action.
-        # Let's assume list of dialogue blocks in order.
-        switch_count = 0
-        current_speak = None
-        for i, db in enumerate(dialogue_blocks):
-            if i == 0:
-                current_speak = db.speaker
-            else:
-                if db.speaker != current_speak:
-                    switch_count += 1
-                    current_speak = db.speaker
-        
-        # DialogueActionRatio_i
-        dialogue_action_ratio = float(dialogue_lines_count) / (action_lines_count + 1)
-        
-        # 4. Visual Density Proxies
-        
-        # AvgActionBlockLength_i
-        if action_blocks:
-            avg_action_block_len = float(action_lines_count) / len(action_blocks)
-        else:
-            avg_action_block_len = 0.0
-            
-        # MaxContinuousLines_i
-        # "longest uninterrupted run of non-blank lines in the scene"
-        # Iterate raw lines.
-        max_cont = 0
-        current_cont = 0
-        for line in scene.raw_lines:
-            if line.strip():
-                current_cont += 1
-            else:
-                if current_cont > max_cont:
-                    max_cont = current_cont
-                current_cont = 0
-        if current_cont > max_cont:
-            max_cont = current_cont
-            
-        # WhitespaceRatio_i
-        # blank lines / total lines
-        if lines_count > 0:
-            blank_lines = sum(1 for line in scene.raw_lines if not line.strip())
-            whitespace_ratio = float(blank_lines) / lines_count
-        else:
-            whitespace_ratio = 0.0
-            
-        # 5. Auditory Load Proxy
-        # AuditoryLoad_i = DialogueTurns_i * AvgSentenceLength_i
-        auditory_load = float(dialogue_turns_count) * avg_sentence_len
-        
-        scene_dict = {
-            "Lines": lines_count,
-            "Words": words_count,
-            "Sentences": sentences_count,
-            "ActionLines": action_lines_count,
-            "DialogueLines": dialogue_lines_count,
-            "DialogueTurns": dialogue_turns_count,
-            "Speakers": speakers_count,
-            
-            "AvgSentenceLength": avg_sentence_len,
-            "MaxSentenceLength": max_sentence_len,
-            "SentenceVariance": sentence_variance,
-            
-            "DialogueTurnCount": dialogue_turns_count,
-            "SpeakerSwitchCount": switch_count,
-            "DialogueActionRatio": dialogue_action_ratio,
-            
-            "AvgActionBlockLength": avg_action_block_len,
-            "MaxContinuousLines": max_cont,
-            "WhitespaceRatio": whitespace_ratio,
-            
-            "AuditoryLoad": auditory_load
-        }
-        
-        features_list.append(scene_dict)
-
-    return features_list
+        counts = scene.token_counts()
+        if counts is None:
+            return None
+        line_words.extend(counts[0])
+        sentence_words.extend(counts[1])
+    return np.frombuffer(line_words, dtype=np.int64), np.frombuffer(sentence_words, dtype=np.int64)
+
+def _flatten_segments(scenes: List[SceneSegment]) -> _FlatScript:
+    n = len(scenes)
+
+    # 1. Flat per-line arrays
+    lines_per_scene = np.fromiter((len(s.raw_lines) for s in scenes), dtype=np.int64, count=n)
+    recorded = _recorded_counts(scenes)
+    # "Split on whitespace"; a line is blank exactly when it has no words
+    if recorded is not None:
+        line_words, sentence_lengths = recorded
+    else:
+        line_words = np.fromiter(
+            (len(line.split()) for s in scenes for line in s.raw_lines),
+            dtype=np.int64, count=int(lines_per_scene.sum())
+        )
+
+    # 2. Flat per-block arrays
+    all_blocks: List[Block] = [b for s in scenes for b in s.blocks]
+    blocks_per_scene = np.fromiter((len(s.blocks) for s in scenes), dtype=np.int64, count=n)
+    n_blocks = len(all_blocks)
+    block_type = np.array([b.block_type for b in all_blocks], dtype=object)
+    block_lines = np.fromiter((len(b.lines) for b in all_blocks), dtype=np.int64, count=n_blocks)
+
+    # 3. Flat per-sentence arrays
+    sentences_per_block = np.fromiter((len(b.sentences) for b in all_blocks), dtype=np.int64, count=n_blocks)
+    if recorded is None:
+        sentence_lengths = np.fromiter(
+            (len(s.split()) for b in all_blocks for s in b.sentences),
+            dtype=np.int64, count=int(sentences_per_block.sum())
+        )
+
+    # Speakers: intern names to integer IDs (None/"" are compared but never counted)
+    dialogue_blocks = [b for b in all_blocks if b.block_type == "DIALOGUE"]
+    speaker_table: Dict[object, int] = {}
+    speaker_ids = np.fromiter(
+        (speaker_table.setdefault(b.speaker, len(speaker_table)) for b in dialogue_blocks),
+        dtype=np.int64, count=len(dialogue_blocks)
+    )
+    speaker_named = np.fromiter((bool(b.speaker) for b in dialogue_blocks), dtype=bool, count=len(dialogue_blocks))
+
+    return _FlatScript(
+        lines_per_scene=lines_per_scene,
+        line_words=line_words,
+        blocks_per_scene=blocks_per_scene,
+        block_lines=block_lines,
+        is_action=block_type == "ACTION",
+        is_dialogue=block_type == "DIALOGUE",
+        sentences_per_block=sentences_per_block,
+        sentence_lengths=sentence_lengths,
+        speaker_ids=speaker_ids,
+        speaker_named=speaker_named,
+        n_speakers=len(speaker_table)
+    )
+
+def _flatten_compact(script: CompactScript) -> _FlatScript:
+    # The span and token count arrays already are the flat layout
+    line_start = np.frombuffer(script.scene_line_start, dtype=np.int64)
+    line_end = np.frombuffer(script.scene_line_end, dtype=np.int64)
+    lines_per_scene = line_end - line_start
+    # Scenes are contiguous from the first header to the end of the buffer
+    first = int(line_start[0]) if len(line_start) else len(script.lines)
+    line_words = np.frombuffer(script.line_words, dtype=np.int64)[first:]
+
+    block_type = np.frombuffer(script.block_type, dtype=np.int8)
+    block_speaker = np.frombuffer(script.block_speaker, dtype=np.int64)
+    is_dialogue = block_type == DIALOGUE
+    speaker_ids = block_speaker[is_dialogue]
+    return _FlatScript(
+        lines_per_scene=lines_per_scene,
+        line_words=line_words,
+        blocks_per_scene=np.frombuffer(script.scene_block_end, dtype=np.int64) - np.frombuffer(script.scene_block_start, dtype=np.int64),
+        block_lines=np.diff(np.frombuffer(script.block_line_offsets, dtype=np.int64)),
+        is_action=block_type == ACTION,
+        is_dialogue=is_dialogue,
+        sentences_per_block=np.diff(np.frombuffer(script.block_sentence_offsets, dtype=np.int64)),
+        sentence_lengths=np.frombuffer(script.sentence_words, dtype=np.int64),
+        speaker_ids=speaker_ids,
+        speaker_named=speaker_ids >= 0,
+        n_speakers=len(script.speakers)
+    )
+
+def extract_scene_feature_arrays(scenes: Union[List[SceneSegment], CompactScript]) -> SceneFeatureArrays:
+    """
+    Computes raw per-scene structural features as one array per feature.
+    Flattens lines, blocks and sentences once, then reduces per scene.
+    Accepts SceneSegments or a CompactScript (read directly from its spans).
+    """
+    flat = _flatten_compact(scenes) if isinstance(scenes, CompactScript) else _flatten_segments(scenes)
+    n = len(flat.lines_per_scene)
+    scene_ids = np.arange(n, dtype=np.int64)
+
+    lines_per_scene = flat.lines_per_scene
+    line_scene = np.repeat(scene_ids, lines_per_scene)
+    line_words = flat.line_words
+    line_blank = line_words == 0
+
+    block_scene = np.repeat(scene_ids, flat.blocks_per_scene)
+    block_lines = flat.block_lines
+    is_action = flat.is_action
+    is_dialogue = flat.is_dialogue
+
+    sentence_scene = np.repeat(block_scene, flat.sentences_per_block)
+    sentence_lengths = flat.sentence_lengths
+
+    # Basic Counts
+    lines_count = lines_per_scene
+    words_count = _segment_sum(line_words, line_scene, n)
+    sentences_count = np.bincount(sentence_scene, minlength=n).astype(np.int64)
+    action_lines_count = _segment_sum(block_lines[is_action], block_scene[is_action], n)
+    dialogue_lines_count = _segment_sum(block_lines[is_dialogue], block_scene[is_dialogue], n)
+    action_blocks_count = np.bincount(block_scene[is_action], minlength=n).astype(np.int64)
+    dialogue_turns_count = np.bincount(block_scene[is_dialogue], minlength=n).astype(np.int64)
+
+    # Speakers: unique named speaker IDs per scene
+    speaker_ids = flat.speaker_ids
+    speaker_named = flat.speaker_named
+    dialogue_scene = block_scene[is_dialogue]
+
+    named_keys = dialogue_scene[speaker_named] * (flat.n_speakers + 1) + speaker_ids[speaker_named]
+    unique_keys = np.unique(named_keys)
+    speakers_count = np.bincount(unique_keys // (flat.n_speakers + 1), minlength=n).astype(np.int64)
+
+    # Sentence Metrics
+    avg_sentence_len = np.zeros(n, dtype=np.float64)
+    np.divide(words_count, sentences_count, out=avg_sentence_len, where=sentences_count > 0)
+
+    max_sentence_len = _segment_max(sentence_lengths, sentence_scene, n)
+
+    # Population variance around the mean of the sentence word counts
+    length_sums = _segment_sum(sentence_lengths, sentence_scene, n)
+    mean_s = np.zeros(n, dtype=np.float64)
+    np.divide(length_sums, sentences_count, out=mean_s, where=sentences_count > 0)
+    # float_power goes through libm pow like the scalar `** 2` (x * x can differ by an ulp)
+    sq_dev = np.float_power(sentence_lengths - mean_s[sentence_scene], 2.0)
+    sentence_variance = np.zeros(n, dtype=np.float64)
+    np.divide(_segment_fsum(sq_dev, sentences_count), sentences_count,
+              out=sentence_variance, where=sentences_count >= 2)
+
+    # Dialogue Structure
+    # A switch is a speaker change between consecutive dialogue blocks of the same scene
+    switches = np.zeros(len(speaker_ids), dtype=np.int64)
+    if len(speaker_ids) > 1:
+        switches[1:] = (dialogue_scene[1:] == dialogue_scene[:-1]) & (speaker_ids[1:] != speaker_ids[:-1])
+    switch_count = _segment_sum(switches, dialogue_scene, n)
+
+    dialogue_action_ratio = dialogue_lines_count.astype(np.float64) / (action_lines_count + 1)
+
+    # Visual Density Proxies
+    avg_action_block_len = np.zeros(n, dtype=np.float64)
+    np.divide(action_lines_count, action_blocks_count, out=avg_action_block_len, where=action_blocks_count > 0)
+
+    # Longest run of non-blank lines: distance to the last break, where a break
+    # is a blank line or the position just before a scene's first line
+    positions = np.arange(len(line_words), dtype=np.int64)
+    breaks = np.where(line_blank, positions, -1)
+    scene_starts = (np.cumsum(lines_per_scene) - lines_per_scene)[lines_per_scene > 0]
+    breaks[scene_starts] = np.maximum(breaks[scene_starts], scene_starts - 1)
+    runs = positions - np.maximum.accumulate(breaks) if len(breaks) else positions
+    max_cont = _segment_max(runs, line_scene, n)
+
+    blank_lines = np.bincount(line_scene[line_blank], minlength=n)
+    whitespace_ratio = np.zeros(n, dtype=np.float64)
+    np.divide(blank_lines, lines_count, out=whitespace_ratio, where=lines_count > 0)
+
+    # Auditory Load Proxy
+    auditory_load = dialogue_turns_count * avg_sentence_len
+
+    return SceneFeatureArrays(columns={
+        "Lines": lines_count,
+        "Words": words_count,
+        "Sentences": sentences_count,
+        "ActionLines": action_lines_count,
+        "DialogueLines": dialogue_lines_count,
+        "DialogueTurns": dialogue_turns_count,
+        "Speakers": speakers_count,
+
+        "AvgSentenceLength": avg_sentence_len,
+        "MaxSentenceLength": max_sentence_len,
+        "SentenceVariance": sentence_variance,
+
+        "DialogueTurnCount": dialogue_turns_count,
+        "SpeakerSwitchCount": switch_count,
+        "DialogueActionRatio": dialogue_action_ratio,
+
+        "AvgActionBlockLength": avg_action_block_len,
+        "MaxContinuousLines": max_cont,
+        "WhitespaceRatio": whitespace_ratio,
+
+        "AuditoryLoad": auditory_load,
+    })
+
+def extract_scene_features(scenes: Union[List[SceneSegment], CompactScript]) -> List[Dict[str, Union[float, int]]]:
+    """
+    Computes raw per-scene structural features.
+    Deterministic, raw calculation only.
+    Thin list-of-dicts view over extract_scene_feature_arrays.
+    """
+    return extract_scene_feature_arrays(scenes).to_dicts()
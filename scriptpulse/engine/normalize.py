@@ -0,0 +1,273 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import math
+import numpy as np
+from scriptpulse.engine.effort import EFFORT_FEATURE_KEYS
+
+# x_norm = (x - min) / (max - min + NORMALIZATION_EPSILON)
+NORMALIZATION_EPSILON = 1e-8
+
+def normalization_inputs(features) -> np.ndarray:
+    """
+    Derives the per-scene values that are min-max normalized.
+    Returns a (n_scenes, 6) array; columns follow EFFORT_FEATURE_KEYS.
+    """
+    lines_count = features["Lines"]
+
+    # ActionDensity = ActionLines / Lines (a scene always has its header line, but guard anyway)
+    action_density = np.zeros(len(features), dtype=np.float64)
+    np.divide(features["ActionLines"], lines_count, out=action_density, where=lines_count > 0)
+
+    # VisualDensityPenalty = MaxContinuousLines - WhitespaceRatio
+    # Mixes a count with a 0-1 ratio, but the spec says "Derive: MaxContinuousLines - WhitespaceRatio".
+    vis_penalty = features["MaxContinuousLines"] - features["WhitespaceRatio"]
+
+    return np.column_stack([
+        features["AvgSentenceLength"],
+        action_density,
+        features["DialogueTurnCount"],
+        np.zeros(len(features)), # RepetitionScore placeholder
+        vis_penalty,
+        features["AuditoryLoad"]
+    ]).astype(np.float64)
+
+def scale(raw: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """
+    Column-wise (raw - lo) / (hi - lo + epsilon).
+    """
+    return (raw - lo) / (hi - lo + NORMALIZATION_EPSILON)
+
+@dataclass
+class NormalizationReference:
+    """
+    Fixed per-column bounds to normalize against instead of the script's own
+    min and max. Values outside the bounds are clipped to [0, 1].
+    """
+    lower: np.ndarray
+    upper: np.ndarray
+    clip: bool = True
+
+def min_max_normalize(raw_for_norm: np.ndarray, reference: Optional[NormalizationReference] = None) -> np.ndarray:
+    """
+    Stage 5: normalizes the (n_scenes, 6) normalization inputs.
+    Per script (the v1.3.1 rule) by default; against fixed bounds when a
+    reference is given.
+    """
+    if reference is None:
+        return scale(raw_for_norm, raw_for_norm.min(axis=0), raw_for_norm.max(axis=0))
+    out = scale(raw_for_norm, reference.lower, reference.upper)
+    if reference.clip:
+        np.clip(out, 0.0, 1.0, out=out)
+    return out
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative accuracy (log-spaced buckets, as
+    in DDSketch). Any quantile it returns is within relative_accuracy of a
+    value at that rank; merging two sketches equals sketching the union.
+    """
+
+    # Magnitudes below this count as zero
+    MIN_MAGNITUDE = 1e-9
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+
+    def _add_buckets(self, store: Dict[int, int], magnitudes: np.ndarray) -> None:
+        if not len(magnitudes):
+            return
+        index = np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+        for k, n in zip(*[a.tolist() for a in np.unique(index, return_counts=True)]):
+            store[k] = store.get(k, 0) + n
+
+    def add(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self._add_buckets(self.positive, values[values >= self.MIN_MAGNITUDE])
+        self._add_buckets(self.negative, -values[values <= -self.MIN_MAGNITUDE])
+        self.zero += int(np.count_nonzero(np.abs(values) < self.MIN_MAGNITUDE))
+        self.count += len(values)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("cannot merge sketches with different relative_accuracy")
+        for mine, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for k, n in theirs.items():
+                mine[k] = mine.get(k, 0) + n
+        self.zero += other.zero
+        self.count += other.count
+
+    def _value(self, k: int) -> float:
+        return 2 * self._gamma ** k / (self._gamma + 1)
+
+    def quantile(self, q: float) -> float:
+        if not 0 <= q <= 1:
+            raise ValueError("q must be in [0, 1]")
+        if not self.count:
+            raise ValueError("empty sketch")
+        rank = q * (self.count - 1)
+        seen = 0
+        # Most negative first
+        for k in sorted(self.negative, reverse=True):
+            seen += self.negative[k]
+            if seen > rank:
+                return -self._value(k)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for k in sorted(self.positive):
+            seen += self.positive[k]
+            if seen > rank:
+                return self._value(k)
+        return self._value(max(self.positive))
+
+    def to_dict(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "zero": self.zero,
+            "count": self.count,
+            # JSON object keys are strings
+            "positive": {str(k): n for k, n in sorted(self.positive.items())},
+            "negative": {str(k): n for k, n in sorted(self.negative.items())}
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"])
+        sketch.zero = data["zero"]
+        sketch.count = data["count"]
+        sketch.positive = {int(k): n for k, n in data["positive"].items()}
+        sketch.negative = {int(k): n for k, n in data["negative"].items()}
+        return sketch
+
+@dataclass
+class NormalizationStats:
+    """
+    Mergeable per-column statistics of normalization inputs over any number
+    of scripts: exact min and max, and optional quantile sketches.
+    Build one per script (or per chunk of scripts), merge them in any order,
+    persist with save(), and turn them into a NormalizationReference.
+    """
+    count: int = 0
+    minimum: List[float] = field(default_factory=lambda: [math.inf] * len(EFFORT_FEATURE_KEYS))
+    maximum: List[float] = field(default_factory=lambda: [-math.inf] * len(EFFORT_FEATURE_KEYS))
+    scripts: int = 0
+    # One per column, or None when quantiles were not requested
+    sketches: Optional[List[QuantileSketch]] = None
+
+    @classmethod
+    def empty(cls, quantiles: bool = False, relative_accuracy: float = 0.01) -> "NormalizationStats":
+        """
+        Identity for merge().
+        """
+        sketches = [QuantileSketch(relative_accuracy) for _ in EFFORT_FEATURE_KEYS] if quantiles else None
+        return cls(sketches=sketches)
+
+    @classmethod
+    def from_inputs(cls, raw_for_norm: np.ndarray, quantiles: bool = False, relative_accuracy: float = 0.01) -> "NormalizationStats":
+        """
+        Statistics of one script's (n_scenes, 6) normalization inputs.
+        """
+        stats = cls(scripts=1, count=int(raw_for_norm.shape[0]))
+        if stats.count:
+            stats.minimum = raw_for_norm.min(axis=0).tolist()
+            stats.maximum = raw_for_norm.max(axis=0).tolist()
+        if quantiles:
+            stats.sketches = []
+            for column in raw_for_norm.T:
+                sketch = QuantileSketch(relative_accuracy)
+                sketch.add(column)
+                stats.sketches.append(sketch)
+        return stats
+
+    def merge(self, other: "NormalizationStats") -> "NormalizationStats":
+        """
+        Combines two statistics (neither is modified). Sketches survive only
+        when both sides have them.
+        """
+        merged = NormalizationStats(
+            count=self.count + other.count,
+            minimum=[min(a, b) for a, b in zip(self.minimum, other.minimum)],
+            maximum=[max(a, b) for a, b in zip(self.maximum, other.maximum)],
+            scripts=self.scripts + other.scripts
+        )
+        if self.sketches is not None and other.sketches is not None:
+            merged.sketches = []
+            for mine, theirs in zip(self.sketches, other.sketches):
+                sketch = QuantileSketch(mine.relative_accuracy)
+                sketch.merge(mine)
+                sketch.merge(theirs)
+                merged.sketches.append(sketch)
+        return merged
+
+    def reference(self, lower_quantile: float = 0.0, upper_quantile: float = 1.0, clip: bool = True) -> NormalizationReference:
+        """
+        Bounds for reference-mode normalization: the exact corpus min/max by
+        default, or sketch quantiles (e.g. 0.01 / 0.99) to ignore outliers.
+        """
+        if not self.count:
+            raise ValueError("no scenes in the normalization statistics")
+        if not 0 <= lower_quantile < upper_quantile <= 1:
+            raise ValueError("need 0 <= lower_quantile < upper_quantile <= 1")
+        lower = np.array(self.minimum, dtype=np.float64)
+        upper = np.array(self.maximum, dtype=np.float64)
+        if lower_quantile > 0 or upper_quantile < 1:
+            if self.sketches is None:
+                raise ValueError("quantile bounds need statistics built with quantiles=True")
+            if lower_quantile > 0:
+                lower = np.array([s.quantile(lower_quantile) for s in self.sketches])
+            if upper_quantile < 1:
+                upper = np.array([s.quantile(upper_quantile) for s in self.sketches])
+            # Sketch values are approximate; never exceed the exact range
+            lower = np.maximum(lower, self.minimum)
+            upper = np.minimum(upper, self.maximum)
+        return NormalizationReference(lower=lower, upper=upper, clip=clip)
+
+    def to_dict(self) -> dict:
+        from scriptpulse import __version__
+
+        return {
+            "format": "scriptpulse-normalization-stats",
+            "engine_version": __version__,
+            "keys": list(EFFORT_FEATURE_KEYS),
+            "count": self.count,
+            "scripts": self.scripts,
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "sketches": None if self.sketches is None else [s.to_dict() for s in self.sketches]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "NormalizationStats":
+        if data.get("format") != "scriptpulse-normalization-stats":
+            raise ValueError("not a ScriptPulse normalization statistics file")
+        if data["keys"] != list(EFFORT_FEATURE_KEYS):
+            raise ValueError("normalization statistics were built for different feature keys")
+        sketches = data.get("sketches")
+        return cls(
+            count=data["count"],
+            minimum=[float(x) for x in data["minimum"]],
+            maximum=[float(x) for x in data["maximum"]],
+            scripts=data["scripts"],
+            sketches=None if sketches is None else [QuantileSketch.from_dict(s) for s in sketches]
+        )
+
+    def save(self, path: str) -> None:
+        import json
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    @classmethod
+    def load(cls, path: str) -> "NormalizationStats":
+        import json
+
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
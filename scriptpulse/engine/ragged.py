@@ -0,0 +1,205 @@
+"""
+Ragged-batch scoring: stages 5-11 for many scripts in one vectorized pass.
+
+The per-scene normalization inputs of all scripts are packed into one flat
+(total_scenes, 6) array plus offsets; script k owns rows
+offsets[k]:offsets[k + 1]. Every stage is segment-aware: min-max bounds,
+the decay recurrence and the window sums never cross a script boundary.
+Windows that are not full yet are masked instead of padded with None.
+
+Each script's values are bit-identical to score_detailed on that script
+alone: the decay recurrence and the window sums use the same kernels
+(temporal_graph.decay_scan and window_sums) in the same operation order.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from scriptpulse.engine.effort import compute_effort_matrix
+from scriptpulse.engine.normalize import NormalizationReference, min_max_normalize, scale
+from scriptpulse.engine.temporal_graph import LAMBDA, TAU, RHO, WINDOWS, decay_scan, recovery_credit, window_sums
+from scriptpulse.engine.calibration import calibrate_strain_array
+from scriptpulse.engine.decision import PROB_THRESHOLD, THRESHOLD_SHORT, THRESHOLD_MEDIUM, THRESHOLD_LONG
+
+def pack_ragged(parts: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Concatenates per-script arrays along the first axis.
+    Returns (values, offsets) with len(offsets) == len(parts) + 1.
+    """
+    lengths = [len(p) for p in parts]
+    if 0 in lengths:
+        raise ValueError("every script needs at least one scene")
+    offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    values = np.concatenate(parts) if parts else np.zeros((0, 6), dtype=np.float64)
+    return values, offsets
+
+def decay_accumulate_ragged(
+    effort: np.ndarray,
+    offsets: np.ndarray,
+    lam: float = LAMBDA,
+    tau: float = TAU,
+    rho: float = RHO
+) -> np.ndarray:
+    """
+    temporal_graph.decay_accumulate per script of a ragged batch: one
+    decay_scan over all scripts, so every step advances the scripts that are
+    still running.
+    """
+    x = np.asarray(effort, dtype=np.float64)
+    if not len(x):
+        return np.zeros(0, dtype=np.float64)
+    credit = recovery_credit(x, tau, rho)
+    # Never on a script's first scene
+    credit[offsets[:-1]] = 0.0
+    return decay_scan(x, credit, offsets[:-1], np.diff(offsets), lam)
+
+def windowed_sums_ragged(effort: np.ndarray, offsets: np.ndarray, widths: Sequence[int]) -> Dict[int, np.ma.MaskedArray]:
+    """
+    temporal_graph.windowed_sums per script, aligned to scenes: entry i is
+    the sum of the window ending at scene i, masked until the window is full
+    and for widths longer than the script.
+    """
+    x = np.asarray(effort, dtype=np.float64)
+    widths = sorted(set(widths))
+    for w in widths:
+        if w <= 0:
+            raise ValueError(f"Window width must be positive, got {w}")
+    # Scene index within its script
+    lengths = np.diff(offsets)
+    local = np.arange(len(x)) - np.repeat(offsets[:-1], lengths)
+
+    out = {}
+    for w in widths:
+        data = np.full(len(x), np.nan)
+        # Windows over the whole batch, kept where they lie inside one script
+        full = np.flatnonzero(local >= w - 1)
+        if len(full):
+            data[full] = window_sums(x, w)[full - (w - 1)]
+        out[w] = np.ma.masked_invalid(data, copy=False)
+    return out
+
+@dataclass
+class RaggedScores:
+    """
+    Stages 5-11 of many scripts, as flat per-scene arrays; script k owns
+    entries offsets[k]:offsets[k + 1].
+    """
+    offsets: np.ndarray
+    normalization_inputs: np.ndarray
+    features_norm: np.ndarray
+    effort: np.ndarray
+    decayed: np.ndarray
+    # WINDOWS keys -> aligned window sums, masked where the window is not full
+    windows: Dict[str, np.ma.MaskedArray]
+    probabilities: np.ndarray
+    alerts: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def messages(self) -> List[List[str]]:
+        """
+        Output messages of every script (format_output of its alerts).
+        """
+        out: List[List[str]] = [[] for _ in range(len(self))]
+        positions = np.flatnonzero(self.alerts)
+        scripts = np.searchsorted(self.offsets, positions, side="right") - 1
+        for k, i in zip(scripts.tolist(), (positions - self.offsets[scripts]).tolist()):
+            out[k].append(f"Structural strain detected in scene {i}.")
+        return out
+
+    def result(self, k: int, scenes=None, features=None):
+        """
+        Script k as the ScriptPulseResult that score_detailed returns
+        (None-padded signal lists included).
+        """
+        from run_scriptpulse import ScriptPulseResult
+        from scriptpulse.engine.accumulate import accumulate_signals
+
+        a, b = int(self.offsets[k]), int(self.offsets[k + 1])
+        decayed = self.decayed[a:b]
+        temporal = {"decayed": decayed.tolist()}
+        for key, values in self.windows.items():
+            window = values[a:b]
+            temporal[key] = window.compressed().tolist()
+        alerts = self.alerts[a:b].tolist()
+        return ScriptPulseResult(
+            scenes=scenes,
+            features=features,
+            normalization_inputs=self.normalization_inputs[a:b],
+            features_norm=self.features_norm[a:b],
+            effort=self.effort[a:b],
+            temporal=temporal,
+            signals=accumulate_signals(temporal),
+            decayed=decayed,
+            probabilities=self.probabilities[a:b],
+            alerts=alerts,
+            messages=[f"Structural strain detected in scene {i}." for i, alert in enumerate(alerts) if alert]
+        )
+
+def score_ragged(values: np.ndarray, offsets: np.ndarray, reference: Optional[NormalizationReference] = None) -> RaggedScores:
+    """
+    Runs normalization through output formatting on packed (n_scenes, 6)
+    normalization inputs (see pack_ragged). Per-script min-max by default,
+    fixed bounds with a reference.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    lengths = np.diff(offsets)
+    if len(lengths) and lengths.min() < 1:
+        raise ValueError("every script needs at least one scene")
+
+    # 5. Normalization
+    if reference is None and len(values):
+        lo = np.minimum.reduceat(values, offsets[:-1], axis=0)
+        hi = np.maximum.reduceat(values, offsets[:-1], axis=0)
+        features_norm = scale(values, np.repeat(lo, lengths, axis=0), np.repeat(hi, lengths, axis=0))
+    elif reference is not None:
+        features_norm = min_max_normalize(values, reference)
+    else:
+        features_norm = values.copy()
+
+    # 6. Effort
+    effort = compute_effort_matrix(features_norm)
+
+    # 7.-8. Temporal signals
+    decayed = decay_accumulate_ragged(effort, offsets)
+    sums = windowed_sums_ragged(effort, offsets, WINDOWS.values())
+    windows = {key: sums[w] for key, w in WINDOWS.items()}
+
+    # 9. Calibration
+    probabilities = calibrate_strain_array(decayed)
+
+    # 10. Decision: a masked (not yet full) window never agrees
+    agreement = np.ones(len(effort), dtype=bool)
+    for key, threshold in (("window_short", THRESHOLD_SHORT), ("window_medium", THRESHOLD_MEDIUM), ("window_long", THRESHOLD_LONG)):
+        window = windows[key]
+        agreement &= ~np.ma.getmaskarray(window) & (window.filled(-np.inf) > threshold)
+    alerts = (probabilities > PROB_THRESHOLD) & agreement
+
+    return RaggedScores(
+        offsets=offsets,
+        normalization_inputs=values,
+        features_norm=features_norm,
+        effort=effort,
+        decayed=decayed,
+        windows=windows,
+        probabilities=probabilities,
+        alerts=alerts
+    )
+
+def score_feature_batch(features: Sequence, reference: Optional[NormalizationReference] = None) -> RaggedScores:
+    """
+    score_ragged over the raw features (SceneFeatureArrays) of many scripts.
+    """
+    from scriptpulse.engine.features import SceneFeatureArrays
+    from scriptpulse.engine.normalize import normalization_inputs
+
+    if any(len(f) == 0 for f in features):
+        raise ValueError("every script needs at least one scene")
+    _, offsets = pack_ragged([f["Lines"] for f in features])
+    # Normalization inputs are per scene, so one call serves the whole batch
+    values = normalization_inputs(SceneFeatureArrays.concatenate(list(features)))
+    return score_ragged(values, offsets, reference)
@@ -0,0 +1,141 @@
+import re
+from typing import Iterable, List, Optional
+
+from scriptpulse.engine.segment import Block, SceneSegment, record_token_counts
+
+# Equivalent to the ^(INT\.|EXT\.) match used by validator and segment
+HEADER_PREFIXES = ("INT.", "EXT.")
+
+space_collapse_pattern = re.compile(r' +')
+sentence_split_pattern = re.compile(r'[.!?]')
+
+def scan_scenes(lines: Iterable[str]) -> List[SceneSegment]:
+    """
+    Fused front end: validation, whitespace normalization, line classification,
+    block building and sentence splitting in one pass over the input.
+
+    Equivalent to
+        validate_script(lines)
+        segment_scenes(preprocess_lines(lines))
+    including the ValueError raised and its precedence: a segmentation error
+    is held back until every line has been validated. The three-stage path
+    remains the reference implementation.
+    """
+    scenes: List[SceneSegment] = []
+    current_scene: Optional[SceneSegment] = None
+    current_block: Optional[Block] = None
+    last_non_blank_type = None
+    pending_error: Optional[str] = None
+
+    # Validator state
+    has_content = False
+    headers_found = 0
+    last_line_was_speaker = False
+
+    def finalize_block():
+        nonlocal current_block
+        if current_block:
+            full_text = " ".join(current_block.lines)
+            current_block.sentences = [s.strip() for s in sentence_split_pattern.split(full_text) if s.strip()]
+            if current_scene:
+                current_scene.blocks.append(current_block)
+            current_block = None
+
+    for raw in lines:
+        # Whitespace normalization (no copy when the line is already clean)
+        line = raw.strip()
+        if '\t' in line:
+            line = line.replace('\t', ' ')
+        if '  ' in line:
+            line = space_collapse_pattern.sub(' ', line)
+
+        # Normalization only touches whitespace, which is uncased, so the
+        # raw and normalized lines agree on isupper()
+        upper = line.isupper()
+
+        # --- Validation (on the raw line) ---
+        if line:
+            has_content = True
+
+        if raw.startswith(HEADER_PREFIXES):
+            headers_found += 1
+            last_line_was_speaker = False
+        elif upper:
+            if not headers_found:
+                raise ValueError("Dialogue before first scene header")
+            if len(raw) > 40 or raw[-1] in '.,!?:;':
+                raise ValueError("Invalid speaker line")
+            last_line_was_speaker = True
+        elif raw.startswith('('):
+            if not raw.endswith(')') or not last_line_was_speaker:
+                raise ValueError("Invalid parenthetical placement")
+            last_line_was_speaker = False
+        else:
+            last_line_was_speaker = False
+
+        if pending_error is not None:
+            continue
+
+        # --- Segmentation (on the normalized line) ---
+        if upper and line.startswith(HEADER_PREFIXES):
+            finalize_block()
+            current_scene = SceneSegment(
+                scene_index=len(scenes),
+                header=line,
+                raw_lines=[line],
+                blocks=[]
+            )
+            scenes.append(current_scene)
+            last_non_blank_type = None
+            continue
+
+        if current_scene is None:
+            if line:
+                pending_error = "Content before first scene header"
+            continue
+
+        current_scene.raw_lines.append(line)
+
+        # Line classification and block construction
+        if not line:
+            # BLANK
+            finalize_block()
+        elif upper and len(line) <= 40:
+            # SPEAKER
+            finalize_block()
+            current_block = Block(block_type="DIALOGUE", lines=[], speaker=line, sentences=[])
+            last_non_blank_type = "SPEAKER"
+        elif line.startswith('(') and line.endswith(')'):
+            # PARENTHETICAL
+            if current_block and current_block.block_type == "DIALOGUE":
+                current_block.lines.append(line)
+            last_non_blank_type = "PARENTHETICAL"
+        elif last_non_blank_type == "SPEAKER" or last_non_blank_type == "PARENTHETICAL":
+            # DIALOGUE
+            if current_block and current_block.block_type == "DIALOGUE":
+                current_block.lines.append(line)
+            last_non_blank_type = "DIALOGUE"
+        else:
+            # ACTION
+            if current_block and current_block.block_type == "DIALOGUE":
+                finalize_block()
+            if current_block is None:
+                current_block = Block(block_type="ACTION", lines=[line], speaker=None, sentences=[])
+            else:
+                current_block.lines.append(line)
+            last_non_blank_type = "ACTION"
+
+    finalize_block()
+
+    # Script-level validation rules, then the held-back segmentation error
+    if not has_content:
+        raise ValueError("Empty script")
+    if not headers_found:
+        raise ValueError("No scene headers found")
+    if pending_error is not None:
+        raise ValueError(pending_error)
+    if not scenes:
+        raise ValueError("No scenes detected")
+
+    record_token_counts(scenes)
+    return scenes
@@ -1,7 +1,10 @@
 
 import re
-from dataclasses import dataclass
-from typing import List, Optional, Literal
+from array import array
+from dataclasses import dataclass, field
+from itertools import accumulate, chain
+from operator import attrgetter
+from typing import Iterable, Iterator, List, Optional, Literal, Tuple
 
 @dataclass
 class Block:
@@ -10,19 +13,101 @@ class Block:
     speaker: Optional[str]
     sentences: List[str]
 
+@dataclass
+class _TokenCounts:
+    # Words per raw line and per sentence (all blocks in order), with the
+    # lines and sentences they were counted from
+    line_words: array
+    sentence_words: array
+    lines: List[str]
+    sentences: List[str]
+
 @dataclass
 class SceneSegment:
     scene_index: int
     header: str
     raw_lines: List[str]
     blocks: List[Block]
+    # Recorded by segmentation so that feature extraction does not tokenize
+    # the text again (see token_counts)
+    _token_counts: Optional[_TokenCounts] = field(default=None, repr=False, compare=False)
+
+    def token_counts(self) -> Optional[Tuple[array, array]]:
+        """
+        (words per raw line, words per sentence over all blocks in order)
+        recorded by segmentation, or None when the scene was built elsewhere
+        or its lines or sentences changed since. The check compares the
+        current strings with the ones counted, by identity first, so it
+        costs far less than counting again.
+        """
+        counts = self._token_counts
+        if counts is None or counts.lines != self.raw_lines:
+            return None
+        if counts.sentences != list(chain.from_iterable(map(_sentences, self.blocks))):
+            return None
+        return counts.line_words, counts.sentence_words
+
+_raw_lines = attrgetter("raw_lines")
+_blocks = attrgetter("blocks")
+_sentences = attrgetter("sentences")
+
+def count_words(texts: Iterable[str]) -> array:
+    """
+    Whitespace word counts, len(text.split()), as an array("q").
+    """
+    return array("q", map(len, map(str.split, texts)))
+
+def record_token_counts(scenes: List[SceneSegment]) -> None:
+    """
+    Records the token counts of every scene (SceneSegment.token_counts).
+    All lines and all sentences are each counted in one flat pass (per-scene
+    or per-block calls cost more than the counting).
+    """
+    blocks = list(chain.from_iterable(map(_blocks, scenes)))
+    lines = list(chain.from_iterable(map(_raw_lines, scenes)))
+    sentences = list(chain.from_iterable(map(_sentences, blocks)))
+    line_words = count_words(lines)
+    sentence_words = count_words(sentences)
+
+    # Slice the flat counts back into scenes
+    line_ends = accumulate(map(len, map(_raw_lines, scenes)))
+    block_ends = accumulate(map(len, map(_blocks, scenes)))
+    sentence_ends = list(accumulate(map(len, map(_sentences, blocks)), initial=0))
+    line_start = sentence_start = 0
+    for scene, line_end, block_end in zip(scenes, line_ends, block_ends):
+        sentence_end = sentence_ends[block_end]
+        scene._token_counts = _TokenCounts(
+            line_words=line_words[line_start:line_end],
+            sentence_words=sentence_words[sentence_start:sentence_end],
+            lines=lines[line_start:line_end],
+            sentences=sentences[sentence_start:sentence_end]
+        )
+        line_start, sentence_start = line_end, sentence_end
 
 def segment_scenes(lines: List[str]) -> List[SceneSegment]:
     """
     Deterministically segments a screenplay into scenes and structural blocks.
     """
-    scenes: List[SceneSegment] = []
-    
+    scenes = list(_iter_scene_segments(lines))
+
+    if not scenes:
+        raise ValueError("No scenes detected")
+
+    record_token_counts(scenes)
+    return scenes
+
+def iter_scene_segments(lines: Iterable[str]) -> Iterator[SceneSegment]:
+    """
+    Streaming form of segment_scenes.
+    Yields each SceneSegment as soon as the next scene header (or the end of
+    input) closes it. Does not raise on an input with no scenes.
+    """
+    for scene in _iter_scene_segments(lines):
+        record_token_counts([scene])
+        yield scene
+
+def _iter_scene_segments(lines: Iterable[str]) -> Iterator[SceneSegment]:
+    # iter_scene_segments without token counts
     current_scene: Optional[SceneSegment] = None
     current_block: Optional[Block] = None
     
@@ -63,6 +148,8 @@ def segment_scenes(lines: List[str]) -> List[SceneSegment]:
         # "Match must be: Uppercase ... At line start"
         if line.isupper() and scene_header_pattern.match(line):
             finalize_block()
+            if current_scene:
+                yield current_scene
             
             # Begin new scene
             current_scene = SceneSegment(
@@ -71,7 +158,6 @@ def segment_scenes(lines: List[str]) -> List[SceneSegment]:
                 raw_lines=[line],
                 blocks=[]
             )
-            scenes.append(current_scene)
             scene_index_counter += 1
             
             # Reset block-level context
@@ -172,8 +258,5 @@ def segment_scenes(lines: List[str]) -> List[SceneSegment]:
             last_non_blank_type = "ACTION"
 
     finalize_block()
-
-    if not scenes:
-        raise ValueError("No scenes detected")
-        
-    return scenes
+    if current_scene:
+        yield current_scene
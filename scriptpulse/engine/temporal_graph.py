@@ -1,4 +1,6 @@
-from typing import List
+from typing import Dict, List, Optional, Sequence
+import math
+import numpy as np
 
 # MANDATORY CONSTANTS (FROZEN)
 LAMBDA = 0.9
@@ -9,62 +11,219 @@ WINDOW_SHORT  = 3
 WINDOW_MEDIUM = 5
 WINDOW_LONG   = 9
 
-def build_temporal_graph(effort: List[float]) -> dict:
+# Output key -> window width. The three mandatory windows are always present;
+# callers may pass extra horizons (e.g. {"window_25": 25}) for analysis.
+WINDOWS = {
+    "window_short": WINDOW_SHORT,
+    "window_medium": WINDOW_MEDIUM,
+    "window_long": WINDOW_LONG
+}
+
+def window_sums(effort: np.ndarray, w: int) -> np.ndarray:
     """
-    Computes decayed and windowed accumulated effort signals.
+    sums[j] = sum(effort[j : j + w]) for every full window, added left to
+    right from 0 as the frozen sequential definition does, so every value is
+    bit-identical to it. O(n * w) vectorized; O(w) Python-level steps.
     """
-    if not effort:
-        return {
-            "decayed": [],
-            "window_short": [],
-            "window_medium": [],
-            "window_long": []
-        }
+    x = np.asarray(effort, dtype=np.float64)
+    m = len(x) - w + 1
+    sums = np.zeros(max(m, 0), dtype=np.float64)
+    if m > 0:
+        for k in range(w):
+            sums += x[k:k + m]
+    return sums
 
-    # 1. Sequential Decay Accumulation
-    decayed_series = []
-    
-    # Init first element
-    # DecayedAccum_0 = Effort_0
-    decayed_series.append(effort[0])
+def _prefix_window_sums(x: np.ndarray, valid: Sequence[int]) -> Dict[int, np.ndarray]:
+    # Block-restarted prefix sums (inclusive): the cumulative sum restarts
+    # every K = max(valid) scenes, so a window spans at most one restart
+    n = len(x)
+    K = max(valid)
+    n_blocks = -(-n // K)
+    padded = np.zeros(n_blocks * K, dtype=np.float64)
+    padded[:n] = x
+    local = np.cumsum(padded.reshape(n_blocks, K), axis=1)
+    block_totals = local[:, -1]
+    prefix = local.reshape(-1)
+
+    sums = {}
+    for w in valid:
+        ends = np.arange(w - 1, n)
+        starts = ends - w + 1
+        start_block = starts // K
+        # Prefix of the start's block just before the window (0 at a block start)
+        before = np.where(starts % K == 0, 0.0, prefix[starts - 1])
+        same_block = start_block == (ends // K)
+        sums[w] = np.where(
+            same_block,
+            prefix[ends] - before,
+            (block_totals[start_block] - before) + prefix[ends]
+        )
+    return sums
+
+def windowed_sums(effort: np.ndarray, widths: Sequence[int], fast: bool = False) -> Dict[int, np.ndarray]:
+    """
+    Returns {w: sums} where sums[j] = sum(effort[j : j + w]) for every full window.
+    Widths longer than the series give an empty array.
+
+    The default is exact (window_sums). fast=True serves all widths from one
+    block-restarted cumulative sum, O(n) whatever the widths; its values can
+    differ from the exact sums in the last bits, which is enough to flip a
+    threshold comparison, so the pipeline never uses it.
+    """
+    x = np.asarray(effort, dtype=np.float64)
+    n = len(x)
+    for w in widths:
+        if w <= 0:
+            raise ValueError(f"Window width must be positive, got {w}")
+
+    valid = [w for w in widths if w <= n]
+    sums = {w: np.zeros(0, dtype=np.float64) for w in widths if w > n}
+    if not valid:
+        return sums
+    if fast:
+        sums.update(_prefix_window_sums(x, valid))
+    else:
+        sums.update({w: window_sums(x, w) for w in valid})
+    return sums
+
+def recovery_credit(effort: np.ndarray, tau: float = TAU, rho: float = RHO) -> np.ndarray:
+    """
+    rho where E_i < E_(i-1) - tau, else 0 (never on the first scene).
+    """
+    x = np.asarray(effort, dtype=np.float64)
+    credit = np.zeros(len(x), dtype=np.float64)
+    credit[1:] = np.where(x[1:] < (x[:-1] - tau), rho, 0.0)
+    return credit
+
+def decay_scan(
+    effort: np.ndarray,
+    credit: np.ndarray,
+    starts: Sequence[int],
+    lengths: Sequence[int],
+    lam=LAMBDA
+) -> np.ndarray:
+    """
+    The frozen decay recurrence for independent series packed in one flat
+    array (series k is effort[starts[k] : starts[k] + lengths[k]]):
+        A_0 = E_0
+        A_i = (E_i + lam * A_(i-1)) - credit_i
+    evaluated in that order, so each series is bit-identical to the
+    sequential definition. lam is a scalar or one value per series.
+    Step i advances every series longer than i at once, so Python-level
+    iterations are those of the longest series.
+    """
+    x = np.asarray(effort, dtype=np.float64)
+    c = np.asarray(credit, dtype=np.float64)
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    lam = np.broadcast_to(np.asarray(lam, dtype=np.float64), starts.shape)
+    out = np.zeros(len(x), dtype=np.float64)
+    if not len(starts) or not lengths.max(initial=0):
+        return out
 
-    for i in range(1, len(effort)):
-        eff_current = effort[i]
-        eff_prev = effort[i-1]
-        acc_prev = decayed_series[i-1]
+    if len(starts) == 1:
+        # One series: plain float arithmetic is faster than NumPy per step
+        a, n, l = int(starts[0]), int(lengths[0]), float(lam[0])
+        e, r = x[a:a + n].tolist(), c[a:a + n].tolist()
+        acc = e[0] - r[0]
+        values = [acc]
+        for i in range(1, n):
+            acc = (e[i] + l * acc) - r[i]
+            values.append(acc)
+        out[a:a + n] = values
+        return out
 
-        # Basic Decay Formula
-        # DecayedAccum_i = Effort_i + LAMBDA * DecayedAccum_(i-1)
-        acc_current = eff_current + (LAMBDA * acc_prev)
+    # Longest series first, so the series still running form a prefix
+    order = np.argsort(-lengths, kind="stable")[:np.count_nonzero(lengths)]
+    starts, lengths, lam = starts[order], lengths[order], lam[order]
+    running = np.searchsorted(-lengths, -np.arange(1, int(lengths[0])), side="left")
+    out[starts] = x[starts] - c[starts]
+    for i in range(1, int(lengths[0])):
+        k = running[i - 1]
+        pos = starts[:k] + i
+        out[pos] = (x[pos] + lam[:k] * out[pos - 1]) - c[pos]
+    return out
 
-        # Recovery Logic
-        # If Effort_i < Effort_(i-1) - TAU
-        if eff_current < (eff_prev - TAU):
-            # Then DecayedAccum_i = DecayedAccum_i - RHO
-            acc_current = acc_current - RHO
+def _decay_blocked(x: np.ndarray, credit: np.ndarray, lam: float) -> np.ndarray:
+    # Blocked scan: the series is cut into ~sqrt(n) blocks, each block is
+    # advanced in lockstep from a zero carry, and the carries are then
+    # propagated across blocks. Python-level iterations are O(sqrt(n)).
+    n = len(x)
+    block = max(1, int(math.isqrt(n)))
+    n_blocks = -(-n // block)
+    padded = n_blocks * block
 
-        decayed_series.append(acc_current)
+    e = np.zeros(padded, dtype=np.float64)
+    e[:n] = x
+    c = np.zeros(padded, dtype=np.float64)
+    c[:n] = credit
+    e = e.reshape(n_blocks, block)
+    c = c.reshape(n_blocks, block)
+
+    # 1. Local responses of every block, assuming zero carry-in
+    local = np.empty_like(e)
+    local[:, 0] = e[:, 0] - c[:, 0]
+    for j in range(1, block):
+        local[:, j] = (e[:, j] + lam * local[:, j - 1]) - c[:, j]
+
+    # 2. True end-of-block values, propagated block by block
+    decay_in_block = lam ** np.arange(1, block + 1, dtype=np.float64)
+    carry = np.zeros(n_blocks, dtype=np.float64)
+    for b in range(1, n_blocks):
+        carry[b] = local[b - 1, -1] + decay_in_block[-1] * carry[b - 1]
+
+    # 3. Add each block's decayed carry-in
+    out = local + carry[:, None] * decay_in_block[None, :]
+    return out.reshape(-1)[:n]
+
+def decay_accumulate(
+    effort: np.ndarray,
+    lam: float = LAMBDA,
+    tau: float = TAU,
+    rho: float = RHO,
+    fast: bool = False
+) -> np.ndarray:
+    """
+    Evaluates the decay-with-recovery recurrence
+        A_0 = E_0
+        A_i = E_i + lam * A_(i-1) - rho * [E_i < E_(i-1) - tau]
+    exactly as the sequential definition (decay_scan). fast=True uses a
+    blocked scan with O(sqrt(n)) Python-level iterations instead; it
+    reassociates the sums, so values can differ in the last bits and the
+    pipeline never uses it.
+    """
+    x = np.asarray(effort, dtype=np.float64)
+    n = len(x)
+    if n == 0:
+        return np.zeros(0, dtype=np.float64)
+    credit = recovery_credit(x, tau, rho)
+    if fast:
+        return _decay_blocked(x, credit, lam)
+    return decay_scan(x, credit, [0], [n], lam)
+
+def build_temporal_graph(effort: List[float], windows: Optional[Dict[str, int]] = None, fast: bool = False) -> dict:
+    """
+    Computes decayed and windowed accumulated effort signals.
+    `windows` maps output keys to widths; defaults to the three mandatory windows.
+    Values are bit-identical to the sequential definition unless fast=True
+    (see decay_accumulate and windowed_sums).
+    """
+    if windows is None:
+        windows = WINDOWS
+
+    if not len(effort):
+        out = {"decayed": []}
+        out.update({key: [] for key in windows})
+        return out
+
+    x = np.asarray(effort, dtype=np.float64)
+
+    # 1. Sequential Decay Accumulation
+    decayed = decay_accumulate(x, fast=fast)
 
     # 2. Window Accumulation
-    def compute_windowed_sums(data: List[float], w: int) -> List[float]:
-        # Only valid logic: sum(Effort[i-w+1 : i+1])
-        # Indices i start from w-1 to len-1
-        if w > len(data):
-            return []
-        
-        results = []
-        # Precompute initial sum to optimize sliding window, or just sum slice for clarity/correctness
-        # Given "Deterministic" and potentially small script, sum slice is safest and clearest.
-        # i represents end index (inclusive)
-        for i in range(w - 1, len(data)):
-            # slice from i - w + 1 to i + 1 (exclusive) contains w elements
-            window_slice = data[i - w + 1 : i + 1]
-            results.append(sum(window_slice))
-        return results
-
-    return {
-        "decayed": decayed_series,
-        "window_short": compute_windowed_sums(effort, WINDOW_SHORT),
-        "window_medium": compute_windowed_sums(effort, WINDOW_MEDIUM),
-        "window_long": compute_windowed_sums(effort, WINDOW_LONG)
-    }
+    sums = windowed_sums(x, sorted(set(windows.values())), fast=fast)
+
+    out = {"decayed": decayed.tolist()}
+    out.update({key: sums[w].tolist() for key, w in windows.items()})
+    return out
@@ -1,26 +1,47 @@
 import re
-from typing import List
+from typing import Iterable, Iterator, List
 
 def validate_script(lines: List[str]) -> None:
     """
     Raises ValueError if validation fails.
     Returns None if script is valid.
     """
-    # Rule 1: Non-Empty Script
-    if not any(line.strip() for line in lines):
-        raise ValueError("Empty script")
+    for _ in iter_validated_lines(lines):
+        pass
 
+def iter_validated_lines(
+    lines: Iterable[str],
+    seen_header: bool = False,
+    after_speaker: bool = False,
+    script_rules: bool = True
+) -> Iterator[str]:
+    """
+    Streaming form of validate_script.
+    Yields each line once it has passed the per-line rules; script-level rules
+    are checked when the input is exhausted. Raises the same ValueError as
+    validate_script for the same input.
+
+    To re-validate a region of a larger script, pass the validator state before
+    its first line (seen_header, after_speaker) and script_rules=False.
+    """
     scene_header_regex = re.compile(r'^(INT\.|EXT\.)')
-    has_scene_header = False
+    has_content = False
+    has_scene_header = seen_header
     headers_found = 0
-    last_line_was_speaker = False
+    last_line_was_speaker = after_speaker
 
     for line in lines:
+        # Whitespace-only lines never trip a per-line rule, so checking
+        # Rule 1 at the end gives the same precedence as checking it first
+        if not has_content and line.strip():
+            has_content = True
+
         # Check scene header
         if scene_header_regex.match(line):
             has_scene_header = True
             headers_found += 1
             last_line_was_speaker = False
+            yield line
             continue
 
         # Check speaker line (Dialogue candidate)
@@ -39,6 +60,7 @@ def validate_script(lines: List[str]) -> None:
                 raise ValueError("Invalid speaker line")
             
             last_line_was_speaker = True
+            yield line
             continue
 
         # Check parenthetical
@@ -50,11 +72,20 @@ def validate_script(lines: List[str]) -> None:
                 raise ValueError("Invalid parenthetical placement")
             
             last_line_was_speaker = False
+            yield line
             continue
 
         # Any other line (Mixed case dialogue, empty lines, formatting)
         # Resets the "last was speaker" state because a parenthetical must strictly follow a speaker.
         last_line_was_speaker = False
+        yield line
+
+    if not script_rules:
+        return
+
+    # Rule 1: Non-Empty Script
+    if not has_content:
+        raise ValueError("Empty script")
 
     # Rule 2: Scene Header Presence
     if headers_found == 0:
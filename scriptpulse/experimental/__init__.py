@@ -0,0 +1,6 @@
+"""
+Experimental research tools.
+
+Nothing in this package is part of the frozen v1.3.1 engine: it is never
+imported by run_scriptpulse, and its results are not ScriptPulse outputs.
+"""
@@ -0,0 +1,313 @@
+"""
+Parameter sweep over the temporal and decision constants.
+
+EXPERIMENTAL: studies how alerts would change if the frozen constants
+(LAMBDA/TAU/RHO, the window widths, PROB_THRESHOLD and the window
+thresholds) were different. It does not change the engine.
+
+Features and effort are computed once per script with the production
+pipeline. Every configuration of a SweepGrid (the full Cartesian product)
+is then evaluated as one batched NumPy computation:
+
+    decayed      (temporal configs x scenes)   one scan for all LAMBDA/TAU/RHO
+    window sums  (widths x scenes)             one pass per width
+    alerts       (configs x scenes)            broadcast comparisons
+
+    grid = SweepGrid(lam=(0.8, 0.85, 0.9, 0.95), prob_threshold=(0.6, 0.7, 0.8))
+    result = sweep_script(effort, grid)        # SweepResult
+    result.alerts.shape                        # (12, n_scenes)
+
+    python -m scriptpulse.experimental.sweep scripts/ --lam 0.8 0.9 --tau 0.1 0.15 -o sweep.csv
+"""
+import argparse
+import csv
+import itertools
+import math
+import sys
+from dataclasses import dataclass, field, fields
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from scriptpulse.engine.calibration import calibrate_strain_array
+from scriptpulse.engine.decision import PROB_THRESHOLD, THRESHOLD_LONG, THRESHOLD_MEDIUM, THRESHOLD_SHORT
+from scriptpulse.engine.temporal_graph import LAMBDA, RHO, TAU, WINDOW_LONG, WINDOW_MEDIUM, WINDOW_SHORT, decay_scan, windowed_sums
+
+# Grid axes in product order: the first varies slowest
+TEMPORAL_PARAMETERS = ("lam", "tau", "rho")
+DECISION_PARAMETERS = (
+    "window_short", "window_medium", "window_long",
+    "prob_threshold", "threshold_short", "threshold_medium", "threshold_long"
+)
+PARAMETERS = TEMPORAL_PARAMETERS + DECISION_PARAMETERS
+
+@dataclass
+class SweepGrid:
+    """
+    Values to try per parameter; each defaults to the frozen constant.
+    """
+    lam: Sequence[float] = (LAMBDA,)
+    tau: Sequence[float] = (TAU,)
+    rho: Sequence[float] = (RHO,)
+    window_short: Sequence[int] = (WINDOW_SHORT,)
+    window_medium: Sequence[int] = (WINDOW_MEDIUM,)
+    window_long: Sequence[int] = (WINDOW_LONG,)
+    prob_threshold: Sequence[float] = (PROB_THRESHOLD,)
+    threshold_short: Sequence[float] = (THRESHOLD_SHORT,)
+    threshold_medium: Sequence[float] = (THRESHOLD_MEDIUM,)
+    threshold_long: Sequence[float] = (THRESHOLD_LONG,)
+
+    def __post_init__(self):
+        for f in fields(self):
+            values = tuple(getattr(self, f.name))
+            if not values:
+                raise ValueError(f"{f.name} needs at least one value")
+            setattr(self, f.name, values)
+        for name in ("window_short", "window_medium", "window_long"):
+            if any(int(w) != w or w < 1 for w in getattr(self, name)):
+                raise ValueError(f"{name} values must be positive integers")
+
+    def __len__(self) -> int:
+        return math.prod(len(getattr(self, name)) for name in PARAMETERS)
+
+    def configs(self) -> Dict[str, np.ndarray]:
+        """
+        One column per parameter, one row per configuration (product order).
+        """
+        rows = list(itertools.product(*[getattr(self, name) for name in PARAMETERS]))
+        return {name: np.array([row[k] for row in rows]) for k, name in enumerate(PARAMETERS)}
+
+    def frozen_index(self) -> Optional[int]:
+        """
+        Row of the production configuration, if the grid contains it.
+        """
+        frozen = (LAMBDA, TAU, RHO, WINDOW_SHORT, WINDOW_MEDIUM, WINDOW_LONG,
+                  PROB_THRESHOLD, THRESHOLD_SHORT, THRESHOLD_MEDIUM, THRESHOLD_LONG)
+        index = 0
+        for name, value in zip(PARAMETERS, frozen):
+            values = getattr(self, name)
+            if value not in values:
+                return None
+            index = index * len(values) + values.index(value)
+        return index
+
+def decay_accumulate_batch(effort: np.ndarray, lam: np.ndarray, tau: np.ndarray, rho: np.ndarray) -> np.ndarray:
+    """
+    temporal_graph.decay_accumulate for many (lam, tau, rho) at once.
+    Returns (n_configs, n_scenes); row k equals
+    decay_accumulate(effort, lam[k], tau[k], rho[k]) bit for bit (one
+    decay_scan with one series per configuration).
+    """
+    x = np.asarray(effort, dtype=np.float64)
+    lam = np.asarray(lam, dtype=np.float64)
+    tau = np.asarray(tau, dtype=np.float64)[:, None]
+    rho = np.asarray(rho, dtype=np.float64)[:, None]
+    n_configs = len(lam)
+    n = len(x)
+    if n == 0:
+        return np.zeros((n_configs, 0), dtype=np.float64)
+
+    credit = np.zeros((n_configs, n), dtype=np.float64)
+    credit[:, 1:] = np.where(x[None, 1:] < (x[None, :-1] - tau), rho, 0.0)
+    out = decay_scan(np.tile(x, n_configs), credit.reshape(-1), np.arange(n_configs) * n, np.full(n_configs, n), lam)
+    return out.reshape(n_configs, n)
+
+def _aligned_windows(effort: np.ndarray, widths: Sequence[int]) -> Dict[int, np.ndarray]:
+    # Window sums aligned to scene indices, NaN where the window is not full
+    # (NaN > threshold is False, like a None window in decide_alerts)
+    n = len(effort)
+    sums = windowed_sums(effort, sorted(set(widths)))
+    aligned = {}
+    for w, values in sums.items():
+        column = np.full(n, np.nan)
+        if len(values):
+            column[n - len(values):] = values
+        aligned[w] = column
+    return aligned
+
+def _window_condition(aligned: Dict[int, np.ndarray], widths: Sequence[int], thresholds: Sequence[float]) -> np.ndarray:
+    # (n_widths, n_thresholds, n_scenes): window sum above threshold
+    sums = np.stack([aligned[w] for w in widths])
+    with np.errstate(invalid="ignore"):
+        return sums[:, None, :] > np.asarray(thresholds, dtype=np.float64)[None, :, None]
+
+@dataclass
+class SweepResult:
+    # Parameter columns, one row per configuration
+    configs: Dict[str, np.ndarray]
+    # (n_configs, n_scenes) alert flags
+    alerts: np.ndarray
+    # (n_temporal_configs, n_scenes) decayed signal per (lam, tau, rho)
+    decayed: np.ndarray
+    # Production alerts of the script, for comparison
+    baseline: np.ndarray
+    summary: Dict[str, np.ndarray] = field(default_factory=dict)
+
+def sweep_script(effort: np.ndarray, grid: SweepGrid, baseline: Optional[np.ndarray] = None) -> SweepResult:
+    """
+    Evaluates every configuration of `grid` on one script's effort series.
+    baseline defaults to the alerts under the frozen constants.
+    """
+    x = np.asarray(effort, dtype=np.float64)
+    n = len(x)
+    temporal = list(itertools.product(grid.lam, grid.tau, grid.rho))
+    n_d = math.prod(len(getattr(grid, name)) for name in DECISION_PARAMETERS)
+
+    lam, tau, rho = (np.array(col, dtype=np.float64) for col in zip(*temporal))
+    decayed = decay_accumulate_batch(x, lam, tau, rho)
+    probs = calibrate_strain_array(decayed)
+
+    aligned = _aligned_windows(x, grid.window_short + grid.window_medium + grid.window_long)
+    short = _window_condition(aligned, grid.window_short, grid.threshold_short)
+    medium = _window_condition(aligned, grid.window_medium, grid.threshold_medium)
+    long_ = _window_condition(aligned, grid.window_long, grid.threshold_long)
+    # Axes: window_short, window_medium, window_long, prob_threshold,
+    #       threshold_short, threshold_medium, threshold_long, scene
+    agreement = (
+        short[:, None, None, None, :, None, None, :]
+        & medium[None, :, None, None, None, :, None, :]
+        & long_[None, None, :, None, None, None, :, :]
+    )
+    prob_thresholds = np.asarray(grid.prob_threshold, dtype=np.float64)
+
+    alerts = np.empty((len(temporal) * n_d, n), dtype=bool)
+    for t in range(len(temporal)):
+        prob_pass = probs[t][None, :] > prob_thresholds[:, None]
+        block = agreement & prob_pass[None, None, None, :, None, None, None, :]
+        alerts[t * n_d:(t + 1) * n_d] = block.reshape(n_d, n)
+
+    if baseline is None:
+        baseline = frozen_alerts(x)
+    result = SweepResult(configs=grid.configs(), alerts=alerts, decayed=decayed, baseline=np.asarray(baseline, dtype=bool))
+    result.summary = summarize(alerts, result.baseline)
+    return result
+
+def summarize(alerts: np.ndarray, baseline: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Per-configuration statistics of an (n_configs, n_scenes) alert matrix.
+    """
+    n = alerts.shape[1]
+    count = alerts.sum(axis=1)
+    first = np.where(count > 0, alerts.argmax(axis=1), -1)
+    # Runs of consecutive alerted scenes
+    starts = alerts.copy()
+    starts[:, 1:] &= ~alerts[:, :-1]
+    union = (alerts | baseline[None, :]).sum(axis=1)
+    intersection = (alerts & baseline[None, :]).sum(axis=1)
+    return {
+        "alerts": count,
+        "alert_fraction": count / n if n else np.zeros(len(count)),
+        "first_alert": first,
+        "alert_runs": starts.sum(axis=1),
+        "jaccard_vs_frozen": np.where(union > 0, intersection / np.maximum(union, 1), 1.0),
+        "changed_scenes": (alerts != baseline[None, :]).sum(axis=1)
+    }
+
+def frozen_alerts(effort: np.ndarray) -> np.ndarray:
+    """
+    Alerts of the production stages 7-10 for an effort series.
+    """
+    from scriptpulse.engine.temporal_graph import build_temporal_graph
+    from scriptpulse.engine.accumulate import accumulate_signals
+    from scriptpulse.engine.decision import decide_alerts
+
+    signals = accumulate_signals(build_temporal_graph(effort))
+    probs = calibrate_strain_array(np.asarray(signals["decayed"], dtype=np.float64))
+    return np.array(decide_alerts(probs.tolist(), signals), dtype=bool)
+
+@dataclass
+class CorpusSweep:
+    grid: SweepGrid
+    configs: Dict[str, np.ndarray]
+    # Per-configuration totals over all scripts
+    summary: Dict[str, np.ndarray]
+    scripts: int
+    scenes: int
+    # Per script (when keep_alerts=True): (n_configs, n_scenes) alert matrices
+    alerts: Optional[List[np.ndarray]] = None
+
+def sweep_corpus(efforts: Iterable[np.ndarray], grid: SweepGrid, keep_alerts: bool = False) -> CorpusSweep:
+    """
+    Sweeps every script and aggregates per configuration: total alerts,
+    scripts with at least one alert, mean alert fraction, scenes that differ
+    from the frozen configuration, and the corpus-level Jaccard index.
+    """
+    n_configs = len(grid)
+    total = np.zeros(n_configs, dtype=np.int64)
+    scripts_alerted = np.zeros(n_configs, dtype=np.int64)
+    fraction_sum = np.zeros(n_configs)
+    changed = np.zeros(n_configs, dtype=np.int64)
+    intersection = np.zeros(n_configs, dtype=np.int64)
+    union = np.zeros(n_configs, dtype=np.int64)
+    kept = [] if keep_alerts else None
+    n_scripts = 0
+    n_scenes = 0
+    for effort in efforts:
+        result = sweep_script(effort, grid)
+        s = result.summary
+        total += s["alerts"]
+        scripts_alerted += s["alerts"] > 0
+        fraction_sum += s["alert_fraction"]
+        changed += s["changed_scenes"]
+        intersection += (result.alerts & result.baseline[None, :]).sum(axis=1)
+        union += (result.alerts | result.baseline[None, :]).sum(axis=1)
+        n_scripts += 1
+        n_scenes += len(result.baseline)
+        if kept is not None:
+            kept.append(result.alerts)
+    summary = {
+        "alerts": total,
+        "scripts_with_alerts": scripts_alerted,
+        "mean_alert_fraction": fraction_sum / max(n_scripts, 1),
+        "changed_scenes": changed,
+        "jaccard_vs_frozen": np.where(union > 0, intersection / np.maximum(union, 1), 1.0)
+    }
+    return CorpusSweep(grid=grid, configs=grid.configs(), summary=summary, scripts=n_scripts, scenes=n_scenes, alerts=kept)
+
+def script_effort(lines: List[str]) -> np.ndarray:
+    """
+    Effort series of one script from the production pipeline (stages 1-6).
+    """
+    from run_scriptpulse import run_scriptpulse_detailed
+
+    return run_scriptpulse_detailed(lines).effort
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="EXPERIMENTAL: sweep temporal/decision constants over a corpus.")
+    parser.add_argument("inputs", nargs="+", help="script files or directories")
+    defaults = SweepGrid()
+    for f in fields(SweepGrid):
+        value_type = int if f.name.startswith("window_") else float
+        parser.add_argument("--" + f.name.replace("_", "-"), type=value_type, nargs="+", default=list(getattr(defaults, f.name)))
+    parser.add_argument("-o", "--output", default="-", help="CSV with one row per configuration (default: stdout)")
+    args = parser.parse_args(argv)
+
+    from scriptpulse.batch import discover_scripts, read_script_lines
+
+    grid = SweepGrid(**{f.name: getattr(args, f.name) for f in fields(SweepGrid)})
+
+    def efforts():
+        for path in discover_scripts(args.inputs):
+            try:
+                yield script_effort(read_script_lines(path))
+            except (OSError, UnicodeDecodeError, ValueError) as e:
+                print(f"{path}: skipped ({e})", file=sys.stderr)
+
+    sweep = sweep_corpus(efforts(), grid)
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        writer = csv.writer(out)
+        writer.writerow(list(PARAMETERS) + list(sweep.summary))
+        for c in range(len(grid)):
+            writer.writerow(
+                [sweep.configs[name][c].item() for name in PARAMETERS]
+                + [sweep.summary[key][c].item() for key in sweep.summary]
+            )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{len(grid)} configurations, {sweep.scripts} scripts, {sweep.scenes} scenes", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
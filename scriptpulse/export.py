@@ -0,0 +1,401 @@
+"""
+Columnar export of per-scene signals.
+
+One row per scene: the raw features, effort, decayed signal, aligned windows
+(NaN before a window is full), calibrated probability and alert flag. Each
+script is written as its own batch (a record batch in Arrow IPC, a row group
+in Parquet, a group of members in .npz), so a corpus can be appended script
+by script without holding it in memory.
+
+    with open_export_writer("signals.npz") as writer:
+        writer.write("draft_03.txt", result_columns(result))
+
+    with ColumnarExportReader("signals.npz") as reader:
+        for script_id, columns in reader:     # arrays map the file, no copy
+            ...
+        table = reader.read()                 # all batches concatenated
+
+.npz files are written uncompressed with 64-byte aligned members, so the
+reader maps them and returns views into the file. Arrow IPC (.arrow,
+.feather) and Parquet (.parquet) need the optional pyarrow package; Arrow
+IPC files are memory-mapped as well.
+
+    python -m scriptpulse.export info signals.npz
+"""
+import argparse
+import io
+import mmap
+import os
+import struct
+import sys
+import zipfile
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+    from run_scriptpulse import ScriptPulseResult
+
+ARROW_EXTENSIONS = (".arrow", ".feather", ".ipc")
+PARQUET_EXTENSIONS = (".parquet",)
+NPZ_EXTENSIONS = (".npz",)
+
+# Column holding the script id in Arrow and Parquet files
+SCRIPT_COLUMN = "script"
+
+# .npz members start on this boundary (the .npy header is padded to 64 bytes too)
+NPZ_ALIGNMENT = 64
+
+def result_columns(result: "ScriptPulseResult") -> Dict[str, "np.ndarray"]:
+    """
+    Per-scene columns of one detailed result, in export order.
+    Features are included when the result carries them.
+    """
+    import numpy as np
+
+    n = len(result.alerts)
+    columns: Dict[str, np.ndarray] = {"scene": np.arange(n, dtype=np.int64)}
+    if result.features is not None:
+        from scriptpulse.engine.features import FEATURE_KEYS
+
+        for key in FEATURE_KEYS:
+            columns[key] = np.ascontiguousarray(result.features[key])
+    columns["effort"] = np.asarray(result.effort, dtype=np.float64)
+    columns["decayed"] = np.asarray(result.decayed, dtype=np.float64)
+    for name in [k for k in result.signals if k.startswith("window_")]:
+        # Unpadded window values belong to the last len(values) scenes
+        values = result.temporal[name]
+        column = np.full(n, np.nan)
+        if len(values):
+            column[n - len(values):] = values
+        columns[name] = column
+    columns["probability"] = np.asarray(result.probabilities, dtype=np.float64)
+    columns["alert"] = np.asarray(result.alerts, dtype=bool)
+    return columns
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Arrow and Parquet export need pyarrow (pip install pyarrow); .npz works without it") from None
+    return pyarrow
+
+def _check_schema(expected: Optional[List[Tuple[str, str]]], columns: Dict[str, "np.ndarray"]) -> List[Tuple[str, str]]:
+    schema = [(name, array.dtype.str) for name, array in columns.items()]
+    lengths = {len(array) for array in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("all columns of a batch must have the same length")
+    if expected is not None and schema != expected:
+        raise ValueError("batch columns differ from the first batch written to this file")
+    return schema
+
+class NpzExportWriter:
+    """
+    Streams batches into an uncompressed .npz. Batch k is stored as members
+    "<k>/<column>.npy" (k zero-padded) plus "<k>/script.npy"; np.load reads
+    the file as usual.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # Our own handle: its position is where the next local header goes
+        self._file = open(path, "wb")
+        self._zip = zipfile.ZipFile(self._file, "w", compression=zipfile.ZIP_STORED, allowZip64=True)
+        self._schema: Optional[List[Tuple[str, str]]] = None
+        self.batches = 0
+
+    def write(self, script_id: str, columns: Dict[str, "np.ndarray"]) -> None:
+        import numpy as np
+
+        self._schema = _check_schema(self._schema, columns)
+        prefix = f"{self.batches:08d}/"
+        self._write_member(prefix + "script.npy", np.array(script_id))
+        for name, array in columns.items():
+            self._write_member(prefix + name + ".npy", np.ascontiguousarray(array))
+        self.batches += 1
+
+    def _write_member(self, name: str, array: "np.ndarray") -> None:
+        import numpy as np
+
+        header = io.BytesIO()
+        np.lib.format.write_array_header_1_0(header, np.lib.format.header_data_from_array_1_0(array))
+        info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+        info.compress_type = zipfile.ZIP_STORED
+        info.file_size = len(header.getvalue()) + array.nbytes
+        zip64 = info.file_size * 1.05 > zipfile.ZIP64_LIMIT
+        # Pad the local header with an extra field so the data starts aligned
+        fixed = self._file.tell() + 30 + len(name.encode("ascii")) + (20 if zip64 else 0)
+        pad = -(fixed + 4) % NPZ_ALIGNMENT
+        info.extra = struct.pack("<HH", 0xD935, pad) + b"\0" * pad
+        with self._zip.open(info, "w") as f:
+            f.write(header.getvalue())
+            f.write(array.data.cast("B") if array.ndim else array.tobytes())
+
+    def close(self) -> None:
+        self._zip.close()
+        self._file.close()
+
+    def __enter__(self) -> "NpzExportWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+class ArrowExportWriter:
+    """
+    Streams batches into an Arrow IPC file (one record batch per script) or
+    a Parquet file (one row group per script). Needs pyarrow.
+    """
+
+    def __init__(self, path: str, format: str = "arrow"):
+        if format not in ("arrow", "parquet"):
+            raise ValueError("format must be 'arrow' or 'parquet'")
+        self.pa = _require_pyarrow()
+        self.path = path
+        self.format = format
+        self._writer = None
+        self._schema: Optional[List[Tuple[str, str]]] = None
+        self.batches = 0
+
+    def write(self, script_id: str, columns: Dict[str, "np.ndarray"]) -> None:
+        pa = self.pa
+        self._schema = _check_schema(self._schema, columns)
+        n = len(next(iter(columns.values())))
+        arrays = [pa.array([script_id] * n, type=pa.string())] + [pa.array(a) for a in columns.values()]
+        batch = pa.RecordBatch.from_arrays(arrays, names=[SCRIPT_COLUMN] + list(columns))
+        if self._writer is None:
+            if self.format == "parquet":
+                import pyarrow.parquet as pq
+
+                self._writer = pq.ParquetWriter(self.path, batch.schema)
+            else:
+                self._writer = pa.ipc.new_file(self.path, batch.schema)
+        if self.format == "parquet":
+            self._writer.write_table(pa.Table.from_batches([batch]), row_group_size=max(1, n))
+        else:
+            self._writer.write_batch(batch)
+        self.batches += 1
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self) -> "ArrowExportWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def export_format(path: str) -> str:
+    """
+    "npz", "arrow" or "parquet", from the file extension.
+    """
+    lower = path.lower()
+    if lower.endswith(NPZ_EXTENSIONS):
+        return "npz"
+    if lower.endswith(ARROW_EXTENSIONS):
+        return "arrow"
+    if lower.endswith(PARQUET_EXTENSIONS):
+        return "parquet"
+    raise ValueError(f"unknown export format for {path!r}; use .npz, .arrow/.feather or .parquet")
+
+def open_export_writer(path: str):
+    """
+    Writer for `path`, chosen by extension.
+    """
+    fmt = export_format(path)
+    if fmt == "npz":
+        return NpzExportWriter(path)
+    return ArrowExportWriter(path, format=fmt)
+
+class ColumnarExportReader:
+    """
+    Reads an export written by open_export_writer, one batch (script) at a
+    time. For .npz and Arrow IPC the arrays are read-only views of the
+    memory-mapped file; keep the reader open while using them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.format = export_format(path)
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        if self.format == "npz":
+            self._open_npz()
+        elif self.format == "arrow":
+            pa = _require_pyarrow()
+            self._source = pa.memory_map(path, "r")
+            self._ipc = pa.ipc.open_file(self._source)
+            self._n_batches = self._ipc.num_record_batches
+        else:
+            _require_pyarrow()
+            import pyarrow.parquet as pq
+
+            self._parquet = pq.ParquetFile(path, memory_map=True)
+            self._n_batches = self._parquet.num_row_groups
+
+    def _open_npz(self) -> None:
+        # Central directory -> {batch: {column: (data offset, member)}}
+        with zipfile.ZipFile(self.path) as zf:
+            infos = zf.infolist()
+        self._file = open(self.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._members: List[Dict[str, zipfile.ZipInfo]] = []
+        for info in infos:
+            batch, _, member = info.filename.partition("/")
+            if not member.endswith(".npy") or not batch.isdigit():
+                continue
+            k = int(batch)
+            while len(self._members) <= k:
+                self._members.append({})
+            self._members[k][member[:-4]] = info
+        self._n_batches = len(self._members)
+
+    def _npz_array(self, info: zipfile.ZipInfo) -> "np.ndarray":
+        import numpy as np
+
+        mm = self._mmap
+        if info.compress_type != zipfile.ZIP_STORED:
+            # Not written by NpzExportWriter; fall back to a copy
+            with zipfile.ZipFile(self.path) as zf:
+                return np.load(io.BytesIO(zf.read(info)))
+        name_len, extra_len = struct.unpack("<HH", mm[info.header_offset + 26:info.header_offset + 30])
+        start = info.header_offset + 30 + name_len + extra_len
+        head = io.BytesIO(mm[start:start + min(info.file_size, 65536 + 12)])
+        version = np.lib.format.read_magic(head)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(head)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(head)
+        count = 1
+        for dim in shape:
+            count *= dim
+        array = np.frombuffer(mm, dtype=dtype, count=count, offset=start + head.tell())
+        return array.reshape(shape, order="F" if fortran else "C")
+
+    def __len__(self) -> int:
+        return self._n_batches
+
+    def batch(self, k: int) -> Tuple[str, Dict[str, "np.ndarray"]]:
+        """
+        (script id, columns) of batch k.
+        """
+        if not 0 <= k < self._n_batches:
+            raise IndexError("batch index out of range")
+        if self.format == "npz":
+            members = self._members[k]
+            script_id = str(self._npz_array(members["script"])[()])
+            return script_id, {name: self._npz_array(info) for name, info in members.items() if name != "script"}
+        if self.format == "arrow":
+            record_batch = self._ipc.get_batch(k)
+        else:
+            record_batch = self._parquet.read_row_group(k).combine_chunks().to_batches()[0]
+        columns = {}
+        script_id = ""
+        for name, column in zip(record_batch.schema.names, record_batch.columns):
+            if name == SCRIPT_COLUMN:
+                script_id = column[0].as_py() if len(column) else ""
+            else:
+                # Zero-copy for numeric columns; bool columns are bit-packed in Arrow
+                columns[name] = column.to_numpy(zero_copy_only=False)
+        return script_id, columns
+
+    def __iter__(self) -> Iterator[Tuple[str, Dict[str, "np.ndarray"]]]:
+        for k in range(self._n_batches):
+            yield self.batch(k)
+
+    def script_ids(self) -> List[str]:
+        return [self.batch(k)[0] for k in range(self._n_batches)]
+
+    def read(self, columns: Optional[List[str]] = None) -> Dict[str, "np.ndarray"]:
+        """
+        All batches concatenated (a copy), plus "batch" (script index) and
+        "script" (script id) columns.
+        """
+        import numpy as np
+
+        parts: Dict[str, List[np.ndarray]] = {}
+        batch_ids = []
+        script_ids = []
+        for k, (script_id, cols) in enumerate(self):
+            n = len(next(iter(cols.values()))) if cols else 0
+            batch_ids.append(np.full(n, k, dtype=np.int64))
+            script_ids.append(np.full(n, script_id))
+            for name, array in cols.items():
+                if columns is None or name in columns:
+                    parts.setdefault(name, []).append(array)
+        out = {"batch": np.concatenate(batch_ids) if batch_ids else np.zeros(0, dtype=np.int64)}
+        out["script"] = np.concatenate(script_ids) if script_ids else np.zeros(0, dtype=str)
+        for name, arrays in parts.items():
+            out[name] = np.concatenate(arrays)
+        return out
+
+    def to_pandas(self, columns: Optional[List[str]] = None):
+        """
+        One DataFrame for the whole file (needs pandas).
+        """
+        import pandas as pd
+
+        return pd.DataFrame(self.read(columns))
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Arrays handed out still reference the map; it closes with them
+                pass
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.format == "arrow":
+            self._source.close()
+
+    def __enter__(self) -> "ColumnarExportReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Write or inspect columnar ScriptPulse exports.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info_p = sub.add_parser("info", help="batches, rows and columns of an export file")
+    info_p.add_argument("path")
+    write_p = sub.add_parser("write", help="analyse scripts and export their signals")
+    write_p.add_argument("scripts", nargs="+")
+    write_p.add_argument("-o", "--output", required=True, help=".npz, .arrow/.feather or .parquet")
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        with ColumnarExportReader(args.path) as reader:
+            rows = 0
+            names: List[str] = []
+            for _, columns in reader:
+                names = list(columns)
+                rows += len(next(iter(columns.values()))) if columns else 0
+            print(f"{args.path}: {reader.format}, {len(reader)} scripts, {rows} scenes")
+            print("columns: " + ", ".join(names))
+        return 0
+
+    from run_scriptpulse import run_scriptpulse_detailed
+
+    failures = 0
+    with open_export_writer(args.output) as writer:
+        for path in args.scripts:
+            with open(path, "rb") as f:
+                lines = f.read().decode("utf-8").splitlines()
+            try:
+                result = run_scriptpulse_detailed(lines, compact=True)
+            except ValueError as e:
+                failures += 1
+                print(f"{path}: {e}", file=sys.stderr)
+                continue
+            writer.write(path, result_columns(result))
+    print(f"{len(args.scripts) - failures} scripts exported, {failures} failed", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Import-time budget check.
+
+Runs a cold interpreter under `python -X importtime` and fails if importing
+the package (or the pipeline entry point) exceeds the budget, or if a heavy
+dependency is loaded eagerly.
+
+    python -m scriptpulse.import_budget
+    python -m scriptpulse.import_budget --budget-ms 50
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Set, Tuple
+
+# Total self time (ms) charged to a cold import target
+DEFAULT_BUDGET_MS = 50.0
+
+# Must not be loaded by importing the package or the pipeline module
+HEAVY_MODULES = ["numpy", "sklearn", "scipy", "matplotlib", "streamlit"]
+
+TARGETS = [
+    "import scriptpulse",
+    "from scriptpulse import run_scriptpulse",
+]
+
+def measure_import(statement: str, cwd: str) -> Tuple[float, Set[str]]:
+    """
+    Executes `statement` in a fresh interpreter with -X importtime.
+    Returns (self-time total in ms, set of newly loaded top-level packages).
+    """
+    env = dict(os.environ)
+    env.pop("PYTHONSTARTUP", None)
+    baseline = _importtime_lines("pass", cwd, env)
+    lines = _importtime_lines(statement, cwd, env)
+
+    # Modules already imported by a bare interpreter are not charged
+    preloaded = {name for name, _, _ in baseline}
+    total_us = 0
+    loaded: Set[str] = set()
+    for name, self_us, _ in lines:
+        if name in preloaded:
+            continue
+        total_us += self_us
+        loaded.add(name.split(".")[0])
+    return total_us / 1000.0, loaded
+
+def _importtime_lines(statement: str, cwd: str, env: Dict[str, str]) -> List[Tuple[str, int, int]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=cwd, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else statement)
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # Nesting is shown as indentation; only the module name is kept
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+def check_import_budget(budget_ms: float = DEFAULT_BUDGET_MS, cwd: str = ".") -> List[str]:
+    """
+    Returns a list of violations (empty if every target is within budget).
+    """
+    violations = []
+    for statement in TARGETS:
+        total_ms, modules = measure_import(statement, cwd)
+        heavy = [m for m in HEAVY_MODULES if m in modules]
+        if heavy:
+            violations.append(f"{statement!r} eagerly imports {', '.join(heavy)}")
+        if total_ms > budget_ms:
+            violations.append(f"{statement!r} took {total_ms:.1f} ms (budget {budget_ms:.1f} ms)")
+    return violations
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check cold import time of the scriptpulse package.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--cwd", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    args = parser.parse_args(argv)
+
+    violations = check_import_budget(args.budget_ms, args.cwd)
+    for v in violations:
+        print(f"FAIL: {v}")
+    if not violations:
+        print(f"OK: cold imports within {args.budget_ms:.1f} ms")
+    return 1 if violations else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,391 @@
+"""
+Streaming ingest adapters for Fountain and Final Draft (FDX) scripts.
+
+Both adapters yield lines in the engine's plain-text input format, so they
+feed run_scriptpulse, run_scriptpulse_streaming or ScriptPulseStream
+directly, without an intermediate .txt file:
+
+    from scriptpulse.ingest import iter_script_file
+    from scriptpulse.stream import run_scriptpulse_streaming
+
+    messages = run_scriptpulse_streaming(iter_script_file("draft.fdx"))
+
+Fountain is tokenized line by line. FDX is read with ElementTree.iterparse
+and every paragraph is cleared once its lines are out, so memory stays flat
+however large the file is.
+
+Only scene headings, action, character cues, parentheticals and dialogue
+are mapped. Title pages, transitions, shots, notes, sections, synopses,
+boneyard text and page breaks are dropped. Text is never corrected (see
+docs/INPUT_SPEC.md): content the engine cannot express raises its usual
+ValueError.
+
+    python -m scriptpulse.ingest convert draft.fdx -o draft.txt
+    python -m scriptpulse.ingest bench --scenes 1000 10000 50000
+"""
+import argparse
+import os
+import re
+import sys
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
+
+FOUNTAIN_EXTENSIONS = (".fountain", ".spmd")
+FDX_EXTENSIONS = (".fdx",)
+
+# FDX paragraph types that map to engine lines
+FDX_PARAGRAPH_TYPES = ("Scene Heading", "Action", "Character", "Parenthetical", "Dialogue")
+# Paragraph types that continue the current dialogue group (no blank line before)
+_DIALOGUE_CONTINUATION = ("Parenthetical", "Dialogue")
+
+_FOUNTAIN_HEADING = re.compile(r"(?:INT|EXT|EST|INT\.?/EXT|I/E)[. ]", re.IGNORECASE)
+_FOUNTAIN_SCENE_NUMBER = re.compile(r"\s*#[\w.\-]+#\s*$")
+_FOUNTAIN_TITLE_KEY = re.compile(r"[A-Za-z][A-Za-z ]*:")
+_FOUNTAIN_PAGE_BREAK = re.compile(r"={3,}$")
+_FOUNTAIN_COMMENT_OPEN = re.compile(r"/\*|\[\[")
+
+def _strip_fountain_comments(lines: Iterable[str]) -> Iterator[str]:
+    # Removes boneyard (/* */) and notes ([[ ]]), which may span lines. A line
+    # that held only comments is dropped rather than turned into a blank.
+    close = None
+    for line in lines:
+        if close is None and "/*" not in line and "[[" not in line:
+            yield line
+            continue
+        kept = []
+        pos = 0
+        while pos <= len(line):
+            if close is not None:
+                end = line.find(close, pos)
+                if end < 0:
+                    break
+                pos = end + 2
+                close = None
+                continue
+            m = _FOUNTAIN_COMMENT_OPEN.search(line, pos)
+            if m is None:
+                kept.append(line[pos:])
+                break
+            kept.append(line[pos:m.start()])
+            close = "*/" if m.group() == "/*" else "]]"
+            pos = m.end()
+        text = "".join(kept)
+        if text.strip():
+            yield text
+
+def _skip_fountain_title_page(lines: Iterable[str]) -> Iterator[str]:
+    # A title page is a run of "Key: value" lines at the very top, ended by a blank line
+    it = iter(lines)
+    for line in it:
+        if _FOUNTAIN_TITLE_KEY.match(line):
+            for line in it:
+                if not line.strip():
+                    break
+        else:
+            yield line
+        break
+    yield from it
+
+def _fountain_line(line: str, after_blank: bool, before_blank: bool) -> Optional[str]:
+    # Engine line for one Fountain line, or None when the element is dropped
+    stripped = line.strip()
+    if not stripped:
+        return line
+    first = stripped[0]
+
+    if _FOUNTAIN_PAGE_BREAK.match(stripped) or first == "#" or first == "=":
+        # Page break, section or synopsis
+        return None
+    if first == ">":
+        # >centered< text is kept; >forced transition is dropped
+        return stripped[1:-1].strip() if stripped.endswith("<") else None
+    if first == "." and len(stripped) > 1 and stripped[1].isalnum():
+        # Forced scene heading
+        return _FOUNTAIN_SCENE_NUMBER.sub("", stripped[1:])
+    if first in "!~":
+        # Forced action, lyrics
+        return stripped[1:]
+    if first == "@":
+        # Forced character
+        return stripped[1:].rstrip("^").rstrip()
+    if _FOUNTAIN_HEADING.match(stripped):
+        return _FOUNTAIN_SCENE_NUMBER.sub("", line)
+    if after_blank and stripped.isupper():
+        if before_blank and stripped.endswith("TO:"):
+            # Transition
+            return None
+        if stripped.endswith("^"):
+            # Dual dialogue cue
+            return stripped.rstrip("^").rstrip()
+    return line
+
+def iter_fountain_lines(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Engine lines from Fountain source lines (newlines stripped), one line of
+    lookahead at a time. Forcing marks, scene numbers and dual-dialogue
+    carets are removed; emphasis markup is kept as written.
+    """
+    it = _skip_fountain_title_page(_strip_fountain_comments(lines))
+    after_blank = True
+    line = next(it, None)
+    while line is not None:
+        nxt = next(it, None)
+        out = _fountain_line(line, after_blank, nxt is None or not nxt.strip())
+        if out is not None:
+            yield out
+            after_blank = not line.strip()
+        line = nxt
+
+def _paragraph_lines(kind: str, text: str, first: bool) -> List[str]:
+    # Engine lines for one mapped FDX paragraph: a blank line starts every
+    # element except the parts of a dialogue group
+    lines = text.splitlines()
+    if not lines:
+        return lines
+    if not first and kind not in _DIALOGUE_CONTINUATION:
+        lines.insert(0, "")
+    return lines
+
+def _paragraph_text(paragraph) -> str:
+    # Concatenated direct <Text> runs; "" for wrappers such as DualDialogue
+    return "".join(run.text or "" for run in paragraph.iterfind("Text"))
+
+def iter_fdx_lines(source: Union[str, BinaryIO]) -> Iterator[str]:
+    """
+    Engine lines from an FDX file (path or binary file object), streamed
+    with iterparse. Only paragraphs of the document body (<Content> under
+    the root) are read; each is cleared as soon as it has been mapped.
+    Malformed XML raises ValueError.
+    """
+    import xml.etree.ElementTree as ET
+
+    depth = 0
+    paragraph_depth = 0
+    content = None
+    first = True
+    events = ET.iterparse(source, events=("start", "end"))
+    while True:
+        try:
+            event, elem = next(events)
+        except StopIteration:
+            return
+        except ET.ParseError as e:
+            raise ValueError(f"Invalid FDX: {e}") from e
+        if event == "start":
+            depth += 1
+            if elem.tag == "Paragraph":
+                paragraph_depth += 1
+            elif elem.tag == "Content" and depth == 2:
+                content = elem
+            continue
+        depth -= 1
+        if elem.tag == "Paragraph":
+            paragraph_depth -= 1
+            kind = elem.get("Type")
+            if content is not None and kind in FDX_PARAGRAPH_TYPES:
+                lines = _paragraph_lines(kind, _paragraph_text(elem), first)
+                if lines:
+                    first = False
+                    yield from lines
+            if paragraph_depth == 0:
+                # Drop the finished paragraph from the tree being built
+                elem.clear()
+                if content is not None:
+                    content.clear()
+        elif elem is content:
+            content = None
+
+def iter_script_file(path: str, encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Engine lines of a script file, by extension: FDX, Fountain, or plain
+    text (split like bytes.decode().splitlines(), see scriptpulse.reader).
+    """
+    lower = path.lower()
+    if lower.endswith(FDX_EXTENSIONS):
+        yield from iter_fdx_lines(path)
+    elif lower.endswith(FOUNTAIN_EXTENSIONS):
+        with open(path, "r", encoding=encoding) as f:
+            yield from iter_fountain_lines(line.rstrip("\n") for line in f)
+    else:
+        from scriptpulse.reader import open_script
+
+        with open_script(path, encoding) as lines:
+            yield from lines
+
+# Writers, for round-trip tests and benchmark inputs
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+def _script_elements(lines: List[str]) -> Iterator[Tuple[str, List[str]]]:
+    # (FDX paragraph type, lines) per element of a valid engine script
+    from scriptpulse.engine.preprocess import preprocess_lines
+    from scriptpulse.engine.segment import segment_scenes
+    from scriptpulse.engine.validator import validate_script
+
+    validate_script(lines)
+    for scene in segment_scenes(preprocess_lines(lines)):
+        yield "Scene Heading", [scene.header]
+        for block in scene.blocks:
+            if block.block_type == "ACTION":
+                yield "Action", block.lines
+                continue
+            yield "Character", [block.speaker]
+            for line in block.lines:
+                yield "Parenthetical" if line.startswith("(") and line.endswith(")") else "Dialogue", [line]
+
+def write_fdx(lines: List[str], f: BinaryIO) -> None:
+    """
+    Writes a valid engine script as a minimal FDX document. Multi-line
+    action blocks become one paragraph with embedded newlines.
+    """
+    f.write(b'<?xml version="1.0" encoding="UTF-8" standalone="no" ?>\n'
+            b'<FinalDraft DocumentType="Script" Template="No" Version="4">\n<Content>\n')
+    for kind, texts in _script_elements(lines):
+        text = _escape("\n".join(texts))
+        f.write(f'<Paragraph Type="{kind}"><Text>{text}</Text></Paragraph>\n'.encode("utf-8"))
+    f.write(b"</Content>\n</FinalDraft>\n")
+
+def write_fountain(lines: List[str], f: TextIO) -> None:
+    """
+    Writes a valid engine script as Fountain. Action lines that Fountain
+    would read as another element are forced with "!".
+    """
+    first = True
+    for kind, texts in _script_elements(lines):
+        if not first and kind not in _DIALOGUE_CONTINUATION:
+            f.write("\n")
+        first = False
+        for text in texts:
+            if kind == "Action" and (text.isupper() or text[0] in ".!@~>=#"):
+                text = "!" + text
+            f.write(text + "\n")
+
+def script_element_lines(lines: List[str]) -> List[str]:
+    """
+    Engine lines that the adapters produce for the FDX or Fountain rendering
+    of a valid script: its elements with the adapters' blank-line layout.
+    """
+    out: List[str] = []
+    for kind, texts in _script_elements(lines):
+        out += _paragraph_lines(kind, "\n".join(texts), not out)
+    return out
+
+def _convert_fdx_tree(path: str, out_path: str) -> None:
+    # What a standalone converter does: parse the whole document, write .txt
+    import xml.etree.ElementTree as ET
+
+    root = ET.parse(path).getroot()
+    out = []
+    for paragraph in root.find("Content").iter("Paragraph"):
+        kind = paragraph.get("Type")
+        if kind in FDX_PARAGRAPH_TYPES:
+            out += _paragraph_lines(kind, _paragraph_text(paragraph), not out)
+    with open(out_path, "w", encoding="utf-8", newline="\n") as f:
+        f.write("\n".join(out) + "\n")
+
+def _measure(fn, repeats: int) -> Tuple[float, float]:
+    # (best wall time in seconds, tracemalloc peak in bytes of one extra run)
+    import time
+    import tracemalloc
+
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+def run_ingest_benchmark(
+    scene_counts: Sequence[int] = (1000, 10000, 50000),
+    repeats: int = 3,
+    seed: int = 0,
+    progress=None
+) -> List[dict]:
+    """
+    Times FDX analysis two ways on generated scripts: convert to .txt with a
+    whole-document parse, read it back and run_scriptpulse ("convert"), versus
+    run_scriptpulse_streaming over iter_fdx_lines ("direct"). Both give the
+    same messages. Returns one row per size.
+    """
+    from run_scriptpulse import run_scriptpulse
+    from scriptpulse.batch import read_script_lines
+    from scriptpulse.corpus import generate_script
+    from scriptpulse.stream import run_scriptpulse_streaming
+    import tempfile
+
+    if repeats < 1:
+        raise ValueError("repeats must be >= 1")
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        fdx_path = os.path.join(tmp, "script.fdx")
+        txt_path = os.path.join(tmp, "script.txt")
+        for scenes in scene_counts:
+            with open(fdx_path, "wb") as f:
+                write_fdx(generate_script(seed, scenes=scenes), f)
+
+            def convert():
+                _convert_fdx_tree(fdx_path, txt_path)
+                return run_scriptpulse(read_script_lines(txt_path))
+
+            def direct():
+                return run_scriptpulse_streaming(iter_fdx_lines(fdx_path))
+
+            if convert() != direct():
+                raise AssertionError(f"convert and direct messages differ at {scenes} scenes")
+            convert_s, convert_peak = _measure(convert, repeats)
+            direct_s, direct_peak = _measure(direct, repeats)
+            rows.append({
+                "scenes": scenes,
+                "fdx_bytes": os.path.getsize(fdx_path),
+                "convert_s": convert_s,
+                "direct_s": direct_s,
+                "convert_peak_bytes": convert_peak,
+                "direct_peak_bytes": direct_peak
+            })
+            if progress is not None:
+                progress(f"{scenes} scenes done")
+    return rows
+
+def format_benchmark(rows: List[dict]) -> str:
+    mb = 1 << 20
+    out = [f"{'scenes':>8}{'FDX MB':>9}{'convert s':>11}{'direct s':>10}{'speedup':>9}{'convert MB':>12}{'direct MB':>11}"]
+    for r in rows:
+        out.append(
+            f"{r['scenes']:>8}{r['fdx_bytes'] / mb:>9.1f}{r['convert_s']:>11.3f}{r['direct_s']:>10.3f}"
+            f"{r['convert_s'] / r['direct_s']:>8.2f}x{r['convert_peak_bytes'] / mb:>12.1f}{r['direct_peak_bytes'] / mb:>11.1f}"
+        )
+    return "\n".join(out)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Read Fountain and Final Draft (FDX) scripts.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert_p = sub.add_parser("convert", help="write the engine's plain-text lines of a script")
+    convert_p.add_argument("path")
+    convert_p.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    bench_p = sub.add_parser("bench", help="direct FDX streaming vs. convert-then-analyse")
+    bench_p.add_argument("--scenes", type=int, nargs="+", default=[1000, 10000, 50000])
+    bench_p.add_argument("--repeats", type=int, default=3)
+    bench_p.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="\n")
+        try:
+            for line in iter_script_file(args.path):
+                out.write(line + "\n")
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    else:
+        rows = run_ingest_benchmark(args.scenes, args.repeats, args.seed, progress=lambda m: print(m, file=sys.stderr))
+        print(format_benchmark(rows))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+"""
+Per-stage instrumentation for the ScriptPulse pipeline.
+
+An observer receives a start and an end event for every pipeline stage.
+Attach it for one call or for a block of code:
+
+    agg = StageAggregator(trace_memory=True)
+    run_scriptpulse_detailed(lines, observer=agg)
+
+    with observe(agg):
+        run_scriptpulse(lines)
+
+    print(agg.format_breakdown())
+    agg.write_chrome_trace("trace.json")   # chrome://tracing or ui.perfetto.dev
+
+With no observer attached each stage costs one None check. The module is
+imported by run_scriptpulse, so it keeps its own imports light.
+
+    python -m scriptpulse.instrument script.txt --trace trace.json
+"""
+import contextvars
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+@dataclass
+class StageRecord:
+    stage: str
+    # perf_counter_ns at stage start
+    start_ns: int
+    wall_ns: int
+    cpu_ns: int
+    # e.g. {"lines": 120} or {"scenes": 12, "blocks": 40, "sentences": 95}
+    input_sizes: Dict[str, int]
+    output_sizes: Dict[str, int]
+    # Only when the observer traces memory and tracemalloc is running. The
+    # peak is above the stage's starting level; without reset_peak it is
+    # exact when the stage set a new tracemalloc peak, else an upper bound
+    alloc_delta_bytes: Optional[int] = None
+    alloc_peak_bytes: Optional[int] = None
+    thread_id: int = 0
+    # Exception type name when the stage raised (output_sizes is then empty)
+    error: Optional[str] = None
+
+class StageObserver:
+    """
+    Base observer; override stage_start and/or stage_end.
+    Set trace_memory = True to receive tracemalloc deltas (observe() starts
+    tracemalloc for the duration of the block if needed). Stages leave the
+    tracemalloc peak alone unless reset_peak is set, which makes per-stage
+    peaks exact; set it only when nothing else reads that peak and stages
+    do not nest.
+    """
+    trace_memory: bool = False
+    reset_peak: bool = False
+
+    def stage_start(self, stage: str, input_sizes: Dict[str, int]) -> None:
+        pass
+
+    def stage_end(self, record: StageRecord) -> None:
+        pass
+
+_current_observer: contextvars.ContextVar = contextvars.ContextVar("scriptpulse_observer", default=None)
+
+def current_observer() -> Optional[StageObserver]:
+    return _current_observer.get()
+
+@contextmanager
+def observe(observer: StageObserver) -> Iterator[StageObserver]:
+    """
+    Attaches `observer` to every pipeline run in this context.
+    """
+    started_tracing = observer.trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    token = _current_observer.set(observer)
+    try:
+        yield observer
+    finally:
+        _current_observer.reset(token)
+        if started_tracing:
+            tracemalloc.stop()
+
+def describe(stage: str, value: Any) -> Dict[str, int]:
+    """
+    Size summary of a stage input or output.
+    """
+    if value is None:
+        return {}
+    if stage == "output" and isinstance(value, list):
+        return {"messages": len(value)}
+    if isinstance(value, tuple):
+        return describe(stage, value[0])
+    if isinstance(value, dict):
+        return {"scenes": len(value["decayed"])} if "decayed" in value else {}
+    if hasattr(value, "block_sentence_offsets"):
+        # CompactScript
+        return {"scenes": len(value), "blocks": len(value.block_type), "sentences": len(value.sentence_start)}
+    if hasattr(value, "shape"):
+        return {"scenes": int(value.shape[0]) if value.shape else 1}
+    if hasattr(value, "columns"):
+        # SceneFeatureArrays
+        return {"scenes": len(value)}
+    try:
+        n = len(value)
+    except TypeError:
+        return {}
+    if n and hasattr(value[0], "blocks"):
+        blocks = [b for s in value for b in s.blocks]
+        return {"scenes": n, "blocks": len(blocks), "sentences": sum(len(b.sentences) for b in blocks)}
+    if n and isinstance(value[0], (bool, int, float)):
+        # Per-scene values (effort, flags)
+        return {"scenes": n}
+    return {"lines": n}
+
+def run_stage(observer: StageObserver, stage: str, fn: Callable, *args):
+    """
+    Calls fn(*args) and reports it to `observer` as one stage. A stage that
+    raises is reported too (with record.error set) before the exception
+    propagates, so every stage_start has its stage_end.
+    """
+    input_sizes = describe(stage, next((a for a in args if a is not None), None))
+    observer.stage_start(stage, input_sizes)
+    tracing = observer.trace_memory and tracemalloc.is_tracing()
+    if tracing:
+        if observer.reset_peak:
+            tracemalloc.reset_peak()
+        mem_before = tracemalloc.get_traced_memory()[0]
+    result = None
+    error = None
+    cpu0 = time.process_time_ns()
+    t0 = time.perf_counter_ns()
+    try:
+        result = fn(*args)
+        return result
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        t1 = time.perf_counter_ns()
+        cpu1 = time.process_time_ns()
+        record = StageRecord(
+            stage=stage,
+            start_ns=t0,
+            wall_ns=t1 - t0,
+            cpu_ns=cpu1 - cpu0,
+            input_sizes=input_sizes,
+            output_sizes={} if error is not None else describe(stage, result),
+            thread_id=threading.get_ident(),
+            error=error
+        )
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            record.alloc_delta_bytes = current - mem_before
+            record.alloc_peak_bytes = max(0, peak - mem_before)
+        observer.stage_end(record)
+
+class StageAggregator(StageObserver):
+    """
+    Collects StageRecords across runs; prints a per-stage breakdown and
+    exports a Chrome trace (Trace Event Format) timeline.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.records: List[StageRecord] = []
+        self._lock = threading.Lock()
+
+    def stage_end(self, record: StageRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+
+    def breakdown(self) -> List[Dict[str, Any]]:
+        """
+        One row per stage (first-seen order): calls, total/mean wall and CPU
+        seconds, share of total wall time, max allocation peak.
+        """
+        rows: Dict[str, Dict[str, Any]] = {}
+        for r in self.records:
+            row = rows.setdefault(r.stage, {"stage": r.stage, "calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_bytes": None})
+            row["calls"] += 1
+            row["wall_s"] += r.wall_ns / 1e9
+            row["cpu_s"] += r.cpu_ns / 1e9
+            if r.alloc_peak_bytes is not None:
+                row["peak_bytes"] = max(row["peak_bytes"] or 0, r.alloc_peak_bytes)
+        total = sum(row["wall_s"] for row in rows.values())
+        for row in rows.values():
+            row["mean_wall_s"] = row["wall_s"] / row["calls"]
+            row["share"] = row["wall_s"] / total if total > 0 else 0.0
+        return list(rows.values())
+
+    def format_breakdown(self) -> str:
+        rows = self.breakdown()
+        out = [f"{'stage':<16}{'calls':>6}{'wall ms':>12}{'cpu ms':>12}{'share':>8}{'peak KiB':>12}"]
+        for row in rows:
+            peak = "" if row["peak_bytes"] is None else f"{row['peak_bytes'] / 1024:.0f}"
+            out.append(
+                f"{row['stage']:<16}{row['calls']:>6}{row['wall_s'] * 1000:>12.3f}"
+                f"{row['cpu_s'] * 1000:>12.3f}{row['share'] * 100:>7.1f}%{peak:>12}"
+            )
+        total_wall = sum(row["wall_s"] for row in rows)
+        total_cpu = sum(row["cpu_s"] for row in rows)
+        out.append(f"{'total':<16}{'':>6}{total_wall * 1000:>12.3f}{total_cpu * 1000:>12.3f}")
+        return "\n".join(out)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """
+        Complete ("X") events in microseconds, one per stage call.
+        """
+        origin = min((r.start_ns for r in self.records), default=0)
+        pid = os.getpid()
+        events = []
+        for r in self.records:
+            args: Dict[str, Any] = {"cpu_ms": r.cpu_ns / 1e6, "input": r.input_sizes, "output": r.output_sizes}
+            if r.alloc_peak_bytes is not None:
+                args["alloc_delta_bytes"] = r.alloc_delta_bytes
+                args["alloc_peak_bytes"] = r.alloc_peak_bytes
+            if r.error is not None:
+                args["error"] = r.error
+            events.append({
+                "name": r.stage,
+                "cat": "stage",
+                "ph": "X",
+                "ts": (r.start_ns - origin) / 1000,
+                "dur": r.wall_ns / 1000,
+                "pid": pid,
+                "tid": r.thread_id,
+                "args": args
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: str) -> None:
+        import json
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Per-stage breakdown of one ScriptPulse run.")
+    parser.add_argument("script", help="script .txt file")
+    parser.add_argument("--memory", action="store_true", help="record tracemalloc deltas (slower)")
+    parser.add_argument("--trace", help="write a Chrome trace JSON timeline here")
+    parser.add_argument("--fused", action="store_true", help="use the fused front end")
+    parser.add_argument("--compact", action="store_true", help="use the compact segmentation")
+    args = parser.parse_args(argv)
+
+    from run_scriptpulse import run_scriptpulse_detailed
+    # Under `python -m` this file is __main__; use the module the pipeline reads
+    from scriptpulse.instrument import StageAggregator, observe
+
+    with open(args.script, "rb") as f:
+        lines = f.read().decode("utf-8").splitlines()
+
+    agg = StageAggregator(trace_memory=args.memory)
+    # observe() starts tracing for this run only, so exact stage peaks are safe
+    agg.reset_peak = args.memory and not tracemalloc.is_tracing()
+    with observe(agg):
+        result = run_scriptpulse_detailed(lines, fused=args.fused, compact=args.compact)
+    print(agg.format_breakdown())
+    print(f"{len(result.alerts)} scenes, {len(result.messages)} alerts")
+    if args.trace:
+        agg.write_chrome_trace(args.trace)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
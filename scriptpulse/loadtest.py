@@ -0,0 +1,193 @@
+"""
+Load test for the local HTTP service (scriptpulse.service).
+
+Drives POST /analyze with seeded synthetic scripts (scriptpulse.corpus) from
+many concurrent keep-alive connections and reports latency percentiles,
+throughput and status counts.
+
+    python -m scriptpulse.loadtest --start-server --workers 4 --requests 2000 --concurrency 32
+    python -m scriptpulse.loadtest --port 8765 --ndjson 8
+
+429 responses are counted separately and excluded from the latencies.
+"""
+import argparse
+import asyncio
+import json
+import math
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Nearest-rank percentile (q in 0..100); nan for no values.
+    """
+    if not values:
+        return math.nan
+    v = sorted(values)
+    return v[min(len(v) - 1, max(0, math.ceil(q / 100 * len(v)) - 1))]
+
+def build_payloads(count: int, seed: int, scenes: int, ndjson: int) -> List[Tuple[bytes, str]]:
+    """
+    (body, content type) per distinct request; ndjson > 0 packs that many
+    scripts into each NDJSON request.
+    """
+    from scriptpulse.corpus import generate_script
+
+    payloads = []
+    for i in range(count):
+        if ndjson:
+            items = [
+                json.dumps({"id": j, "lines": generate_script(seed + i * ndjson + j, scenes=scenes)})
+                for j in range(ndjson)
+            ]
+            payloads.append(("\n".join(items).encode("utf-8"), "application/x-ndjson"))
+        else:
+            payloads.append(("\n".join(generate_script(seed + i, scenes=scenes)).encode("utf-8"), "text/plain"))
+    return payloads
+
+async def _request(reader, writer, host: str, body: bytes, content_type: str) -> Tuple[int, bytes]:
+    writer.write(
+        f"POST /analyze HTTP/1.1\r\nHost: {host}\r\nContent-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    status_line, *header_lines = head[:-4].decode("latin-1").split("\r\n")
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    payload = await reader.readexactly(int(headers.get("content-length", "0")))
+    if headers.get("connection", "").lower() == "close":
+        raise ConnectionResetError("server closed the connection")
+    return int(status_line.split(" ")[1]), payload
+
+async def run_load(
+    host: str,
+    port: int,
+    payloads: List[Tuple[bytes, str]],
+    requests: int,
+    concurrency: int
+) -> dict:
+    """
+    Sends `requests` requests (cycling through payloads) over `concurrency`
+    connections and returns the latency/throughput summary.
+    """
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    errors = 0
+    next_index = 0
+
+    async def client() -> None:
+        nonlocal next_index, errors
+        reader, writer = await asyncio.open_connection(host, port, limit=1 << 26)
+        try:
+            while next_index < requests:
+                body, content_type = payloads[next_index % len(payloads)]
+                next_index += 1
+                t0 = time.perf_counter()
+                try:
+                    status, _ = await _request(reader, writer, host, body, content_type)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    errors += 1
+                    writer.close()
+                    reader, writer = await asyncio.open_connection(host, port, limit=1 << 26)
+                    continue
+                elapsed = time.perf_counter() - t0
+                statuses[status] = statuses.get(status, 0) + 1
+                if status != 429:
+                    latencies.append(elapsed)
+        finally:
+            writer.close()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    wall = time.perf_counter() - t0
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "wall_s": wall,
+        "throughput_rps": len(latencies) / wall if wall > 0 else 0.0,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "connection_errors": errors,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies) * 1000 if latencies else math.nan
+    }
+
+async def _wait_healthy(host: str, port: int, timeout: float) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(f"GET /healthz HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode("latin-1"))
+            await writer.drain()
+            data = await reader.read()
+            writer.close()
+            return json.loads(data.split(b"\r\n\r\n", 1)[1])
+        except (ConnectionError, OSError, ValueError, IndexError):
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"service on {host}:{port} did not become healthy")
+            await asyncio.sleep(0.1)
+
+def _free_port(host: str) -> int:
+    import socket
+
+    with socket.socket() as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the ScriptPulse HTTP service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--start-server", action="store_true", help="start a service subprocess on a free port")
+    parser.add_argument("--workers", type=int, default=None, help="service workers with --start-server")
+    parser.add_argument("--cache", help="persistent cache file for the started service")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenes", type=int, default=20, help="scenes per generated script")
+    parser.add_argument("--distinct", type=int, default=64, help="distinct generated payloads")
+    parser.add_argument("--ndjson", type=int, default=0, help="scripts per NDJSON request (0 = plain text)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    server: Optional[subprocess.Popen] = None
+    port = args.port
+    if args.start_server:
+        port = _free_port(args.host)
+        cmd = [sys.executable, "-m", "scriptpulse.service", "--host", args.host, "--port", str(port)]
+        if args.workers:
+            cmd += ["--workers", str(args.workers)]
+        if args.cache:
+            cmd += ["--cache", args.cache]
+        server = subprocess.Popen(cmd)
+    try:
+        health = asyncio.run(_wait_healthy(args.host, port, timeout=60))
+        payloads = build_payloads(args.distinct, args.seed, args.scenes, args.ndjson)
+        summary = asyncio.run(run_load(args.host, port, payloads, args.requests, args.concurrency))
+        summary["service"] = asyncio.run(_wait_healthy(args.host, port, timeout=5))
+        summary["service_workers"] = health["workers"]
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    if args.json:
+        print(json.dumps(summary, indent=2, sort_keys=True))
+    else:
+        service = summary["service"]
+        print(f"{summary['requests']} requests, concurrency {summary['concurrency']}, {summary['service_workers']} workers")
+        print(f"throughput {summary['throughput_rps']:.1f} req/s  statuses {summary['statuses']}  connection errors {summary['connection_errors']}")
+        print(f"latency ms  p50 {summary['p50_ms']:.2f}  p90 {summary['p90_ms']:.2f}  p99 {summary['p99_ms']:.2f}  max {summary['max_ms']:.2f}")
+        print(f"batches {service['batches']}, mean batch size {service['mean_batch_size']:.2f}, rejected {service['rejected']}")
+        if "cache" in service:
+            print(f"cache hit rate {service['cache']['hit_rate']:.3f}, {service['cache']['entries']} entries")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,545 @@
+"""
+Memory accounting and memory budgets for the ScriptPulse pipeline.
+
+profile_memory() runs the pipeline under tracemalloc and records, per stage,
+the allocation peak and the memory and objects the stage leaves behind
+(with the source lines that allocated most), and, per scene, the objects
+and bytes its segmented text holds.
+
+project_footprint() estimates from line and character counts how much
+memory the engine will allocate for an input in each representation:
+per-scene lists ("segments", the default), span arrays ("compact") and
+streaming ("stream"). run_within_budget() runs the first representation
+that fits a budget and raises MemoryBudgetExceeded, before anything large
+is allocated, when none does. Projections cover what the engine allocates,
+not the caller's input lines.
+
+FOOTPRINT_MODELS were measured on one CPython build; allocation sizes
+differ between interpreters and allocators, so where the budget matters,
+calibrate on the interpreter that runs the engine and pass the saved models.
+
+    python -m scriptpulse.memory profile script.txt --top 5
+    python -m scriptpulse.memory calibrate -o footprint.json
+    python -m scriptpulse.memory project script.txt --budget 256M --models footprint.json
+"""
+import re
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from itertools import accumulate
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from scriptpulse.instrument import StageObserver, StageRecord
+
+REPRESENTATIONS = ("segments", "compact", "stream")
+
+# Scenes a stream holds at once (run_scriptpulse_streaming's default)
+STREAM_BATCH_SCENES = 256
+# calibrate_footprint scales its fitted envelope up by this much
+SAFETY_MARGIN = 1.15
+
+@dataclass
+class FootprintModel:
+    """
+    Projected peak bytes = per_line * lines + per_char * chars
+    + per_scene_line * max_scene_lines + per_scene_char * max_scene_chars
+    + per_scene * scenes + fixed. For "stream", lines and chars are those of
+    the largest run of STREAM_BATCH_SCENES consecutive scenes; the largest
+    scene is held whole in every representation.
+    """
+    per_line: float
+    per_char: float
+    per_scene_line: float
+    per_scene_char: float
+    per_scene: float
+    fixed: float
+
+# Upper envelopes of tracemalloc peaks measured on generated scripts
+# (python -m scriptpulse.memory calibrate) times SAFETY_MARGIN, rounded up.
+# Measured with CPython 3.11 on x86-64; defaults, not a guarantee elsewhere
+FOOTPRINT_MODELS: Dict[str, FootprintModel] = {
+    "segments": FootprintModel(per_line=347.0, per_char=2.74, per_scene_line=0.0, per_scene_char=1.62, per_scene=0.0, fixed=576 * 1024),
+    "compact": FootprintModel(per_line=205.0, per_char=1.33, per_scene_line=1.5, per_scene_char=2.49, per_scene=0.0, fixed=72 * 1024),
+    "stream": FootprintModel(per_line=301.0, per_char=2.14, per_scene_line=0.0, per_scene_char=2.68, per_scene=64.0, fixed=288 * 1024),
+}
+
+_HEADER_PREFIXES = ("INT.", "EXT.")
+
+@dataclass
+class InputShape:
+    lines: int
+    chars: int
+    scenes: int
+    # Largest run of STREAM_BATCH_SCENES consecutive scenes
+    window_lines: int
+    window_chars: int
+    # Largest single scene
+    max_scene_lines: int
+    max_scene_chars: int
+
+def input_shape(lines: Sequence[str], window: int = STREAM_BATCH_SCENES) -> InputShape:
+    """
+    Line, character and scene counts of an input, in one pass over the
+    lines (scene headers by their INT./EXT. prefix).
+    """
+    ends = list(accumulate(map(len, lines), initial=0))
+    starts = [i for i, line in enumerate(lines) if line.startswith(_HEADER_PREFIXES)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    bounds = starts + [len(lines)]
+    window_lines = window_chars = max_scene_lines = max_scene_chars = 0
+    for k in range(len(starts)):
+        a, b = bounds[k], bounds[min(k + window, len(starts))]
+        window_lines = max(window_lines, b - a)
+        window_chars = max(window_chars, ends[b] - ends[a])
+        max_scene_lines = max(max_scene_lines, bounds[k + 1] - a)
+        max_scene_chars = max(max_scene_chars, ends[bounds[k + 1]] - ends[a])
+    return InputShape(
+        lines=len(lines),
+        chars=ends[-1],
+        scenes=len(starts),
+        window_lines=window_lines,
+        window_chars=window_chars,
+        max_scene_lines=max_scene_lines,
+        max_scene_chars=max_scene_chars
+    )
+
+def project_footprint(shape: InputShape, models: Optional[Dict[str, FootprintModel]] = None) -> Dict[str, int]:
+    """
+    Projected peak bytes allocated by the engine, per representation.
+    """
+    models = models or FOOTPRINT_MODELS
+    out = {}
+    for name in REPRESENTATIONS:
+        m = models[name]
+        lines, chars = (shape.window_lines, shape.window_chars) if name == "stream" else (shape.lines, shape.chars)
+        out[name] = int(
+            m.per_line * lines + m.per_char * chars
+            + m.per_scene_line * shape.max_scene_lines + m.per_scene_char * shape.max_scene_chars
+            + m.per_scene * shape.scenes + m.fixed
+        )
+    return out
+
+class MemoryBudgetExceeded(ValueError):
+    """
+    No allowed representation fits the memory budget. to_dict() gives the
+    structured form (budget, projections, input size).
+    """
+
+    def __init__(self, budget_bytes: int, projected: Dict[str, int], shape: InputShape):
+        best = min(projected, key=projected.get)
+        super().__init__(
+            f"Projected memory {projected[best]} bytes ({best}) exceeds the budget of {budget_bytes} bytes"
+        )
+        self.budget_bytes = budget_bytes
+        self.projected = projected
+        self.shape = shape
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "budget_bytes": self.budget_bytes,
+            "projected_bytes": dict(self.projected),
+            "lines": self.shape.lines,
+            "chars": self.shape.chars,
+            "scenes": self.shape.scenes,
+            "max_scene_lines": self.shape.max_scene_lines,
+            "max_scene_chars": self.shape.max_scene_chars
+        }
+
+def save_footprint_models(models: Dict[str, FootprintModel], path: str) -> None:
+    import json
+    from dataclasses import asdict
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({name: asdict(m) for name, m in models.items()}, f, indent=1)
+
+def load_footprint_models(path: str) -> Dict[str, FootprintModel]:
+    """
+    Models saved by save_footprint_models (python -m scriptpulse.memory
+    calibrate -o). Raises ValueError when a representation is missing.
+    """
+    import json
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    missing = [name for name in REPRESENTATIONS if name not in data]
+    if missing:
+        raise ValueError(f"{path}: no footprint model for {', '.join(missing)}")
+    return {name: FootprintModel(**data[name]) for name in REPRESENTATIONS}
+
+def choose_representation(
+    shape: InputShape,
+    budget_bytes: int,
+    allowed: Sequence[str] = REPRESENTATIONS,
+    models: Optional[Dict[str, FootprintModel]] = None
+) -> str:
+    """
+    First representation in `allowed` whose projection fits the budget.
+    Raises MemoryBudgetExceeded when none does.
+    """
+    projected = {name: size for name, size in project_footprint(shape, models).items() if name in allowed}
+    if not projected:
+        raise ValueError(f"allowed must name one of {REPRESENTATIONS}")
+    for name in allowed:
+        if projected.get(name, budget_bytes + 1) <= budget_bytes:
+            return name
+    raise MemoryBudgetExceeded(budget_bytes, projected, shape)
+
+def run_within_budget(
+    lines: Sequence[str],
+    budget_bytes: int,
+    allowed: Sequence[str] = REPRESENTATIONS,
+    models: Optional[Dict[str, FootprintModel]] = None
+) -> List[str]:
+    """
+    run_scriptpulse in the first representation that fits the budget
+    (projected with `models`, FOOTPRINT_MODELS by default).
+    All representations give the same messages.
+    """
+    name = choose_representation(input_shape(lines), budget_bytes, allowed, models)
+    if name == "stream":
+        from scriptpulse.stream import run_scriptpulse_streaming
+
+        return run_scriptpulse_streaming(lines, batch_scenes=STREAM_BATCH_SCENES)
+    from run_scriptpulse import run_scriptpulse
+
+    return run_scriptpulse(lines, compact=(name == "compact"))
+
+_SIZE = re.compile(r"(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?", re.IGNORECASE)
+
+def parse_size(text: str) -> int:
+    """
+    Bytes in "512M", "1.5G", "64KiB" or "1000000" (binary multiples).
+    """
+    m = _SIZE.fullmatch(text.strip())
+    if m is None:
+        raise ValueError(f"Invalid size: {text!r}")
+    return int(float(m.group(1)) * 1024 ** " kmgt".index(m.group(2).lower() or " "))
+
+# Profiling
+
+@dataclass
+class StageMemory:
+    stage: str
+    peak_bytes: int
+    # Still allocated when the stage returned (its output and anything cached)
+    retained_bytes: int
+    retained_objects: int
+    # (file:line, bytes, objects) of the largest retained allocations
+    top: List[Tuple[str, int, int]] = field(default_factory=list)
+
+@dataclass
+class SceneMemory:
+    scene_index: int
+    lines: int
+    blocks: int
+    # Distinct objects held by the segmented scene (shared strings once)
+    objects: int
+    bytes: int
+
+@dataclass
+class MemoryReport:
+    stages: List[StageMemory]
+    scenes: List[SceneMemory]
+    peak_bytes: int
+    projected: Dict[str, int]
+
+    def format(self, top_scenes: int = 10) -> str:
+        kib = 1024
+        out = [f"{'stage':<16}{'peak KiB':>12}{'retained KiB':>14}{'objects':>10}  largest retained allocation"]
+        for s in self.stages:
+            site = f"{s.top[0][0]} ({s.top[0][1] / kib:.0f} KiB)" if s.top else ""
+            out.append(f"{s.stage:<16}{s.peak_bytes / kib:>12.0f}{s.retained_bytes / kib:>14.0f}{s.retained_objects:>10}  {site}")
+        out.append(f"peak {self.peak_bytes / kib:.0f} KiB; projected " + ", ".join(
+            f"{name} {size / kib:.0f} KiB" for name, size in self.projected.items()))
+        if self.scenes:
+            out.append("")
+            out.append(f"{'scene':>8}{'lines':>9}{'blocks':>8}{'objects':>10}{'KiB':>10}")
+            for s in sorted(self.scenes, key=lambda s: s.bytes, reverse=True)[:top_scenes]:
+                out.append(f"{s.scene_index:>8}{s.lines:>9}{s.blocks:>8}{s.objects:>10}{s.bytes / kib:>10.1f}")
+        return "\n".join(out)
+
+class MemoryProfiler(StageObserver):
+    """
+    Observer that snapshots tracemalloc around every stage (slow; for
+    diagnosis only) and keeps one StageMemory per stage call.
+    """
+    trace_memory = True
+
+    def __init__(self, top: int = 5, reset_peak: bool = False):
+        self.top = top
+        # Exact per-stage peaks (see StageObserver)
+        self.reset_peak = reset_peak
+        self.stages: List[StageMemory] = []
+        # Whole-run peak over the traced memory when the profiler was created
+        self.peak_bytes = 0
+        self._base = self._traced()
+        self._live = 0
+        self._before = None
+
+    @staticmethod
+    def _traced() -> int:
+        return tracemalloc.get_traced_memory()[0]
+
+    def stage_start(self, stage: str, input_sizes: Dict[str, int]) -> None:
+        # Measured before the snapshot, which the stage figures leave out
+        self._live = self._traced() - self._base
+        self._before = tracemalloc.take_snapshot()
+
+    def stage_end(self, record: StageRecord) -> None:
+        after = tracemalloc.take_snapshot()
+        # Leave out the profiler's own snapshots
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        diff = after.filter_traces(ignore).compare_to(self._before.filter_traces(ignore), "lineno")
+        self._before = None
+        self.peak_bytes = max(self.peak_bytes, self._live + (record.alloc_peak_bytes or 0))
+        top = sorted(diff, key=lambda d: d.size_diff, reverse=True)[:self.top]
+        self.stages.append(StageMemory(
+            stage=record.stage,
+            peak_bytes=record.alloc_peak_bytes or 0,
+            retained_bytes=record.alloc_delta_bytes or 0,
+            retained_objects=sum(d.count_diff for d in diff),
+            top=[(f"{d.traceback[0].filename}:{d.traceback[0].lineno}", d.size_diff, d.count_diff)
+                 for d in top if d.size_diff > 0]
+        ))
+
+def scene_memory(scene) -> SceneMemory:
+    """
+    Objects and bytes (sys.getsizeof, each object once) held by one
+    SceneSegment: its lists, line and sentence strings and token counts.
+    """
+    seen = set()
+    size = 0
+
+    def add(obj) -> None:
+        nonlocal size
+        if obj is not None and id(obj) not in seen:
+            seen.add(id(obj))
+            size += sys.getsizeof(obj)
+
+    for obj in (scene, scene.header, scene.raw_lines, scene.blocks):
+        add(obj)
+    counts = scene._token_counts
+    if counts is not None:
+        for obj in (counts, counts.line_words, counts.sentence_words, counts.lines, counts.sentences):
+            add(obj)
+    for line in scene.raw_lines:
+        add(line)
+    for block in scene.blocks:
+        for obj in (block, block.lines, block.sentences, block.speaker):
+            add(obj)
+        for text in block.lines:
+            add(text)
+        for text in block.sentences:
+            add(text)
+    return SceneMemory(
+        scene_index=scene.scene_index,
+        lines=len(scene.raw_lines),
+        blocks=len(scene.blocks),
+        objects=len(seen),
+        bytes=size
+    )
+
+def _warm_up(lines: List[str]) -> None:
+    # Imports engine modules (numpy included) and fills caches so that
+    # loading them is not measured as pipeline memory
+    from run_scriptpulse import run_scriptpulse
+
+    try:
+        run_scriptpulse(lines[:50])
+    except ValueError:
+        pass
+
+def profile_memory(lines: List[str], top: int = 5, **options) -> MemoryReport:
+    """
+    Runs run_scriptpulse_detailed (options such as compact=True are passed
+    on) under tracemalloc and returns per-stage and per-scene accounting.
+    Per-scene figures are only available for per-scene lists.
+    """
+    from run_scriptpulse import run_scriptpulse_detailed
+    from scriptpulse.engine.segment import SceneSegment
+
+    _warm_up(lines)
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        # Tracing started here has no other reader, so stages may reset its peak
+        profiler = MemoryProfiler(top, reset_peak=started)
+        result = run_scriptpulse_detailed(lines, observer=profiler, **options)
+    finally:
+        if started:
+            tracemalloc.stop()
+
+    scenes = []
+    if isinstance(result.scenes, list) and result.scenes and isinstance(result.scenes[0], SceneSegment):
+        scenes = [scene_memory(scene) for scene in result.scenes]
+    return MemoryReport(
+        stages=profiler.stages,
+        scenes=scenes,
+        peak_bytes=profiler.peak_bytes,
+        projected=project_footprint(input_shape(lines))
+    )
+
+def _measured_peaks(lines: List[str]) -> Dict[str, int]:
+    # tracemalloc peak of one run per representation
+    import gc
+    from run_scriptpulse import run_scriptpulse_detailed
+    from scriptpulse.stream import run_scriptpulse_streaming
+
+    runs = {
+        "segments": lambda: run_scriptpulse_detailed(lines),
+        "compact": lambda: run_scriptpulse_detailed(lines, compact=True),
+        "stream": lambda: run_scriptpulse_streaming(lines, batch_scenes=STREAM_BATCH_SCENES)
+    }
+    peaks = {}
+    for name, run in runs.items():
+        gc.collect()
+        tracemalloc.start()
+        try:
+            base = tracemalloc.get_traced_memory()[0]
+            run()
+            peaks[name] = tracemalloc.get_traced_memory()[1] - base
+        finally:
+            tracemalloc.stop()
+    return peaks
+
+def long_scene(seed: int, lines: int, max_words: int) -> List[str]:
+    """
+    One scene of `lines` distinct action lines of 1..3 sentences of
+    1..max_words words each.
+    """
+    from scriptpulse.corpus import generate_script
+
+    out = ["INT. WAREHOUSE - NIGHT"]
+    while len(out) <= lines:
+        out += [
+            line for line in generate_script(seed, scenes=lines // 10, dialogue_rate=0.0, blank_rate=0.0, max_action_words=max_words)
+            if not line.startswith(_HEADER_PREFIXES)
+        ]
+        seed += 1
+    return out[:lines + 1]
+
+# (lines, max_words) of the single-scene calibration inputs
+LONG_SCENES = ((50000, 10), (50000, 30), (100000, 20), (200000, 15))
+
+def calibration_scripts(seed: int = 0, scale: float = 1.0) -> List[List[str]]:
+    """
+    Generated inputs of different shapes for calibrate_footprint: default,
+    action-heavy, dialogue-heavy and long-line scripts at two sizes, and
+    single scenes of 50k-200k action lines (LONG_SCENES). scale shrinks
+    every size (e.g. 0.05 for a calibration that takes seconds).
+    """
+    from scriptpulse.corpus import generate_script
+
+    shapes = [{}, {"dialogue_rate": 0.1}, {"dialogue_rate": 0.7}, {"max_action_words": 60, "max_dialogue_words": 60}]
+    scripts = [
+        generate_script(seed + k, scenes=max(1, int(n * scale)), **opt)
+        for k, opt in enumerate(shapes) for n in (500, 4000)
+    ]
+    scripts += [long_scene(seed + k, max(1, int(n * scale)), words) for k, (n, words) in enumerate(LONG_SCENES)]
+    return scripts
+
+def _nonnegative_lstsq(X, y):
+    # Least squares with coefficients >= 0: refits without the most negative
+    # term until none is left negative
+    import numpy as np
+
+    active = list(range(X.shape[1]))
+    while True:
+        coef = np.zeros(X.shape[1])
+        coef[active] = np.linalg.lstsq(X[:, active], y, rcond=None)[0]
+        negative = [j for j in active if coef[j] < 0]
+        if not negative:
+            return coef
+        active.remove(min(negative, key=lambda j: coef[j]))
+
+def calibrate_footprint(scripts: Optional[List[List[str]]] = None) -> Tuple[Dict[str, FootprintModel], List[dict]]:
+    """
+    Measures tracemalloc peaks of every representation on `scripts` and fits
+    FootprintModels (nonnegative least squares on lines, characters, the
+    largest scene's lines and characters and a fixed term, scaled up to an
+    upper envelope of the measurements and then by SAFETY_MARGIN). Returns
+    (models, measurements).
+    """
+    import numpy as np
+
+    if scripts is None:
+        scripts = calibration_scripts()
+    _warm_up(scripts[0])
+    rows = []
+    for lines in scripts:
+        shape = input_shape(lines)
+        rows.append({"shape": shape, "peaks": _measured_peaks(lines)})
+
+    models = {}
+    for name in REPRESENTATIONS:
+        current = FOOTPRINT_MODELS[name]
+        X = np.array([
+            [r["shape"].window_lines, r["shape"].window_chars] if name == "stream" else [r["shape"].lines, r["shape"].chars]
+            for r in rows
+        ], dtype=np.float64)
+        X = np.hstack([X, [[r["shape"].max_scene_lines, r["shape"].max_scene_chars, 1.0] for r in rows]])
+        peaks = np.array([r["peaks"][name] for r in rows], dtype=np.float64)
+        scene_bytes = current.per_scene * np.array([r["shape"].scenes for r in rows], dtype=np.float64)
+        coef = _nonnegative_lstsq(X, peaks - scene_bytes)
+        scale = max(1.0, float(np.max((peaks - scene_bytes) / np.maximum(X @ coef, 1.0)))) * SAFETY_MARGIN
+        models[name] = FootprintModel(
+            per_line=float(coef[0] * scale),
+            per_char=float(coef[1] * scale),
+            per_scene_line=float(coef[2] * scale),
+            per_scene_char=float(coef[3] * scale),
+            per_scene=current.per_scene,
+            fixed=float(coef[4] * scale)
+        )
+    return models, rows
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Memory accounting and budgets for ScriptPulse.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    profile_p = sub.add_parser("profile", help="per-stage and per-scene memory of one run")
+    profile_p.add_argument("script")
+    profile_p.add_argument("--top", type=int, default=10, help="heaviest scenes to list")
+    profile_p.add_argument("--compact", action="store_true", help="profile the compact segmentation")
+    project_p = sub.add_parser("project", help="projected footprint per representation")
+    project_p.add_argument("script")
+    project_p.add_argument("--budget", help="e.g. 512M; prints the representation that would run")
+    project_p.add_argument("--models", help="footprint models saved by calibrate -o (default: FOOTPRINT_MODELS)")
+    calibrate_p = sub.add_parser("calibrate", help="measure peaks on generated scripts and fit the footprint model")
+    calibrate_p.add_argument("--scale", type=float, default=1.0, help="shrink the calibration inputs (e.g. 0.05: seconds)")
+    calibrate_p.add_argument("-o", "--output", help="save the fitted models as JSON")
+    args = parser.parse_args(argv)
+
+    from scriptpulse.batch import read_script_lines
+
+    if args.command == "profile":
+        report = profile_memory(read_script_lines(args.script), compact=args.compact)
+        print(report.format(args.top))
+    elif args.command == "project":
+        shape = input_shape(read_script_lines(args.script))
+        models = load_footprint_models(args.models) if args.models else None
+        for name, size in project_footprint(shape, models).items():
+            print(f"{name:<10}{size / 2 ** 20:>10.1f} MiB")
+        if args.budget:
+            try:
+                print(f"within {args.budget}: {choose_representation(shape, parse_size(args.budget), models=models)}")
+            except MemoryBudgetExceeded as e:
+                print(f"over budget: {e}")
+                return 1
+    else:
+        models, rows = calibrate_footprint(calibration_scripts(scale=args.scale))
+        for r in rows:
+            projected = project_footprint(r["shape"], models)
+            print(f"{r['shape'].lines:>8} lines " + "  ".join(
+                f"{name} {r['peaks'][name] / 2 ** 20:.1f}/{projected[name] / 2 ** 20:.1f} MiB" for name in REPRESENTATIONS))
+        for name, m in models.items():
+            print(f'"{name}": FootprintModel(per_line={m.per_line:.1f}, per_char={m.per_char:.2f}, '
+                  f'per_scene_line={m.per_scene_line:.1f}, per_scene_char={m.per_scene_char:.2f}, per_scene={m.per_scene}, fixed={m.fixed:.0f}),')
+        if args.output:
+            save_footprint_models(models, args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Bytes-level script reader for very large inputs.
+
+ScriptLines is a read-only sequence of lines over a UTF-8 buffer, usually a
+memory-mapped file. Line boundaries are found by scanning the bytes; a line
+is decoded only when it is accessed. The index costs 5 bytes per line (9 for
+files over 4 GiB), so peak memory stays close to the file size. Lines are
+split exactly as bytes.decode("utf-8").splitlines() would split them.
+
+    with open_script("corpus_dump.txt") as lines:
+        messages = run_scriptpulse_streaming(lines)
+
+ScriptLines can be passed anywhere a list of lines is accepted.
+"""
+import mmap
+from typing import Iterator, List, Optional, Union, overload
+
+# Bytes that end a line in str.splitlines(), excluding the multi-byte
+# UTF-8 encodings of U+0085, U+2028 and U+2029 (handled separately)
+_LINE_BREAK_BYTES = (0x0A, 0x0B, 0x0C, 0x0D, 0x1C, 0x1D, 0x1E)
+
+SCAN_CHUNK_BYTES = 1 << 22
+
+class ScriptLines:
+    """
+    Lazily decoded lines of a UTF-8 buffer (bytes, memoryview or mmap).
+    Invalid UTF-8 raises UnicodeDecodeError when the affected line is read.
+    """
+
+    def __init__(self, buffer, encoding: str = "utf-8"):
+        self._buffer = buffer
+        self._encoding = encoding
+        self._mmap: Optional[mmap.mmap] = buffer if isinstance(buffer, mmap.mmap) else None
+        self._starts = None   # line start offsets, plus a sentinel at the end
+        self._sep_len = None  # length of each line's terminator (0 for the last line)
+
+    def _index(self):
+        if self._starts is None:
+            self._starts, self._sep_len = _scan_line_boundaries(self._buffer)
+        return self._starts, self._sep_len
+
+    def __len__(self) -> int:
+        return len(self._index()[1])
+
+    @overload
+    def __getitem__(self, i: int) -> str: ...
+    @overload
+    def __getitem__(self, i: slice) -> List[str]: ...
+
+    def __getitem__(self, i: Union[int, slice]):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("line index out of range")
+        starts, sep_len = self._index()
+        start = int(starts[i])
+        end = int(starts[i + 1]) - int(sep_len[i])
+        return bytes(self._buffer[start:end]).decode(self._encoding)
+
+    def __iter__(self) -> Iterator[str]:
+        starts, sep_len = self._index()
+        buffer = self._buffer
+        encoding = self._encoding
+        # Convert offsets to Python ints a chunk at a time
+        step = 65536
+        for lo in range(0, len(sep_len), step):
+            chunk_starts = starts[lo:lo + step + 1].tolist()
+            chunk_ends = (starts[lo + 1:lo + step + 1] - sep_len[lo:lo + step]).tolist()
+            for start, end in zip(chunk_starts, chunk_ends):
+                yield bytes(buffer[start:end]).decode(encoding)
+
+    def close(self) -> None:
+        self._starts = None
+        self._sep_len = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self) -> "ScriptLines":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def open_script(path: str, encoding: str = "utf-8") -> ScriptLines:
+    """
+    Memory-maps a script file read-only. Close it (or use it as a context
+    manager) when done.
+    """
+    with open(path, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            buffer = b""
+    return ScriptLines(buffer, encoding=encoding)
+
+def _scan_line_boundaries(buffer):
+    """
+    Returns (starts, sep_len): starts[k] is the offset of line k and
+    starts[-1] the end of the buffer; sep_len[k] the terminator length of line k.
+    Scans in chunks so temporaries stay bounded regardless of file size.
+    """
+    import numpy as np
+
+    data = np.frombuffer(buffer, dtype=np.uint8) if len(buffer) else np.zeros(0, dtype=np.uint8)
+    n = len(data)
+    offset_dtype = np.uint32 if n < (1 << 32) else np.int64
+    is_break = np.zeros(256, dtype=bool)
+    is_break[list(_LINE_BREAK_BYTES)] = True
+
+    sep_ends = []
+    sep_lens = []
+    for lo in range(0, n, SCAN_CHUNK_BYTES):
+        hi = min(lo + SCAN_CHUNK_BYTES, n)
+        # Two bytes of lookahead for CRLF and the multi-byte separators
+        window = data[lo:min(hi + 2, n)]
+        head = window[:hi - lo]
+
+        positions = np.flatnonzero(is_break[head])
+        values = head[positions]
+        nxt = np.full(len(positions), -1, dtype=np.int16)
+        has_next = positions + 1 < len(window)
+        nxt[has_next] = window[positions[has_next] + 1]
+        prev_is_cr = np.zeros(len(positions), dtype=bool)
+        inner = positions > 0
+        prev_is_cr[inner] = head[positions[inner] - 1] == 0x0D
+        if lo > 0 and len(positions) and positions[0] == 0:
+            prev_is_cr[0] = data[lo - 1] == 0x0D
+        # LF of a CRLF pair belongs to the CR's terminator
+        keep = ~((values == 0x0A) & prev_is_cr)
+        positions = positions[keep]
+        widths = np.where((values[keep] == 0x0D) & (nxt[keep] == 0x0A), 2, 1)
+
+        # U+0085 (C2 85), U+2028 / U+2029 (E2 80 A8 / A9)
+        c2 = np.flatnonzero(head == 0xC2)
+        c2 = c2[(c2 + 1 < len(window))]
+        c2 = c2[window[c2 + 1] == 0x85]
+        e2 = np.flatnonzero(head == 0xE2)
+        e2 = e2[(e2 + 2 < len(window))]
+        e2 = e2[(window[e2 + 1] == 0x80) & ((window[e2 + 2] == 0xA8) | (window[e2 + 2] == 0xA9))]
+
+        starts = np.concatenate([positions, c2, e2]) + lo
+        ends = starts + np.concatenate([widths, np.full(len(c2), 2), np.full(len(e2), 3)])
+        order = np.argsort(starts, kind="stable")
+        # Keep only the compact form between chunks
+        sep_ends.append(ends[order].astype(offset_dtype))
+        sep_lens.append((ends - starts)[order].astype(np.uint8))
+
+    sep_end = np.concatenate(sep_ends) if sep_ends else np.zeros(0, dtype=offset_dtype)
+    n_seps = len(sep_end)
+
+    # A trailing terminator does not open another line
+    has_tail = n > 0 and (n_seps == 0 or sep_end[-1] < n)
+    n_lines = n_seps + (1 if has_tail else 0)
+
+    starts = np.empty(n_lines + 1, dtype=offset_dtype)
+    starts[0] = 0
+    starts[1:n_seps + 1] = sep_end
+    starts[-1] = n
+    del sep_end
+    sep_len = np.zeros(n_lines, dtype=np.uint8)
+    if n_seps:
+        sep_len[:n_seps] = np.concatenate(sep_lens)
+    return starts, sep_len
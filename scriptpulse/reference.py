@@ -0,0 +1,127 @@
+"""
+Corpus reference statistics for normalization.
+
+Builds NormalizationStats (scriptpulse.engine.normalize) over a corpus as a
+map-reduce: each worker reduces its chunk of scripts to one partial
+aggregate, and the partials are merged in the parent. Merging is exact and
+order-independent, so the result does not depend on the worker count.
+
+    python -m scriptpulse.reference build scripts/ --workers 8 --quantiles -o reference.json
+    python -m scriptpulse.reference merge a.json b.json -o reference.json
+    python -m scriptpulse.reference show reference.json
+
+Score against it with
+run_scriptpulse(lines, reference=NormalizationStats.load(path).reference()).
+"""
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Iterable, List, Optional, Tuple
+
+from scriptpulse.batch import _warm_up, discover_scripts, read_script_lines
+
+def script_statistics(path: str, quantiles: bool = False, relative_accuracy: float = 0.01):
+    """
+    NormalizationStats of one script (the map step).
+    Raises like the engine for unreadable or invalid scripts.
+    """
+    from scriptpulse.engine.validator import validate_script
+    from scriptpulse.engine.preprocess import preprocess_lines
+    from scriptpulse.engine.segment import segment_scenes
+    from scriptpulse.engine.features import extract_scene_feature_arrays
+    from scriptpulse.engine.normalize import NormalizationStats, normalization_inputs
+
+    lines = read_script_lines(path)
+    validate_script(lines)
+    features = extract_scene_feature_arrays(segment_scenes(preprocess_lines(lines)))
+    return NormalizationStats.from_inputs(normalization_inputs(features), quantiles, relative_accuracy)
+
+def _chunk_statistics(paths: List[str], quantiles: bool, relative_accuracy: float):
+    # Partial aggregate of one chunk, plus the paths that failed
+    from scriptpulse.engine.normalize import NormalizationStats
+
+    stats = NormalizationStats.empty(quantiles, relative_accuracy)
+    failed = []
+    for path in paths:
+        try:
+            stats = stats.merge(script_statistics(path, quantiles, relative_accuracy))
+        except (OSError, UnicodeDecodeError, ValueError):
+            failed.append(path)
+    return stats, failed
+
+def build_reference(
+    paths: Iterable[str],
+    workers: Optional[int] = None,
+    chunk_size: int = 16,
+    quantiles: bool = False,
+    relative_accuracy: float = 0.01
+) -> Tuple[object, List[str]]:
+    """
+    Returns (NormalizationStats over all valid scripts, failed paths).
+    workers=1 runs in-process without a pool.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1")
+    paths = list(paths)
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    reduce_chunk = partial(_chunk_statistics, quantiles=quantiles, relative_accuracy=relative_accuracy)
+
+    total, failed = reduce_chunk([])
+    if workers == 1:
+        for stats, chunk_failed in map(reduce_chunk, chunks):
+            total = total.merge(stats)
+            failed += chunk_failed
+        return total, failed
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_up) as pool:
+        for stats, chunk_failed in pool.map(reduce_chunk, chunks):
+            total = total.merge(stats)
+            failed += chunk_failed
+    return total, failed
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build, merge or inspect corpus normalization statistics.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_p = sub.add_parser("build", help="statistics over script files or directories")
+    build_p.add_argument("inputs", nargs="+")
+    build_p.add_argument("-o", "--output", required=True)
+    build_p.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count; 1 = in-process)")
+    build_p.add_argument("--chunk-size", type=int, default=16, help="scripts per partial aggregate")
+    build_p.add_argument("--quantiles", action="store_true", help="also keep mergeable quantile sketches")
+    build_p.add_argument("--relative-accuracy", type=float, default=0.01)
+    merge_p = sub.add_parser("merge", help="merge statistics files (e.g. from separate corpora)")
+    merge_p.add_argument("inputs", nargs="+")
+    merge_p.add_argument("-o", "--output", required=True)
+    show_p = sub.add_parser("show", help="print per-column bounds")
+    show_p.add_argument("path")
+    show_p.add_argument("--lower", type=float, default=0.0, help="lower quantile (needs --quantiles stats)")
+    show_p.add_argument("--upper", type=float, default=1.0, help="upper quantile (needs --quantiles stats)")
+    args = parser.parse_args(argv)
+
+    from scriptpulse.engine.effort import EFFORT_FEATURE_KEYS
+    from scriptpulse.engine.normalize import NormalizationStats
+
+    if args.command == "build":
+        stats, failed = build_reference(
+            discover_scripts(args.inputs), args.workers, args.chunk_size,
+            quantiles=args.quantiles, relative_accuracy=args.relative_accuracy
+        )
+        stats.save(args.output)
+        print(f"{stats.scripts} scripts, {stats.count} scenes, {len(failed)} failed", file=sys.stderr)
+    elif args.command == "merge":
+        stats = NormalizationStats.load(args.inputs[0])
+        for path in args.inputs[1:]:
+            stats = stats.merge(NormalizationStats.load(path))
+        stats.save(args.output)
+        print(f"{stats.scripts} scripts, {stats.count} scenes", file=sys.stderr)
+    else:
+        stats = NormalizationStats.load(args.path)
+        reference = stats.reference(args.lower, args.upper)
+        print(f"{stats.scripts} scripts, {stats.count} scenes")
+        for key, lo, hi in zip(EFFORT_FEATURE_KEYS, reference.lower, reference.upper):
+            print(f"{key:<22}{lo:>14.4f}{hi:>14.4f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,473 @@
+"""
+Local HTTP analysis service.
+
+A small asyncio HTTP/1.1 server (standard library only) in front of a warm
+process pool. Requests are queued; a batcher hands whatever is waiting to
+the next free worker as one batch, so many small concurrent requests share
+one round trip to the pool.
+
+    python -m scriptpulse.service --port 8765 --workers 4
+
+    POST /analyze   text/plain            one script -> one JSON result
+                    application/x-ndjson  one {"id", "text" | "lines"} object
+                                          per line -> one result per line
+    GET  /healthz   status, queue depth and counters
+
+A result is ScriptPulseResult.to_dict() (per-scene signals, alert indices,
+messages); a script the engine rejects gets {"error": {"stage", "type",
+"message"}} instead (HTTP 422 for a plain-text request). Any other failure
+while analysing one script (the cache, the engine running out of memory)
+gets the same entry with "internal": true (HTTP 500) and does not affect
+the other scripts in its batch. When the queue is full the request is
+rejected with 429 and Retry-After; bodies over the size limit get 413.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from scriptpulse.instrument import StageObserver, StageRecord
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    411: "Length Required", 413: "Payload Too Large", 422: "Unprocessable Entity",
+    429: "Too Many Requests", 431: "Request Header Fields Too Large",
+    500: "Internal Server Error", 503: "Service Unavailable"
+}
+
+@dataclass
+class ServiceConfig:
+    host: str = "127.0.0.1"
+    port: int = 8765
+    # Worker processes (None = CPU count); also the number of batches in flight
+    workers: Optional[int] = None
+    # Scripts waiting for a worker; beyond this requests get 429
+    max_queue: int = 256
+    # Limits per batch handed to one worker
+    batch_max_scripts: int = 32
+    batch_max_lines: int = 50_000
+    # Extra time the batcher may wait for more scripts to fill a batch
+    batch_wait_ms: float = 0.0
+    max_body_bytes: int = 8 << 20
+    max_scripts_per_request: int = 256
+    max_header_bytes: int = 16 << 10
+    # Idle keep-alive connections are closed after this many seconds
+    idle_timeout_s: float = 30.0
+    # Persistent result cache (scriptpulse.cache) shared by the workers
+    cache_path: Optional[str] = None
+    cache_max_bytes: int = 1 << 30
+
+class _FailedStage(StageObserver):
+    # Remembers the stage that raised, if any
+    stage: Optional[str] = None
+
+    def stage_end(self, record: StageRecord) -> None:
+        if record.error is not None:
+            self.stage = record.stage
+
+# Per worker process: the cache opened by analyze_batch
+_worker_cache = None
+
+def analyze_batch(scripts: List[List[str]], cache_path: Optional[str] = None, cache_max_bytes: int = 1 << 30) -> List[dict]:
+    """
+    Worker entry point: runs the engine on each script. Errors become
+    {"error": {...}} entries (unexpected ones marked "internal"); the batch
+    itself never fails for one script. With cache_path, results go through
+    the persistent cache.
+    """
+    from run_scriptpulse import run_scriptpulse_detailed
+
+    global _worker_cache
+    if cache_path is not None and _worker_cache is None:
+        from scriptpulse.cache import PersistentResultCache
+
+        _worker_cache = PersistentResultCache(cache_path, max_bytes=cache_max_bytes)
+
+    out = []
+    for lines in scripts:
+        observer = _FailedStage()
+        try:
+            if _worker_cache is not None:
+                compute = lambda lines: run_scriptpulse_detailed(lines, compact=True, observer=observer)
+                result = _worker_cache.get_or_compute(lines, compute=compute)
+            else:
+                result = run_scriptpulse_detailed(lines, observer=observer)
+            out.append(result.to_dict())
+        except ValueError as e:
+            out.append({"error": {"stage": observer.stage or "validation", "type": type(e).__name__, "message": str(e)}})
+        except Exception as e:
+            # Outside any engine stage, the cache is the only other step
+            stage = observer.stage or ("cache" if _worker_cache is not None else "engine")
+            out.append({"error": {"stage": stage, "type": type(e).__name__, "message": str(e), "internal": True}})
+    return out
+
+def _ping() -> int:
+    return os.getpid()
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, close: bool = False):
+        super().__init__(message)
+        self.status = status
+        self.close = close
+
+class AnalysisService:
+    """
+    Queue, batcher and worker pool behind the HTTP handlers.
+    """
+
+    def __init__(self, config: ServiceConfig):
+        self.config = config
+        self.workers = config.workers or os.cpu_count() or 1
+        self.queue: Optional[asyncio.Queue] = None
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._batcher_task: Optional[asyncio.Task] = None
+        self._batch_tasks: set = set()
+        self.started = time.time()
+        self.counters = {
+            "requests": 0, "scripts": 0, "rejected": 0, "batches": 0,
+            "batched_scripts": 0, "in_flight_batches": 0, "pool_restarts": 0
+        }
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        from scriptpulse.batch import _warm_up
+
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up)
+
+    async def start(self) -> None:
+        self.queue = asyncio.Queue(maxsize=self.config.max_queue)
+        self._slots = asyncio.Semaphore(self.workers)
+        self.pool = self._new_pool()
+        # Start every worker (and import the engine there) before taking traffic
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self.pool, _ping) for _ in range(self.workers)])
+        self._batcher_task = asyncio.create_task(self._batcher())
+
+    async def stop(self) -> None:
+        if self._batcher_task is not None:
+            self._batcher_task.cancel()
+        for task in list(self._batch_tasks):
+            task.cancel()
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+
+    def submit(self, scripts: List[List[str]]) -> List[asyncio.Future]:
+        """
+        Queues scripts as one admission decision: all or none (429).
+        """
+        if self.queue.qsize() + len(scripts) > self.config.max_queue:
+            self.counters["rejected"] += 1
+            raise HTTPError(429, "analysis queue is full, retry later")
+        loop = asyncio.get_running_loop()
+        futures = []
+        for lines in scripts:
+            future = loop.create_future()
+            self.queue.put_nowait((lines, future))
+            futures.append(future)
+        self.counters["scripts"] += len(scripts)
+        return futures
+
+    async def _batcher(self) -> None:
+        config = self.config
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self.queue.get()
+            # Wait for a free worker first; whatever queues up meanwhile joins the batch
+            await self._slots.acquire()
+            # Spread the backlog over the free workers instead of filling one batch
+            free_workers = self.workers - self.counters["in_flight_batches"]
+            target = min(config.batch_max_scripts, -(-(self.queue.qsize() + 1) // max(1, free_workers)))
+            batch = [first]
+            n_lines = len(first[0])
+            deadline = loop.time() + config.batch_wait_ms / 1000
+            while len(batch) < target and n_lines < config.batch_max_lines:
+                if self.queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self.queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self.queue.get_nowait()
+                batch.append(item)
+                n_lines += len(item[0])
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[List[str], asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        self.counters["batches"] += 1
+        self.counters["batched_scripts"] += len(batch)
+        self.counters["in_flight_batches"] += 1
+        pool = self.pool
+        try:
+            results = await loop.run_in_executor(
+                pool, analyze_batch, [lines for lines, _ in batch], self.config.cache_path, self.config.cache_max_bytes
+            )
+        except BrokenProcessPool as e:
+            # A worker died; fail this batch and replace the pool (once)
+            if self.pool is pool:
+                self.counters["pool_restarts"] += 1
+                self.pool = self._new_pool()
+                pool.shutdown(wait=False, cancel_futures=True)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.counters["in_flight_batches"] -= 1
+            self._slots.release()
+        for (_, future), result in zip(batch, results):
+            # The client may have gone away
+            if not future.done():
+                future.set_result(result)
+
+    async def health(self) -> dict:
+        from scriptpulse import __version__
+
+        batches = self.counters["batches"]
+        health = {
+            "status": "ok",
+            "version": __version__,
+            "workers": self.workers,
+            "queued": self.queue.qsize(),
+            "max_queue": self.config.max_queue,
+            "uptime_s": round(time.time() - self.started, 3),
+            "mean_batch_size": self.counters["batched_scripts"] / batches if batches else 0.0,
+            **self.counters
+        }
+        if self.config.cache_path is not None:
+            # SQLite blocks; keep it off the event loop
+            loop = asyncio.get_running_loop()
+            health["cache"] = await loop.run_in_executor(None, self._cache_stats)
+        return health
+
+    def _cache_stats(self) -> dict:
+        from scriptpulse.cache import PersistentResultCache
+
+        with PersistentResultCache(self.config.cache_path, max_bytes=self.config.cache_max_bytes) as cache:
+            return cache.stats()
+
+    # HTTP
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.config.idle_timeout_s)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 431, {"error": "request header too large"}, close=True)
+                    return
+                try:
+                    status, body, content_type, keep_alive = await self._handle_request(head, reader)
+                except HTTPError as e:
+                    status, body, content_type = e.status, _json_body({"error": str(e)}), "application/json"
+                    keep_alive = keep_alive and not e.close
+                except asyncio.IncompleteReadError:
+                    return
+                except Exception as e:
+                    # Answer instead of resetting the connection
+                    status, body, content_type = 500, _json_body({"error": f"internal error: {type(e).__name__}"}), "application/json"
+                    keep_alive = False
+                await self._respond_raw(writer, status, body, content_type, close=not keep_alive)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, head: bytes, reader: asyncio.StreamReader) -> Tuple[int, bytes, str, bool]:
+        try:
+            request_line, *header_lines = head[:-4].decode("latin-1").split("\r\n")
+            method, target, version = request_line.split(" ")
+        except ValueError:
+            raise HTTPError(400, "malformed request line", close=True)
+        headers = {}
+        for line in header_lines:
+            name, sep, value = line.partition(":")
+            if not sep:
+                raise HTTPError(400, "malformed header", close=True)
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        path = target.split("?", 1)[0]
+
+        if "transfer-encoding" in headers:
+            raise HTTPError(411, "chunked bodies are not supported; send Content-Length", close=True)
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(400, "invalid Content-Length", close=True)
+        if length < 0:
+            raise HTTPError(400, "invalid Content-Length", close=True)
+        if length > self.config.max_body_bytes:
+            # The body is not read, so the connection cannot be reused
+            raise HTTPError(413, f"body exceeds {self.config.max_body_bytes} bytes", close=True)
+        body = await reader.readexactly(length) if length else b""
+
+        self.counters["requests"] += 1
+        if path == "/healthz":
+            if method != "GET":
+                raise HTTPError(405, "use GET")
+            return 200, _json_body(await self.health()), "application/json", keep_alive
+        if path == "/analyze":
+            if method != "POST":
+                raise HTTPError(405, "use POST")
+            content_type = headers.get("content-type", "text/plain").split(";", 1)[0].strip().lower()
+            if content_type in NDJSON_TYPES:
+                status, payload = await self._analyze_ndjson(body)
+                return status, payload, "application/x-ndjson", keep_alive
+            status, payload = await self._analyze_text(body)
+            return status, payload, "application/json", keep_alive
+        raise HTTPError(404, f"no route for {path}")
+
+    async def _analyze_text(self, body: bytes) -> Tuple[int, bytes]:
+        try:
+            lines = body.decode("utf-8").splitlines()
+        except UnicodeDecodeError:
+            raise HTTPError(400, "body is not valid UTF-8")
+        (future,) = self.submit([lines])
+        result = await self._await_result(future)
+        if "error" in result:
+            return (500 if result["error"].get("internal") else 422), _json_body(result)
+        return 200, _json_body(result)
+
+    async def _analyze_ndjson(self, body: bytes) -> Tuple[int, bytes]:
+        ids = []
+        scripts = []
+        for n, raw in enumerate(body.split(b"\n"), 1):
+            if not raw.strip():
+                continue
+            try:
+                item = json.loads(raw)
+            except ValueError:
+                raise HTTPError(400, f"line {n}: invalid JSON")
+            if not isinstance(item, dict):
+                raise HTTPError(400, f"line {n}: expected an object")
+            if isinstance(item.get("text"), str):
+                lines = item["text"].splitlines()
+            elif isinstance(item.get("lines"), list) and all(isinstance(x, str) for x in item["lines"]):
+                lines = item["lines"]
+            else:
+                raise HTTPError(400, f"line {n}: expected \"text\" (string) or \"lines\" (list of strings)")
+            ids.append(item.get("id", len(ids)))
+            scripts.append(lines)
+        if len(scripts) > self.config.max_scripts_per_request:
+            raise HTTPError(413, f"more than {self.config.max_scripts_per_request} scripts in one request")
+
+        futures = self.submit(scripts)
+        results = [await self._await_result(f) for f in futures]
+        out = []
+        for script_id, result in zip(ids, results):
+            out.append(json.dumps({"id": script_id, **result}, ensure_ascii=False, sort_keys=True))
+        return 200, ("\n".join(out) + "\n").encode("utf-8") if out else b""
+
+    async def _await_result(self, future: asyncio.Future) -> dict:
+        try:
+            return await future
+        except BrokenProcessPool:
+            raise HTTPError(503, "worker process died, retry")
+        except Exception as e:
+            raise HTTPError(500, f"internal error: {type(e).__name__}: {e}")
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: dict, close: bool = False) -> None:
+        await self._respond_raw(writer, status, _json_body(payload), "application/json", close)
+
+    async def _respond_raw(self, writer: asyncio.StreamWriter, status: int, body: bytes, content_type: str, close: bool) -> None:
+        headers = [
+            f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}",
+            f"Content-Type: {content_type}; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'close' if close else 'keep-alive'}"
+        ]
+        if status == 429:
+            headers.append("Retry-After: 1")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+def _json_body(payload: dict) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")
+
+async def serve(config: ServiceConfig, ready: Optional[asyncio.Event] = None) -> None:
+    """
+    Runs the service until SIGINT/SIGTERM (or until cancelled).
+    """
+    service = AnalysisService(config)
+    await service.start()
+    server = await asyncio.start_server(
+        service.handle_connection, config.host, config.port, limit=config.max_header_bytes
+    )
+    port = server.sockets[0].getsockname()[1]
+    print(f"scriptpulse service on http://{config.host}:{port} ({service.workers} workers)", file=sys.stderr, flush=True)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+    if ready is not None:
+        ready.set()
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        await service.stop()
+
+def main(argv=None) -> int:
+    defaults = ServiceConfig()
+    parser = argparse.ArgumentParser(description="Serve ScriptPulse analyses over local HTTP.")
+    parser.add_argument("--host", default=defaults.host)
+    parser.add_argument("--port", type=int, default=defaults.port)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-queue", type=int, default=defaults.max_queue, help="queued scripts before 429")
+    parser.add_argument("--batch-max-scripts", type=int, default=defaults.batch_max_scripts)
+    parser.add_argument("--batch-max-lines", type=int, default=defaults.batch_max_lines)
+    parser.add_argument("--batch-wait-ms", type=float, default=defaults.batch_wait_ms)
+    parser.add_argument("--max-body-bytes", type=int, default=defaults.max_body_bytes)
+    parser.add_argument("--max-scripts-per-request", type=int, default=defaults.max_scripts_per_request)
+    parser.add_argument("--cache", help="persistent result cache file (scriptpulse.cache)")
+    parser.add_argument("--cache-max-bytes", type=int, default=defaults.cache_max_bytes)
+    args = parser.parse_args(argv)
+
+    if args.max_queue < 1 or args.batch_max_scripts < 1:
+        parser.error("--max-queue and --batch-max-scripts must be >= 1")
+    config = ServiceConfig(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        max_queue=args.max_queue,
+        batch_max_scripts=args.batch_max_scripts,
+        batch_max_lines=args.batch_max_lines,
+        batch_wait_ms=args.batch_wait_ms,
+        max_body_bytes=args.max_body_bytes,
+        max_scripts_per_request=args.max_scripts_per_request,
+        cache_path=args.cache,
+        cache_max_bytes=args.cache_max_bytes
+    )
+    asyncio.run(serve(config))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+Incremental re-analysis for editor integrations.
+
+An AnalysisSession keeps the validated, preprocessed and segmented script
+plus a per-scene feature cache keyed by a content hash of each scene's
+raw_lines. apply_edit() re-validates and re-segments only the region around
+the edit, re-extracts features only for scenes whose content changed, and
+then redoes the cheap global stages (normalization through output).
+Results are identical to a cold run_scriptpulse on the edited script.
+"""
+import bisect
+import hashlib
+import re
+from typing import Dict, List, Optional, Tuple
+
+from scriptpulse.engine.validator import validate_script, iter_validated_lines
+from scriptpulse.engine.preprocess import preprocess_lines
+from scriptpulse.engine.segment import SceneSegment, segment_scenes, iter_scene_segments
+
+# Same test as the validator's header rule (raw line, no case check)
+_validator_header_regex = re.compile(r'^(INT\.|EXT\.)')
+
+def scene_digest(scene: SceneSegment) -> bytes:
+    """
+    Content hash of a scene's raw_lines. Features depend on nothing else.
+    """
+    return hashlib.blake2b("\n".join(scene.raw_lines).encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+class AnalysisSession:
+    """
+    Holds one script and re-analyses it incrementally after edits.
+    """
+
+    def __init__(self, lines: List[str], cache_size: int = 8192):
+        lines = list(lines)
+        validate_script(lines)
+        clean_lines = preprocess_lines(lines)
+        scenes = segment_scenes(clean_lines)
+
+        self._lines = lines
+        self._clean = clean_lines
+        self._scenes = scenes
+        self._starts = self._scene_starts(scenes, 0, len(clean_lines) - sum(len(s.raw_lines) for s in scenes))
+        self._rows = self._extract(scenes)
+        self._digests = [scene_digest(s) for s in scenes]
+        self._cache_size = cache_size
+        self._cache: Dict[bytes, Tuple[tuple, tuple]] = dict(zip(self._digests, self._rows))
+
+        # Validator bookkeeping for script-level rules
+        self._nonblank = sum(1 for line in lines if line.strip())
+        self._first_header = self._find_header(lines, 0)
+
+        self.messages: List[str] = self._score()
+        self.scenes_reextracted = len(scenes)
+
+    @property
+    def lines(self) -> List[str]:
+        return self._lines
+
+    @property
+    def scenes(self) -> List[SceneSegment]:
+        return self._scenes
+
+    def apply_edit(self, line_range: Tuple[int, int], new_lines: List[str]) -> List[str]:
+        """
+        Replaces lines[start:end] with new_lines and returns the new messages.
+        Raises the same ValueError a cold run would; the session is left
+        unchanged in that case.
+        """
+        a, b = line_range
+        if not (0 <= a <= b <= len(self._lines)):
+            raise IndexError(f"Invalid line range: {line_range}")
+        new_lines = list(new_lines)
+        delta = len(new_lines) - (b - a)
+        lines = self._lines[:a] + new_lines + self._lines[b:]
+
+        # 1. Validation (only lines whose validator state can have changed)
+        first_header, nonblank = self._validate_region(lines, a, b, new_lines)
+
+        # 2. Preprocessing (edited lines only)
+        clean_lines = self._clean[:a] + preprocess_lines(new_lines) + self._clean[b:]
+
+        # 3. Segmentation from the scene holding line a-1 (a header removed at
+        # a merges into it) up to the first untouched header at or after b
+        k = bisect.bisect_right(self._starts, a - 1) - 1 if a > 0 else -1
+        lo_scene = max(k, 0)
+        region_start = self._starts[k] if k >= 0 else 0
+        hi_scene = bisect.bisect_left(self._starts, b)
+        region_end = (self._starts[hi_scene] if hi_scene < len(self._starts) else len(self._lines)) + delta
+
+        region = clean_lines[region_start:region_end]
+        new_scenes = list(iter_scene_segments(region))
+        if lo_scene + len(new_scenes) + (len(self._scenes) - hi_scene) == 0:
+            raise ValueError("No scenes detected")
+        preamble = len(region) - sum(len(s.raw_lines) for s in new_scenes)
+        new_starts = self._scene_starts(new_scenes, region_start, preamble)
+
+        # 4. Feature Extraction (changed scenes only)
+        new_digests = [scene_digest(s) for s in new_scenes]
+        misses = [i for i, d in enumerate(new_digests) if d not in self._cache]
+        extracted = self._extract([new_scenes[i] for i in misses]) if misses else []
+        for i, row in zip(misses, extracted):
+            self._cache[new_digests[i]] = row
+        new_rows = [self._cache[d] for d in new_digests]
+
+        # Commit
+        tail = self._scenes[hi_scene:]
+        for offset, scene in enumerate(new_scenes):
+            scene.scene_index = lo_scene + offset
+        if len(new_scenes) != hi_scene - lo_scene:
+            for offset, scene in enumerate(tail):
+                scene.scene_index = lo_scene + len(new_scenes) + offset
+
+        self._lines = lines
+        self._clean = clean_lines
+        self._scenes = self._scenes[:lo_scene] + new_scenes + tail
+        self._starts = self._starts[:lo_scene] + new_starts + [s + delta for s in self._starts[hi_scene:]]
+        self._rows = self._rows[:lo_scene] + new_rows + self._rows[hi_scene:]
+        self._digests = self._digests[:lo_scene] + new_digests + self._digests[hi_scene:]
+        self._first_header = first_header
+        self._nonblank = nonblank
+        if len(self._cache) > max(self._cache_size, len(self._digests)):
+            self._cache = dict(zip(self._digests, self._rows))
+
+        # 5.-11. Global stages
+        self.messages = self._score()
+        self.scenes_reextracted = len(misses)
+        return self.messages
+
+    def _validate_region(self, lines: List[str], a: int, b: int, new_lines: List[str]) -> Tuple[Optional[int], int]:
+        # Per-line rules depend only on the previous line and on whether any
+        # header precedes the line. Re-check the edited lines, the line after
+        # them, and every line whose "header seen" state flips.
+        delta = len(new_lines) - (b - a)
+        old_first = self._first_header
+        if old_first is not None and old_first < a:
+            first_header = old_first
+        else:
+            first_header = self._find_header(new_lines, 0)
+            if first_header is not None:
+                first_header += a
+            else:
+                tail_first = self._find_header(self._lines, b)
+                first_header = tail_first + delta if tail_first is not None else None
+
+        # Old position in new coordinates (a header inside [a, b) is gone)
+        shifted_old = old_first + delta if old_first is not None and old_first >= b else old_first
+
+        hi = a + len(new_lines) + 1
+        if first_header != shifted_old:
+            for pos in (shifted_old, first_header):
+                if pos is not None:
+                    hi = max(hi, pos + 1)
+            if shifted_old is None or first_header is None:
+                hi = len(lines)
+        hi = min(hi, len(lines))
+
+        prev = lines[a - 1] if a > 0 else None
+        after_speaker = prev is not None and not _validator_header_regex.match(prev) and prev.isupper()
+        seen_header = first_header is not None and first_header < a
+        for _ in iter_validated_lines(lines[a:hi], seen_header, after_speaker, script_rules=False):
+            pass
+
+        # Script-level rules
+        nonblank = (
+            self._nonblank
+            - sum(1 for line in self._lines[a:b] if line.strip())
+            + sum(1 for line in new_lines if line.strip())
+        )
+        if nonblank == 0:
+            raise ValueError("Empty script")
+        if first_header is None:
+            raise ValueError("No scene headers found")
+        return first_header, nonblank
+
+    @property
+    def features(self):
+        """
+        Raw per-scene features of the current script (SceneFeatureArrays).
+        """
+        from scriptpulse.engine.features import SceneFeatureArrays
+
+        return SceneFeatureArrays.from_rows([row for row, _ in self._rows])
+
+    @staticmethod
+    def _extract(scenes: List[SceneSegment]) -> List[Tuple[tuple, tuple]]:
+        # Per scene: (feature row in FEATURE_KEYS order, normalization inputs)
+        from scriptpulse.engine.features import extract_scene_feature_arrays
+        from scriptpulse.engine.normalize import normalization_inputs
+
+        features = extract_scene_feature_arrays(scenes)
+        return list(zip(features.to_rows(), map(tuple, normalization_inputs(features).tolist())))
+
+    def _score(self) -> List[str]:
+        import numpy as np
+        from run_scriptpulse import score_normalization_inputs
+
+        return score_normalization_inputs(np.array([raw for _, raw in self._rows], dtype=np.float64))
+
+    @staticmethod
+    def _scene_starts(scenes: List[SceneSegment], region_start: int, preamble: int) -> List[int]:
+        starts = []
+        pos = region_start + preamble
+        for scene in scenes:
+            starts.append(pos)
+            pos += len(scene.raw_lines)
+        return starts
+
+    @staticmethod
+    def _find_header(lines: List[str], start: int) -> Optional[int]:
+        for i in range(start, len(lines)):
+            if _validator_header_regex.match(lines[i]):
+                return i
+        return None
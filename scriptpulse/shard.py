@@ -0,0 +1,256 @@
+"""
+Intra-script parallelism for very large scripts.
+
+Splits one script at scene headers into shards. Each shard is validated,
+preprocessed, segmented and feature-extracted in a worker process; the
+per-scene feature arrays are joined in script order and scored once
+(normalization through output). Results, errors and scene numbering are
+identical to run_scriptpulse.
+
+    python -m scriptpulse.shard season_bible.txt --workers 8
+
+A shard starts at a line that begins with INT./EXT. and is fully uppercase.
+Both the validator and the segmenter reset all of their state on such a
+line, so every shard can be processed on its own. Files are split by byte
+offset and each worker reads only its own range.
+"""
+import argparse
+import mmap
+import os
+import re
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+# Below this many lines (bytes for files) per shard, sharding costs more than it saves
+MIN_SHARD_LINES = 20000
+MIN_SHARD_BYTES = 1 << 20
+
+_HEADER_PREFIXES = ("INT.", "EXT.")
+# A header at the start of any line but the first (a position after "\n"
+# always starts a line under str.splitlines)
+_FILE_HEADER = re.compile(rb"\n(?=INT\.|EXT\.)")
+
+def is_shard_boundary(line: str) -> bool:
+    """
+    True for a raw line that is a scene header to the validator and, after
+    preprocessing, to the segmenter.
+    """
+    return line.startswith(_HEADER_PREFIXES) and line.isupper()
+
+def plan_line_shards(lines: Sequence[str], shards: int, min_shard_lines: int = MIN_SHARD_LINES) -> List[int]:
+    """
+    First line of every shard: [0] plus up to shards - 1 boundaries near
+    equal line counts. The first shard always contains the first scene
+    header, so a script without one is a single shard.
+    """
+    n = len(lines)
+    shards = min(shards, n // max(min_shard_lines, 1))
+    if shards <= 1:
+        return [0]
+    first = next((i for i, line in enumerate(lines) if is_shard_boundary(line)), None)
+    if first is None:
+        return [0]
+    starts = [0]
+    for k in range(1, shards):
+        i = max(n * k // shards, starts[-1] + 1, first + 1)
+        while i < n and not is_shard_boundary(lines[i]):
+            i += 1
+        if i >= n:
+            break
+        starts.append(i)
+    return starts
+
+def _line_at(buffer, start: int) -> str:
+    # Raw line starting at byte `start`; "" when it is not valid UTF-8
+    end = buffer.find(b"\n", start)
+    raw = buffer[start:end if end >= 0 else len(buffer)]
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        return ""
+    return text.splitlines()[0] if text else ""
+
+def plan_file_shards(path: str, shards: int, min_shard_bytes: int = MIN_SHARD_BYTES) -> List[int]:
+    """
+    Byte offset of every shard of a UTF-8 script file, like plan_line_shards.
+    Only the lines near each target offset are decoded.
+    """
+    size = os.path.getsize(path)
+    shards = min(shards, size // max(min_shard_bytes, 1))
+    if shards <= 1:
+        return [0]
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        def next_boundary(pos: int) -> Optional[int]:
+            if pos == 0 and is_shard_boundary(_line_at(buffer, 0)):
+                return 0
+            for m in _FILE_HEADER.finditer(buffer, max(pos - 1, 0)):
+                if is_shard_boundary(_line_at(buffer, m.end())):
+                    return m.end()
+            return None
+
+        first = next_boundary(0)
+        if first is None:
+            return [0]
+        starts = [0]
+        for k in range(1, shards):
+            offset = next_boundary(max(size * k // shards, starts[-1] + 1, first + 1))
+            if offset is None:
+                break
+            starts.append(offset)
+    return starts
+
+def analyze_shard(lines: List[str], keep_scenes: bool = False) -> Tuple[Optional[Tuple[str, str]], object, object]:
+    """
+    Stages 1-4 on one shard. Returns (error, features, scenes): error is
+    (stage, message) for a ValueError, in which case features is None.
+    scenes are numbered from 0 and only returned with keep_scenes=True.
+    """
+    from scriptpulse.engine.validator import iter_validated_lines
+    from scriptpulse.engine.preprocess import preprocess_lines
+    from scriptpulse.engine.segment import segment_scenes
+    from scriptpulse.engine.features import extract_scene_feature_arrays
+
+    try:
+        # Script-level rules hold for the whole script once a header exists
+        for _ in iter_validated_lines(lines, script_rules=False):
+            pass
+    except ValueError as e:
+        return ("validation", str(e)), None, None
+    try:
+        scenes = segment_scenes(preprocess_lines(lines))
+    except ValueError as e:
+        return ("segmentation", str(e)), None, None
+    return None, extract_scene_feature_arrays(scenes), scenes if keep_scenes else None
+
+def _analyze_file_shard(path: str, start: int, end: int, keep_scenes: bool = False):
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return analyze_shard(data.decode("utf-8").splitlines(), keep_scenes)
+
+def _map_shards(fn, tasks: List[tuple], workers: Optional[int], executor: Optional[Executor]) -> list:
+    # Shard results in script order
+    if executor is not None:
+        return list(executor.map(fn, *zip(*tasks)))
+    if workers == 1:
+        return [fn(*task) for task in tasks]
+    from scriptpulse.batch import _warm_up
+
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(tasks)), initializer=_warm_up) as pool:
+        return list(pool.map(fn, *zip(*tasks)))
+
+def _stitch(results: list):
+    # Joins shard results and runs stages 5-11, raising the error the
+    # sequential path would raise (validation of the whole script comes first)
+    from run_scriptpulse import score_detailed
+    from scriptpulse.engine.features import SceneFeatureArrays
+
+    for stage in ("validation", "segmentation"):
+        for error, _, _ in results:
+            if error is not None and error[0] == stage:
+                raise ValueError(error[1])
+
+    scenes = None
+    if results[0][2] is not None:
+        scenes = []
+        for _, _, shard_scenes in results:
+            for scene in shard_scenes:
+                scene.scene_index = len(scenes)
+                scenes.append(scene)
+    features = SceneFeatureArrays.concatenate([features for _, features, _ in results])
+    return score_detailed(None, scenes=scenes, features=features)
+
+def run_scriptpulse_sharded_detailed(
+    lines: Sequence[str],
+    workers: Optional[int] = None,
+    shards: Optional[int] = None,
+    keep_scenes: bool = False,
+    min_shard_lines: int = MIN_SHARD_LINES,
+    executor: Optional[Executor] = None
+):
+    """
+    run_scriptpulse_detailed with stages 1-4 run per shard in parallel.
+    shards defaults to the worker count; workers=1 runs the shards in-process.
+    keep_scenes=True returns the SceneSegments too (renumbered in script
+    order); otherwise result.scenes is None. An executor, if given, is used
+    instead of a new process pool.
+    """
+    if shards is None:
+        shards = workers or os.cpu_count() or 1
+    starts = plan_line_shards(lines, shards, min_shard_lines)
+    if len(starts) == 1:
+        from run_scriptpulse import run_scriptpulse_detailed
+
+        result = run_scriptpulse_detailed(list(lines))
+        if not keep_scenes:
+            result.scenes = None
+        return result
+    bounds = starts + [len(lines)]
+    tasks = [(lines[a:b], keep_scenes) for a, b in zip(bounds, bounds[1:])]
+    return _stitch(_map_shards(analyze_shard, tasks, workers, executor))
+
+def run_scriptpulse_sharded(
+    lines: Sequence[str],
+    workers: Optional[int] = None,
+    shards: Optional[int] = None,
+    min_shard_lines: int = MIN_SHARD_LINES
+) -> List[str]:
+    """
+    Same messages as run_scriptpulse(lines), with stages 1-4 sharded over
+    worker processes.
+    """
+    return run_scriptpulse_sharded_detailed(lines, workers, shards, min_shard_lines=min_shard_lines).messages
+
+def run_file_sharded(
+    path: str,
+    workers: Optional[int] = None,
+    shards: Optional[int] = None,
+    min_shard_bytes: int = MIN_SHARD_BYTES,
+    executor: Optional[Executor] = None
+) -> List[str]:
+    """
+    Same messages as run_scriptpulse on a UTF-8 script file. Workers read
+    and decode only their own byte range, so no text crosses processes.
+    """
+    if shards is None:
+        shards = workers or os.cpu_count() or 1
+    starts = plan_file_shards(path, shards, min_shard_bytes)
+    if len(starts) == 1:
+        from run_scriptpulse import run_scriptpulse
+        from scriptpulse.batch import read_script_lines
+
+        return run_scriptpulse(read_script_lines(path))
+    bounds = starts + [os.path.getsize(path)]
+    tasks = [(path, a, b) for a, b in zip(bounds, bounds[1:])]
+    return _stitch(_map_shards(_analyze_file_shard, tasks, workers, executor)).messages
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Analyse one large script with stages 1-4 sharded over processes.")
+    parser.add_argument("script", help="UTF-8 script .txt file")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count; 1 = in-process)")
+    parser.add_argument("--shards", type=int, default=None, help="shards (default: one per worker)")
+    parser.add_argument("--min-shard-bytes", type=int, default=MIN_SHARD_BYTES)
+    parser.add_argument("--compare", action="store_true", help="also time the sequential path and check it agrees")
+    args = parser.parse_args(argv)
+
+    import time
+
+    t0 = time.perf_counter()
+    messages = run_file_sharded(args.script, args.workers, args.shards, args.min_shard_bytes)
+    sharded_s = time.perf_counter() - t0
+    for message in messages:
+        print(message)
+    if args.compare:
+        from run_scriptpulse import run_scriptpulse
+        from scriptpulse.batch import read_script_lines
+
+        t0 = time.perf_counter()
+        sequential = run_scriptpulse(read_script_lines(args.script))
+        sequential_s = time.perf_counter() - t0
+        print(f"sharded {sharded_s:.3f} s, sequential {sequential_s:.3f} s ({sequential_s / sharded_s:.2f}x), "
+              f"{'same' if sequential == messages else 'DIFFERENT'} messages", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Streaming mode for the ScriptPulse engine.
+
+Consumes an iterator of lines instead of a materialized list. Validation,
+preprocessing and segmentation run as chained generators, and each scene is
+emitted as soon as the next INT./EXT. header closes it.
+
+Per-script min-max normalization needs global statistics, so per-scene
+signals are provisional (normalized against the running min/max of the
+scenes read so far). A final correction pass over the retained normalization
+inputs (six floats per scene) reproduces run_scriptpulse exactly. Text is
+held for one scene at a time (or `batch_scenes` scenes, see ScriptPulseStream).
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from scriptpulse.engine.validator import iter_validated_lines
+from scriptpulse.engine.preprocess import iter_preprocessed_lines
+from scriptpulse.engine.segment import SceneSegment, iter_scene_segments
+from scriptpulse.engine.temporal_graph import LAMBDA, TAU, RHO
+
+def iter_scenes(lines: Iterable[str]) -> Iterator[SceneSegment]:
+    """
+    Yields validated, preprocessed SceneSegments from a line iterator.
+    Raises the same ValueError as validate_script/segment_scenes would for the
+    same input; an error found late in the input surfaces after the scenes
+    before it have been yielded.
+    """
+    validated = iter_validated_lines(lines)
+    segments = iter_scene_segments(iter_preprocessed_lines(validated))
+
+    emitted = False
+    try:
+        for scene in segments:
+            emitted = True
+            yield scene
+    except ValueError:
+        # The batch path validates the whole script before segmenting, so a
+        # validation error later in the input takes precedence over a
+        # segmentation error. Drain the validator before re-raising.
+        for _ in validated:
+            pass
+        raise
+
+    if not emitted:
+        raise ValueError("No scenes detected")
+
+@dataclass
+class SceneUpdate:
+    scene: SceneSegment
+    features: Dict[str, Union[float, int]]
+    # Normalized against the running min/max of scenes 0..scene_index
+    provisional_effort: float
+    provisional_decayed: float
+
+class ScriptPulseStream:
+    """
+    Incremental run of the engine over a line iterator.
+
+    Iterating yields one SceneUpdate per scene. finalize() consumes whatever
+    input remains, applies the final correction pass and returns the same
+    messages as run_scriptpulse for the same lines.
+
+    batch_scenes > 1 extracts features for that many closed scenes at once:
+    higher throughput on large files, at the cost of update latency and of
+    holding up to batch_scenes scenes in memory.
+    """
+
+    def __init__(self, lines: Iterable[str], batch_scenes: int = 1):
+        if batch_scenes < 1:
+            raise ValueError("batch_scenes must be >= 1")
+        self._scenes = iter_scenes(lines)
+        self._batch_scenes = batch_scenes
+        self._raw = None
+        self._count = 0
+        self._min = None
+        self._max = None
+        self._prev_effort: Optional[float] = None
+        self._prev_decayed: Optional[float] = None
+        self.messages: Optional[List[str]] = None
+
+    def __iter__(self) -> Iterator[SceneUpdate]:
+        pending: List[SceneSegment] = []
+        for scene in self._scenes:
+            pending.append(scene)
+            if len(pending) == self._batch_scenes:
+                yield from self._push(pending)
+                pending = []
+        if pending:
+            yield from self._push(pending)
+
+    def _push(self, scenes: List[SceneSegment]) -> List[SceneUpdate]:
+        import numpy as np
+        from scriptpulse.engine.features import extract_scene_feature_arrays
+        from scriptpulse.engine.effort import compute_effort_matrix
+        from scriptpulse.engine.normalize import normalization_inputs, scale
+
+        features = extract_scene_feature_arrays(scenes)
+        raw_rows = normalization_inputs(features)
+
+        # Retain only the normalization inputs (growable buffer)
+        needed = self._count + len(scenes)
+        if self._raw is None or needed > len(self._raw):
+            grown = np.empty((max(64, 2 * needed), raw_rows.shape[1]), dtype=np.float64)
+            if self._raw is not None:
+                grown[:self._count] = self._raw[:self._count]
+            self._raw = grown
+        self._raw[self._count:needed] = raw_rows
+        self._count = needed
+
+        updates = []
+        for scene, scene_features, raw in zip(scenes, features.to_dicts(), raw_rows):
+            # Provisional normalization against the running min/max
+            self._min = raw.copy() if self._min is None else np.minimum(self._min, raw)
+            self._max = raw.copy() if self._max is None else np.maximum(self._max, raw)
+            norm = scale(raw, self._min, self._max)
+            effort = float(compute_effort_matrix(norm[None, :])[0])
+
+            # Provisional decay recurrence (same rule as build_temporal_graph)
+            if self._prev_decayed is None:
+                decayed = effort
+            else:
+                decayed = effort + (LAMBDA * self._prev_decayed)
+                if effort < (self._prev_effort - TAU):
+                    decayed = decayed - RHO
+            self._prev_effort = effort
+            self._prev_decayed = decayed
+
+            updates.append(SceneUpdate(
+                scene=scene,
+                features=scene_features,
+                provisional_effort=effort,
+                provisional_decayed=decayed
+            ))
+        return updates
+
+    def finalize(self) -> List[str]:
+        """
+        Consumes the remaining input and runs the exact per-script pass
+        (normalization through output formatting).
+        """
+        from run_scriptpulse import score_normalization_inputs
+
+        for _ in self:
+            pass
+        if self.messages is None:
+            self.messages = score_normalization_inputs(self._raw[:self._count])
+        return self.messages
+
+def run_scriptpulse_streaming(lines: Iterable[str], batch_scenes: int = 256) -> List[str]:
+    """
+    Streaming equivalent of run_scriptpulse: accepts any line iterator
+    (newlines already stripped) and returns the same messages.
+    """
+    return ScriptPulseStream(lines, batch_scenes=batch_scenes).finalize()
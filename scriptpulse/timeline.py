@@ -0,0 +1,191 @@
+"""
+Timeline rendering for long scripts (used by demo_app's Writer View).
+
+The decayed signal is drawn from at most a fixed number of points whatever
+the scene count. A min/max pyramid is built once per result: level k keeps,
+for every bucket of 2**k scenes, the index of its lowest and its highest
+value. Any scene range is then drawn from the coarsest level whose buckets
+still give enough points, so every peak stays visible at every zoom, and a
+view costs O(points), not O(scenes). Alert markers are drawn on that curve
+and, when a view has more alerts than points, thinned to one per point.
+
+    python -m scriptpulse.timeline bench --scenes 1000 10000 100000
+"""
+import argparse
+import io
+import math
+import sys
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Points drawn per view (about two per horizontal pixel pair at 1200 px)
+TIMELINE_POINTS = 1200
+# Most x tick labels per view
+MAX_TICKS = 12
+
+@dataclass
+class TimelinePyramid:
+    values: np.ndarray
+    # Sorted scene indices of alerts
+    alerts: np.ndarray
+    # levels[k] = (min_index, max_index) per bucket of 2**k scenes
+    levels: List[Tuple[np.ndarray, np.ndarray]]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def view(self, start: int, stop: int, points: int = TIMELINE_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scene indices (ascending) and values to draw for scenes start..stop-1:
+        the first and last scene and the min and max of every bucket.
+        """
+        start, stop = max(start, 0), min(stop, len(self.values))
+        points = max(points, 4)
+        if stop - start <= points:
+            x = np.arange(start, stop)
+            return x, self.values[x]
+        k = 0
+        while (stop - start) > (points // 2) << k:
+            k += 1
+        k = min(k, len(self.levels) - 1)
+        size = 1 << k
+        # Whole buckets inside the range come from the pyramid; the partial
+        # buckets at either end are reduced directly
+        b0, b1 = -(-start // size), stop // size
+        mins, maxs = self.levels[k]
+        parts = [mins[b0:b1], maxs[b0:b1], np.array([start, stop - 1])]
+        for a, b in ((start, min(b0 * size, stop)), (max(b1 * size, start), stop)):
+            if a < b:
+                parts.append(np.array([a + np.argmin(self.values[a:b]), a + np.argmax(self.values[a:b])]))
+        x = np.unique(np.concatenate(parts))
+        return x, self.values[x]
+
+    def alerts_in(self, start: int, stop: int, points: int = TIMELINE_POINTS) -> np.ndarray:
+        """
+        Alert scene indices in start..stop-1, at most one per 1/points of the
+        range when there are more alerts than points.
+        """
+        alerts = self.alerts[np.searchsorted(self.alerts, start):np.searchsorted(self.alerts, stop)]
+        if len(alerts) > points:
+            buckets = (alerts - start) * points // (stop - start)
+            alerts = alerts[np.flatnonzero(np.diff(buckets, prepend=-1))]
+        return alerts
+
+def build_timeline(values: Sequence[float], alert_indices: Sequence[int] = ()) -> TimelinePyramid:
+    """
+    Builds the min/max pyramid of one per-scene signal.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    index = np.arange(len(values))
+    levels = [(index, index)]
+    while len(levels[-1][0]) > 1:
+        mins, maxs = levels[-1]
+        if len(mins) % 2:
+            mins, maxs = np.append(mins, mins[-1]), np.append(maxs, maxs[-1])
+        a, b = mins[0::2], mins[1::2]
+        # Ties keep the earlier scene
+        next_mins = np.where(values[b] < values[a], b, a)
+        a, b = maxs[0::2], maxs[1::2]
+        next_maxs = np.where(values[b] > values[a], b, a)
+        levels.append((next_mins, next_maxs))
+    return TimelinePyramid(
+        values=values,
+        alerts=np.unique(np.asarray(alert_indices, dtype=np.int64)),
+        levels=levels
+    )
+
+def tick_positions(start: int, stop: int, max_ticks: int = MAX_TICKS) -> np.ndarray:
+    """
+    Scene indices to label in start..stop-1, at a step of 1, 2 or 5 times a
+    power of ten giving at most max_ticks labels.
+    """
+    span = max(stop - start, 1)
+    step = 1
+    for power in range(int(math.log10(span)) + 2):
+        step = next((m * 10 ** power for m in (1, 2, 5) if span / (m * 10 ** power) <= max_ticks), 0)
+        if step:
+            break
+    first = -(-start // step) * step
+    return np.arange(first, stop, step)
+
+def render_timeline_png(
+    timeline: TimelinePyramid,
+    start: int = 0,
+    stop: Optional[int] = None,
+    points: int = TIMELINE_POINTS,
+    figsize: Tuple[float, float] = (12, 3),
+    dpi: int = 100
+) -> bytes:
+    """
+    PNG of the Writer View energy timeline for scenes start..stop-1.
+    Uses the Agg canvas directly (no pyplot state), so it is safe to call
+    from any thread.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    if stop is None:
+        stop = len(timeline)
+    x, y = timeline.view(start, stop, points)
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    # Cinematic styling: minimalist
+    ax.plot(x, y, color='#333333', linewidth=1.2)
+    ax.fill_between(x, y, color='#e0e0e0', alpha=0.3)
+
+    # Markers for alerts (Subtle red dots), on the drawn line rather than at
+    # values the downsampled line may pass below
+    alerts = timeline.alerts_in(start, stop, points)
+    if len(alerts):
+        ax.scatter(alerts, np.interp(alerts, x, y), color='#b71c1c', s=30, zorder=5, label='Alert')
+
+    ax.set_yticks([])
+    ticks = tick_positions(start, stop)
+    ax.set_xticks(ticks)
+    ax.set_xticklabels([str(i) for i in ticks], fontsize=8, color='#666')
+    ax.set_xlim(start - 0.5, stop - 0.5)
+
+    # Remove borders
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    ax.spines['bottom'].set_visible(True)
+    ax.spines['bottom'].set_color('#ddd')
+
+    ax.set_ylabel("Pressure", fontsize=9, color='#666')
+    ax.set_xlabel("Scene Index", fontsize=9, color='#666')
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+    return buffer.getvalue()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Downsampled timeline rendering for long scripts.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench_p = sub.add_parser("bench", help="time pyramid building, views and PNG rendering")
+    bench_p.add_argument("--scenes", type=int, nargs="+", default=[1000, 10000, 100000])
+    bench_p.add_argument("--no-render", action="store_true", help="skip matplotlib rendering")
+    args = parser.parse_args(argv)
+
+    import time
+
+    rng = np.random.default_rng(0)
+    print(f"{'scenes':>8}{'build ms':>10}{'view ms':>10}{'points':>8}{'render ms':>11}")
+    for n in args.scenes:
+        values = rng.random(n).cumsum() % 5
+        alerts = np.flatnonzero(values > 4)
+        t0 = time.perf_counter()
+        timeline = build_timeline(values, alerts)
+        t1 = time.perf_counter()
+        x, _ = timeline.view(0, n)
+        t2 = time.perf_counter()
+        render = ""
+        if not args.no_render:
+            render_timeline_png(timeline)
+            render = f"{(time.perf_counter() - t2) * 1000:.0f}"
+        print(f"{n:>8}{(t1 - t0) * 1000:>10.1f}{(t2 - t1) * 1000:>10.2f}{len(x):>8}{render:>11}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
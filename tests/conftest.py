@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+# run_scriptpulse.py lives at the repository root, next to the package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def pytest_addoption(parser):
+    parser.addoption("--run-slow", action="store_true", help="also run tests marked slow (minutes)")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: long measurements, run with --run-slow")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-slow"):
+        return
+    skip = pytest.mark.skip(reason="slow; run with --run-slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
+
+@pytest.fixture(scope="session")
+def corpus():
+    # Generated scripts of 1-60 scenes, about half of them malformed, shared by
+    # the equivalence tests
+    from scriptpulse.corpus import generate_corpus
+
+    return list(generate_corpus(300, seed=0))
+
+@pytest.fixture(scope="session")
+def well_formed_corpus():
+    # Valid generated scripts of 1-400 scenes (long enough for every window
+    # width and for scripts of very different lengths in one batch)
+    from scriptpulse.corpus import generate_corpus
+
+    return list(generate_corpus(200, seed=0, max_scenes=400, malformed=False))
@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from run_scriptpulse import run_scriptpulse
+from scriptpulse.batch import discover_scripts, main, read_script_lines, run_batch
+
+@pytest.fixture(scope="module")
+def script_dir(tmp_path_factory, corpus):
+    # The corpus (about half malformed) plus files that cannot be read
+    root = tmp_path_factory.mktemp("scripts")
+    for k, lines in enumerate(corpus[:120]):
+        (root / f"s{k:03d}.txt").write_text("\n".join(lines), encoding="utf-8")
+    (root / "z_not_utf8.txt").write_bytes(b"INT. HOUSE\n\xff\xfe\n")
+    return str(root)
+
+@pytest.fixture(scope="module")
+def paths(script_dir):
+    return discover_scripts([script_dir]) + [os.path.join(script_dir, "missing.txt")]
+
+def serial(path):
+    # ("messages", messages) or ("error", type, message) from run_scriptpulse
+    try:
+        lines = read_script_lines(path)
+        return ("messages", run_scriptpulse(lines))
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        return ("error", type(e).__name__, str(e))
+
+def outcome(result):
+    if result.error is None:
+        return ("messages", result.messages)
+    return ("error", result.error["type"], result.error["message"])
+
+@pytest.mark.parametrize("workers,chunk_size,ordered", [
+    (1, 1, True), (1, 16, True), (2, 1, True), (3, 7, True), (2, 1, False), (3, 7, False)
+])
+def test_results_match_serial_run(paths, workers, chunk_size, ordered):
+    results = list(run_batch(paths, workers=workers, chunk_size=chunk_size, ordered=ordered))
+    indices = [r.index for r in results]
+    if ordered:
+        assert indices == list(range(len(paths)))
+    assert sorted(indices) == list(range(len(paths)))
+    for result in results:
+        assert result.path == paths[result.index]
+        assert outcome(result) == serial(result.path), result.path
+    stages = {r.error["stage"] for r in results if r.error is not None}
+    assert {"read", "validation"} <= stages
+
+def run_main(args, tmp_path, name):
+    output = tmp_path / name
+    status = main(args + ["-o", str(output)])
+    return status, output.read_bytes()
+
+def test_output_is_byte_identical(script_dir, tmp_path):
+    status_1, serial_bytes = run_main([script_dir, "--workers", "1"], tmp_path, "serial.jsonl")
+    status_3, parallel_bytes = run_main([script_dir, "--workers", "3", "--chunk-size", "5"], tmp_path, "parallel.jsonl")
+    status_c, completion = run_main([script_dir, "--workers", "3", "--order", "completion"], tmp_path, "completion.jsonl")
+    assert serial_bytes == parallel_bytes
+    assert sorted(completion.splitlines()) == sorted(serial_bytes.splitlines())
+    # Failed scripts make the run fail
+    assert status_1 == status_3 == status_c == 1
+
+def test_exit_status_without_failures(script_dir, paths, tmp_path):
+    valid = [p for p in paths if serial(p)[0] == "messages"][:20]
+    status, output = run_main(valid + ["--workers", "2"], tmp_path, "valid.jsonl")
+    assert status == 0
+    assert len(output.splitlines()) == len(valid)
@@ -0,0 +1,215 @@
+import multiprocessing
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from functools import partial
+
+import pytest
+
+from run_scriptpulse import run_scriptpulse, run_scriptpulse_detailed
+from scriptpulse.cache import PersistentResultCache, input_key
+
+def payload(size, tag):
+    # A value that pickles to exactly `size` bytes, the stored size without compression
+    n = size
+    while True:
+        value = tag.encode().ljust(n, b".")
+        extra = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)) - size
+        if extra == 0:
+            return value
+        n -= extra
+
+def logged_compute(log, lines, delay=0.5):
+    # Appends one line per call to `log`, so every process can count the calls
+    with open(log, "a") as f:
+        f.write(f"{os.getpid()}\n")
+    time.sleep(delay)
+    return {"lines": list(lines), "pid": os.getpid()}
+
+def contend(path, log, out, lines, barrier):
+    with PersistentResultCache(path, lease_seconds=30.0) as cache:
+        barrier.wait()
+        result = cache.get_or_compute(lines, compute=partial(logged_compute, log))
+    with open(out, "wb") as f:
+        pickle.dump(result, f)
+
+def crash_holding_lease(path, key, lease_seconds):
+    cache = PersistentResultCache(path, lease_seconds=lease_seconds)
+    assert cache._try_lease(key)
+    os._exit(1)
+
+def calls(log):
+    if not os.path.exists(log):
+        return 0
+    with open(log) as f:
+        return len(f.read().split())
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "cache.sqlite")
+
+def test_input_key_separates_lines_and_versions():
+    assert input_key(["ab", "c"], "1") != input_key(["a", "bc"], "1")
+    assert input_key(["ab", "c"], "1") != input_key(["ab", "c"], "2")
+    assert input_key(["ab", "c"], "1") == input_key(("ab", "c"), "1")
+
+def test_results_match_engine(cache_path, corpus):
+    with PersistentResultCache(cache_path) as cache:
+        for lines in corpus[:20]:
+            try:
+                expected = run_scriptpulse(lines)
+            except ValueError as e:
+                with pytest.raises(ValueError, match=str(e)):
+                    cache.run(lines)
+                continue
+            assert cache.run(lines) == expected
+            assert cache.run(lines) == expected
+        stats = cache.stats()
+    assert stats["hits"] > 0
+    assert stats["entries"] == stats["hits"]
+
+def test_lru_eviction_under_max_bytes(cache_path):
+    values = {}
+    with PersistentResultCache(cache_path, max_bytes=3000, compress=False) as cache:
+        for name in "abc":
+            values[name] = payload(1000, name)
+            cache.put(name, values[name])
+        assert cache.stats()["bytes"] == 3000
+
+        # Touch "a", so "b" is now the least recently used
+        assert cache.get("a") == values["a"]
+        values["d"] = payload(1000, "d")
+        cache.put("d", values["d"])
+        assert cache.get("b") is None
+        for name in "acd":
+            assert cache.get(name) == values[name]
+
+        # A larger entry evicts as many old ones as it needs, oldest first
+        values["e"] = payload(2000, "e")
+        cache.put("e", values["e"])
+        assert cache.get("a") is None and cache.get("c") is None
+        assert cache.get("d") == values["d"] and cache.get("e") == values["e"]
+
+        # Results larger than the whole cache are not stored and evict nothing
+        big = payload(4000, "f")
+        cache.put("f", big)
+        assert cache.get("f") is None
+        stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] == 3000 <= stats["max_bytes"]
+    assert stats["evictions"] == 3
+
+def test_errors_are_not_cached(cache_path):
+    attempts = []
+
+    def failing(lines):
+        attempts.append(1)
+        raise ValueError("no scenes")
+
+    with PersistentResultCache(cache_path) as cache:
+        for _ in range(2):
+            with pytest.raises(ValueError, match="no scenes"):
+                cache.get_or_compute(["x"], compute=failing)
+        assert len(attempts) == 2
+        assert cache.stats()["entries"] == 0
+        assert cache._db.execute("SELECT COUNT(*) FROM leases").fetchone()[0] == 0
+
+def test_single_flight_within_process(cache_path, tmp_path):
+    log = str(tmp_path / "calls.log")
+    threads = 8
+    barrier = threading.Barrier(threads)
+    results = [None] * threads
+
+    with PersistentResultCache(cache_path) as cache:
+        def worker(k):
+            barrier.wait()
+            results[k] = cache.get_or_compute(["INT. HOUSE - DAY"], compute=partial(logged_compute, log))
+
+        pool = [threading.Thread(target=worker, args=(k,)) for k in range(threads)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        stats = cache.stats()
+
+    assert calls(log) == 1
+    assert all(r == results[0] for r in results)
+    assert stats["misses"] + stats["hits"] == threads
+    assert stats["coalesced"] == stats["misses"] - 1
+    assert stats["entries"] == 1
+
+def test_single_flight_across_processes(cache_path, tmp_path):
+    ctx = multiprocessing.get_context("spawn")
+    log = str(tmp_path / "calls.log")
+    workers = 4
+    lines = ["INT. HOUSE - DAY", "Someone waits."]
+    barrier = ctx.Barrier(workers)
+    outs = [str(tmp_path / f"out{k}.pkl") for k in range(workers)]
+    procs = [ctx.Process(target=contend, args=(cache_path, log, out, lines, barrier)) for out in outs]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+    assert [p.exitcode for p in procs] == [0] * workers
+
+    assert calls(log) == 1
+    results = []
+    for out in outs:
+        with open(out, "rb") as f:
+            results.append(pickle.load(f))
+    assert all(r == results[0] for r in results)
+    with PersistentResultCache(cache_path) as cache:
+        assert cache.get(input_key(lines)) == results[0]
+        assert cache.stats()["coalesced"] == workers - 1
+        assert cache._db.execute("SELECT COUNT(*) FROM leases").fetchone()[0] == 0
+
+def test_lease_of_crashed_owner_expires(cache_path, tmp_path):
+    ctx = multiprocessing.get_context("spawn")
+    log = str(tmp_path / "calls.log")
+    lines = ["INT. HOUSE - DAY"]
+    key = input_key(lines)
+    lease_seconds = 1.0
+
+    proc = ctx.Process(target=crash_holding_lease, args=(cache_path, key, lease_seconds))
+    proc.start()
+    proc.join(60)
+    assert proc.exitcode == 1
+
+    with PersistentResultCache(cache_path) as cache:
+        # The dead owner's lease is still there, so the first caller waits it out
+        assert not cache._try_lease(key)
+        expires = cache._db.execute("SELECT expires FROM leases WHERE key = ?", (key,)).fetchone()[0]
+        result = cache.get_or_compute(lines, compute=partial(logged_compute, log, delay=0.0), poll_seconds=0.02)
+        finished = time.time()
+        assert cache._db.execute("SELECT COUNT(*) FROM leases").fetchone()[0] == 0
+
+    assert calls(log) == 1
+    assert result["pid"] == os.getpid()
+    assert expires <= finished < expires + 5.0
+
+def test_reopen_wal_database(cache_path, well_formed_corpus):
+    lines = well_formed_corpus[0]
+    with PersistentResultCache(cache_path) as cache:
+        assert cache._db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        first = cache.get_or_compute(lines)
+
+        # A second connection sees committed entries while the first is open
+        with PersistentResultCache(cache_path) as other:
+            assert other.get(input_key(lines)).messages == first.messages
+
+    with PersistentResultCache(cache_path) as cache:
+        assert cache._db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        again = cache.get_or_compute(lines, compute=lambda _: pytest.fail("recomputed after reopen"))
+        stats = cache.stats()
+    assert again.messages == first.messages == run_scriptpulse_detailed(lines).messages
+    assert stats["entries"] == 1
+    assert stats["misses"] == 1 and stats["hits"] == 2
+
+    # The file is an ordinary SQLite database once every connection is closed
+    db = sqlite3.connect(cache_path)
+    try:
+        assert db.execute("SELECT COUNT(*) FROM entries").fetchone()[0] == 1
+    finally:
+        db.close()
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from run_scriptpulse import run_scriptpulse_detailed
+from scriptpulse.engine.compact import segment_compact
+from scriptpulse.engine.features import FEATURE_KEYS, extract_scene_feature_arrays
+from scriptpulse.engine.preprocess import preprocess_lines
+from scriptpulse.engine.segment import segment_scenes
+
+# Every line class and sentence split the segmenter distinguishes
+EDGE_SCRIPT = [
+    "",
+    "INT. HOUSE - NIGHT",
+    "(before anyone speaks)",
+    "Rain. Wind! Thunder?",
+    "BOB",
+    "",
+    "Not after a blank line.",
+    "BOB",
+    "(quietly)",
+    "Wait... what?! Really.",
+    "(still)",
+    "A line that ends the dialogue and starts action",
+    "ANN",
+    "Int. this is not a header",
+    "ext. neither is this",
+    "EXT. ROOF",
+    "",
+    "",
+    "A SHOUTED ACTION LINE THAT IS FAR TOO LONG TO BE A SPEAKER NAME",
+    "   ",
+    "BOB",
+    "  .  !  ?  ",
+    "INT. EMPTY",
+    "INT. LAST",
+    "Ends without a blank line.",
+]
+
+def structure(scenes):
+    # Everything segmentation produces, as plain values
+    return [
+        (scene.scene_index, scene.header, list(scene.raw_lines),
+         [(b.block_type, b.speaker, list(b.lines), list(b.sentences)) for b in scene.blocks])
+        for scene in scenes
+    ]
+
+def outcome(segment, lines):
+    try:
+        return ("scenes", structure(segment(lines)))
+    except ValueError as e:
+        return ("error", str(e))
+
+def test_compact_matches_segments(corpus, well_formed_corpus):
+    segmented = 0
+    for lines in corpus + well_formed_corpus[:40] + [EDGE_SCRIPT]:
+        clean = preprocess_lines(lines)
+        expected = outcome(segment_scenes, clean)
+        assert outcome(segment_compact, clean) == expected
+        if expected[0] == "scenes":
+            segmented += 1
+            scenes = segment_scenes(clean)
+            compact = segment_compact(clean)
+            assert compact.lines is clean
+            a = extract_scene_feature_arrays(compact)
+            b = extract_scene_feature_arrays(scenes)
+            for key in FEATURE_KEYS:
+                assert a[key].dtype == b[key].dtype
+                assert np.array_equal(a[key], b[key]), key
+    assert segmented > 150
+
+def test_compact_edge_script():
+    scenes = structure(segment_compact(preprocess_lines(EDGE_SCRIPT)))
+    assert [header for _, header, _, _ in scenes] == ["INT. HOUSE - NIGHT", "EXT. ROOF", "INT. EMPTY", "INT. LAST"]
+    assert scenes[2][3] == []
+    for lines in ([], [""], ["Action first", "INT. HOUSE"]):
+        error = outcome(segment_scenes, lines)
+        assert error[0] == "error"
+        assert outcome(segment_compact, lines) == error
+
+def test_compact_scene_views(well_formed_corpus):
+    compact = segment_compact(preprocess_lines(well_formed_corpus[0]))
+    n = len(compact)
+    assert compact[-1].scene_index == n - 1
+    assert structure([compact[-n]]) == structure([compact[0]])
+    for k in (n, -n - 1):
+        with pytest.raises(IndexError):
+            compact[k]
+    assert structure(compact) == structure(compact[k] for k in range(n))
+
+def test_compact_pipeline_matches(corpus):
+    for lines in corpus[:80]:
+        try:
+            expected = run_scriptpulse_detailed(lines)
+        except ValueError as e:
+            with pytest.raises(ValueError, match=str(e)):
+                run_scriptpulse_detailed(lines, compact=True)
+            continue
+        got = run_scriptpulse_detailed(lines, compact=True)
+        assert got.to_dict() == expected.to_dict()
+        assert got.messages == expected.messages
+
+    with pytest.raises(ValueError, match="cannot be combined"):
+        run_scriptpulse_detailed(corpus[0], fused=True, compact=True)
@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from run_scriptpulse import run_scriptpulse_detailed
+from scriptpulse.export import (
+    NPZ_ALIGNMENT, ColumnarExportReader, export_format, main, open_export_writer, result_columns
+)
+
+@pytest.fixture(scope="module")
+def batches(well_formed_corpus):
+    # (script id, columns) of scripts of very different lengths, ids of varying length
+    out = []
+    for k, lines in enumerate(well_formed_corpus[:12]):
+        result = run_scriptpulse_detailed(lines, compact=True)
+        out.append((f"draft_{'x' * k}{k}.txt", result_columns(result)))
+    return out
+
+def write(path, batches):
+    with open_export_writer(str(path)) as writer:
+        for script_id, columns in batches:
+            writer.write(script_id, columns)
+    return str(path)
+
+def assert_same_batches(reader, batches):
+    assert len(reader) == len(batches)
+    for (script_id, columns), (expected_id, expected) in zip(reader, batches):
+        assert script_id == expected_id
+        assert list(columns) == list(expected)
+        for name, array in expected.items():
+            assert columns[name].dtype == array.dtype
+            np.testing.assert_array_equal(columns[name], array)
+
+def test_npz_round_trip(tmp_path, batches):
+    path = write(tmp_path / "signals.npz", batches)
+    with ColumnarExportReader(path) as reader:
+        assert reader.format == "npz"
+        assert_same_batches(reader, batches)
+        assert reader.script_ids() == [script_id for script_id, _ in batches]
+        table = reader.read(["effort", "alert"])
+
+    assert sorted(table) == ["alert", "batch", "effort", "script"]
+    lengths = [len(columns["effort"]) for _, columns in batches]
+    np.testing.assert_array_equal(table["batch"], np.repeat(np.arange(len(batches)), lengths))
+    np.testing.assert_array_equal(table["script"], np.repeat([script_id for script_id, _ in batches], lengths))
+    np.testing.assert_array_equal(table["effort"], np.concatenate([columns["effort"] for _, columns in batches]))
+
+    # Still an ordinary .npz
+    with np.load(path) as npz:
+        np.testing.assert_array_equal(npz["00000003/decayed"], batches[3][1]["decayed"])
+        assert str(npz["00000003/script"]) == batches[3][0]
+
+def test_npz_members_are_aligned_views(tmp_path, batches):
+    path = write(tmp_path / "signals.npz", batches)
+    with ColumnarExportReader(path) as reader:
+        whole = np.frombuffer(reader._mmap, dtype=np.uint8)
+        base = whole.__array_interface__["data"][0]
+        for _, columns in reader:
+            for name, array in columns.items():
+                start = array.__array_interface__["data"][0]
+                assert (start - base) % NPZ_ALIGNMENT == 0, name
+                assert np.shares_memory(array, whole)
+                assert not array.flags.writeable
+
+def test_schema_mismatch(tmp_path, batches):
+    script_id, columns = batches[0]
+    changes = {
+        "missing column": {k: v for k, v in columns.items() if k != "effort"},
+        "renamed column": {("energy" if k == "effort" else k): v for k, v in columns.items()},
+        "reordered columns": dict(reversed(list(columns.items()))),
+        "other dtype": {**columns, "effort": columns["effort"].astype(np.float32)}
+    }
+    for change, other in changes.items():
+        with open_export_writer(str(tmp_path / "signals.npz")) as writer:
+            writer.write(script_id, columns)
+            with pytest.raises(ValueError, match="differ from the first batch"):
+                writer.write("second", other)
+            assert writer.batches == 1, change
+
+    ragged = {**columns, "effort": columns["effort"][:-1]}
+    with open_export_writer(str(tmp_path / "ragged.npz")) as writer:
+        with pytest.raises(ValueError, match="same length"):
+            writer.write(script_id, ragged)
+        assert writer.batches == 0
+
+    with pytest.raises(ValueError, match="unknown export format"):
+        export_format("signals.csv")
+
+@pytest.mark.parametrize("name", ["signals.arrow", "signals.parquet"])
+def test_pyarrow_round_trip(tmp_path, batches, name):
+    pytest.importorskip("pyarrow")
+    path = write(tmp_path / name, batches)
+    with ColumnarExportReader(path) as reader:
+        assert_same_batches(reader, batches)
+        with pytest.raises(IndexError):
+            reader.batch(len(batches))
+
+    other = {k: v for k, v in batches[1][1].items() if k != "effort"}
+    with open_export_writer(str(tmp_path / ("other_" + name))) as writer:
+        writer.write(*batches[0])
+        with pytest.raises(ValueError, match="differ from the first batch"):
+            writer.write(batches[1][0], other)
+
+def test_main_exit_status(tmp_path, corpus, capsys):
+    paths = []
+    for k, lines in enumerate(corpus[:10]):
+        path = tmp_path / f"s{k}.txt"
+        path.write_text("\n".join(lines), encoding="utf-8")
+        paths.append(str(path))
+    valid = []
+    for path, lines in zip(paths, corpus):
+        try:
+            run_scriptpulse_detailed(lines)
+            valid.append(path)
+        except ValueError:
+            pass
+    assert 0 < len(valid) < len(paths)
+
+    output = str(tmp_path / "all.npz")
+    assert main(["write", *paths, "-o", output]) == 1
+    with ColumnarExportReader(output) as reader:
+        assert reader.script_ids() == valid
+
+    output = str(tmp_path / "valid.npz")
+    assert main(["write", *valid, "-o", output]) == 0
+    capsys.readouterr()
+    assert main(["info", output]) == 0
+    assert f"npz, {len(valid)} scripts" in capsys.readouterr().out
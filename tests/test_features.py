@@ -0,0 +1,166 @@
+import copy
+import math
+
+import numpy as np
+import pytest
+
+from scriptpulse.corpus import generate_script
+from scriptpulse.engine.features import (
+    FEATURE_KEYS, FLOAT_FEATURE_KEYS, SceneFeatureArrays, extract_scene_feature_arrays, extract_scene_features
+)
+from scriptpulse.engine.preprocess import preprocess_lines
+from scriptpulse.engine.segment import Block, SceneSegment, segment_scenes
+
+def recounted(scenes):
+    # Features with every token counted again from the text
+    scenes = copy.deepcopy(scenes)
+    for scene in scenes:
+        scene._token_counts = None
+    return extract_scene_feature_arrays(scenes)
+
+def assert_same_features(a, b):
+    for key in FEATURE_KEYS:
+        assert np.array_equal(a[key], b[key]), key
+
+@pytest.mark.parametrize("seed", range(5))
+def test_in_place_edits_invalidate_token_counts(seed):
+    scenes = segment_scenes(preprocess_lines(generate_script(seed, scenes=30)))
+    before = extract_scene_feature_arrays(scenes)
+    assert all(scene.token_counts() is not None for scene in scenes)
+
+    # Same line count, different words
+    scene = max(scenes, key=lambda s: len(s.raw_lines))
+    i = len(scene.raw_lines) - 1
+    scene.raw_lines[i] = scene.raw_lines[i] + " and then some more words"
+    assert scene.token_counts() is None
+    edited = extract_scene_feature_arrays(scenes)
+    assert_same_features(edited, recounted(scenes))
+    assert not np.array_equal(edited["Words"], before["Words"])
+
+    # Same sentence count, different words
+    block = next(b for s in scenes for b in s.blocks if b.sentences)
+    block.sentences[0] = "one two three four five six seven eight nine ten eleven"
+    assert_same_features(extract_scene_feature_arrays(scenes), recounted(scenes))
+
+def test_recorded_counts_match_counting_again():
+    scenes = segment_scenes(preprocess_lines(generate_script(0, scenes=200)))
+    assert_same_features(extract_scene_feature_arrays(scenes), recounted(scenes))
+
+def baseline_scene_features(scenes):
+    # The per-scene dict loop of v1.3.1, kept as the reference for the columnar path
+    out = []
+    for scene in scenes:
+        action_blocks = [b for b in scene.blocks if b.block_type == "ACTION"]
+        dialogue_blocks = [b for b in scene.blocks if b.block_type == "DIALOGUE"]
+        lines_count = len(scene.raw_lines)
+        words_count = sum(len(line.split()) for line in scene.raw_lines if line.strip())
+        sentences = [s for b in scene.blocks for s in b.sentences]
+        action_lines = sum(len(b.lines) for b in action_blocks)
+        dialogue_lines = sum(len(b.lines) for b in dialogue_blocks)
+        turns = len(dialogue_blocks)
+        lengths = [len(s.split()) for s in sentences]
+
+        avg = float(words_count) / len(sentences) if sentences else 0.0
+        if len(sentences) < 2:
+            variance = 0.0
+        else:
+            mean_s = sum(lengths) / len(sentences)
+            variance = math.fsum((x - mean_s) ** 2 for x in lengths) / len(sentences)
+        switches = 0
+        for i, block in enumerate(dialogue_blocks):
+            if i == 0:
+                current = block.speaker
+            elif block.speaker != current:
+                switches += 1
+                current = block.speaker
+        max_cont = run = 0
+        for line in scene.raw_lines:
+            run = run + 1 if line.strip() else 0
+            max_cont = max(max_cont, run)
+        blank = sum(1 for line in scene.raw_lines if not line.strip())
+
+        out.append({
+            "Lines": lines_count,
+            "Words": words_count,
+            "Sentences": len(sentences),
+            "ActionLines": action_lines,
+            "DialogueLines": dialogue_lines,
+            "DialogueTurns": turns,
+            "Speakers": len({b.speaker for b in dialogue_blocks if b.speaker}),
+            "AvgSentenceLength": avg,
+            "MaxSentenceLength": max(lengths) if lengths else 0,
+            "SentenceVariance": variance,
+            "DialogueTurnCount": turns,
+            "SpeakerSwitchCount": switches,
+            "DialogueActionRatio": float(dialogue_lines) / (action_lines + 1),
+            "AvgActionBlockLength": float(action_lines) / len(action_blocks) if action_blocks else 0.0,
+            "MaxContinuousLines": max_cont,
+            "WhitespaceRatio": float(blank) / lines_count if lines_count else 0.0,
+            "AuditoryLoad": float(turns) * avg,
+        })
+    return out
+
+def assert_matches_baseline(scenes):
+    expected = baseline_scene_features(scenes)
+    arrays = extract_scene_feature_arrays(scenes)
+    assert len(arrays) == len(expected)
+    for key in FEATURE_KEYS:
+        assert arrays[key].dtype == (np.float64 if key in FLOAT_FEATURE_KEYS else np.int64), key
+    got = extract_scene_features(scenes)
+    assert got == expected
+    for row, ref in zip(got, expected):
+        assert [type(v) for v in row.values()] == [type(v) for v in ref.values()]
+    if got:
+        assert list(got[0]) == FEATURE_KEYS
+
+def test_columnar_features_match_baseline(corpus, well_formed_corpus):
+    checked = 0
+    for lines in corpus + well_formed_corpus[:40]:
+        try:
+            scenes = segment_scenes(preprocess_lines(lines))
+        except ValueError:
+            continue
+        assert_matches_baseline(scenes)
+        checked += 1
+    assert checked > 150
+
+def test_columnar_features_edge_cases():
+    def dialogue(speaker, *sentences):
+        return Block("DIALOGUE", list(sentences), speaker, list(sentences))
+
+    scenes = [
+        # No lines or blocks at all
+        SceneSegment(0, "INT. A", [], []),
+        # Unicode whitespace counts as blank, like str.strip
+        SceneSegment(1, "INT. B", ["INT. B", " ", " \t", " x y", "", "z"], [
+            Block("ACTION", [" x y", "z"], None, ["x y", "z"])
+        ]),
+        # Unnamed speakers, repeats across action blocks, one-sentence variance
+        SceneSegment(2, "EXT. C", ["EXT. C", "BOB", "Hi.", "Walks.", "BOB", "Yes. No.", "ANN", "Why?"], [
+            dialogue(None, "Hi."),
+            Block("ACTION", ["Walks."], None, ["Walks"]),
+            dialogue("BOB", "Yes", " No"),
+            dialogue("BOB", "Again"),
+            dialogue("", "Who"),
+            dialogue("ANN", "Why"),
+            dialogue(None, "x"),
+        ]),
+        # Sentences whose word counts give a variance that is not exact in binary
+        SceneSegment(3, "INT. D", ["INT. D", "a b c", "", "d"], [
+            Block("ACTION", ["a b c", "d"], None, ["a b c", "d", "e f", "g h i j k l m"])
+        ]),
+    ]
+    assert_matches_baseline(scenes)
+
+def test_feature_rows_round_trip():
+    scenes = segment_scenes(preprocess_lines(generate_script(1, scenes=40)))
+    arrays = extract_scene_feature_arrays(scenes)
+    again = SceneFeatureArrays.from_rows(arrays.to_rows())
+    assert_same_features(again, arrays)
+    for key in FEATURE_KEYS:
+        assert again[key].dtype == arrays[key].dtype
+
+    parts = [extract_scene_feature_arrays(scenes[a:b]) for a, b in ((0, 7), (7, 7), (7, 40))]
+    assert_same_features(SceneFeatureArrays.concatenate(parts), arrays)
+    assert len(SceneFeatureArrays.concatenate([])) == 0
+    assert SceneFeatureArrays.from_rows([]).to_dicts() == []
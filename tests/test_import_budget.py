@@ -0,0 +1,17 @@
+import os
+
+import pytest
+
+from scriptpulse.import_budget import DEFAULT_BUDGET_MS, HEAVY_MODULES, TARGETS, measure_import
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.mark.parametrize("statement", TARGETS)
+def test_no_heavy_module_is_imported_eagerly(statement):
+    _, modules = measure_import(statement, ROOT)
+    assert not [m for m in HEAVY_MODULES if m in modules]
+
+@pytest.mark.parametrize("statement", TARGETS)
+def test_cold_import_within_budget(statement):
+    # Best of three cold interpreters, to ride out scheduler noise
+    assert min(measure_import(statement, ROOT)[0] for _ in range(3)) <= DEFAULT_BUDGET_MS
@@ -0,0 +1,25 @@
+import io
+
+import pytest
+
+from scriptpulse.ingest import iter_fdx_lines, iter_fountain_lines, script_element_lines, write_fdx, write_fountain
+
+def fdx_round_trip(lines):
+    f = io.BytesIO()
+    write_fdx(lines, f)
+    f.seek(0)
+    return list(iter_fdx_lines(f))
+
+def fountain_round_trip(lines):
+    f = io.StringIO()
+    write_fountain(lines, f)
+    return list(iter_fountain_lines(f.getvalue().splitlines()))
+
+@pytest.mark.parametrize("round_trip", [fdx_round_trip, fountain_round_trip], ids=["fdx", "fountain"])
+def test_round_trip_gives_script_element_lines(well_formed_corpus, round_trip):
+    for i, lines in enumerate(well_formed_corpus):
+        assert round_trip(lines) == script_element_lines(lines), f"script {i}"
+
+def test_invalid_fdx_is_a_value_error():
+    with pytest.raises(ValueError, match="Invalid FDX"):
+        list(iter_fdx_lines(io.BytesIO(b"<FinalDraft><Content><Paragraph>")))
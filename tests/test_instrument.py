@@ -0,0 +1,82 @@
+import tracemalloc
+
+import pytest
+
+from run_scriptpulse import run_scriptpulse_detailed
+from scriptpulse.instrument import StageAggregator, observe, run_stage
+
+MIB = 1 << 20
+
+def allocate(n):
+    # Peaks at n bytes and keeps nothing
+    block = bytearray(n)
+    del block
+
+@pytest.fixture
+def tracing():
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        tracemalloc.stop()
+
+def records_by_stage(agg):
+    return {r.stage: r for r in agg.records}
+
+def test_nested_stages_keep_enclosing_peaks(tracing):
+    agg = StageAggregator(trace_memory=True)
+
+    def outer():
+        allocate(4 * MIB)
+        run_stage(agg, "inner", allocate, MIB)
+
+    base = tracemalloc.get_traced_memory()[0]
+    allocate(8 * MIB)
+    run_stage(agg, "outer", outer)
+    peak = tracemalloc.get_traced_memory()[1]
+
+    # The caller's own measurement still sees its 8 MiB
+    assert peak - base >= 8 * MIB
+    stages = records_by_stage(agg)
+    assert list(stages) == ["inner", "outer"]
+    assert stages["outer"].alloc_peak_bytes >= 4 * MIB
+    assert stages["inner"].alloc_peak_bytes >= MIB
+    assert abs(stages["outer"].alloc_delta_bytes) < MIB
+
+def test_pipeline_leaves_the_callers_peak(tracing, well_formed_corpus):
+    base = tracemalloc.get_traced_memory()[0]
+    allocate(32 * MIB)
+    agg = StageAggregator(trace_memory=True)
+    result = run_scriptpulse_detailed(well_formed_corpus[0], observer=agg)
+    assert tracemalloc.get_traced_memory()[1] - base >= 32 * MIB
+    assert len(agg.records) >= 5
+    assert all(r.alloc_peak_bytes is not None for r in agg.records)
+    del result
+
+def test_reset_peak_gives_exact_stage_peaks(tracing):
+    for reset_peak in (False, True):
+        agg = StageAggregator(trace_memory=True)
+        agg.reset_peak = reset_peak
+        run_stage(agg, "large", allocate, 4 * MIB)
+        run_stage(agg, "small", allocate, MIB)
+        stages = records_by_stage(agg)
+        assert stages["large"].alloc_peak_bytes >= 4 * MIB
+        assert stages["small"].alloc_peak_bytes >= MIB
+        if reset_peak:
+            assert stages["small"].alloc_peak_bytes < 2 * MIB
+        else:
+            # The earlier, larger peak bounds the later stage
+            assert stages["small"].alloc_peak_bytes > 3 * MIB
+
+def test_failed_stage_is_recorded():
+    agg = StageAggregator(trace_memory=True)
+    assert not tracemalloc.is_tracing()
+    with observe(agg):
+        assert tracemalloc.is_tracing()
+        with pytest.raises(ValueError):
+            run_stage(agg, "failing", int, "not a number")
+    assert not tracemalloc.is_tracing()
+    (record,) = agg.records
+    assert record.error == "ValueError"
+    assert record.output_sizes == {}
+    assert record.alloc_peak_bytes is not None
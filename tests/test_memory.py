@@ -0,0 +1,75 @@
+import pytest
+
+from run_scriptpulse import run_scriptpulse
+from scriptpulse.corpus import generate_script
+from scriptpulse.memory import (
+    FOOTPRINT_MODELS, LONG_SCENES, REPRESENTATIONS, MemoryBudgetExceeded, _measured_peaks, _warm_up,
+    calibrate_footprint, calibration_scripts, input_shape, load_footprint_models, long_scene,
+    project_footprint, run_within_budget, save_footprint_models
+)
+
+# Shipped FOOTPRINT_MODELS come from one interpreter build; on this one they
+# only need to be in the right range
+DEFAULT_MODEL_TOLERANCE = 2.0
+
+@pytest.fixture(scope="module", autouse=True)
+def warm_engine():
+    _warm_up(generate_script(0, scenes=50))
+
+@pytest.fixture(scope="module")
+def calibrated():
+    # Fitted on this interpreter from small inputs (seconds)
+    return calibrate_footprint(calibration_scripts(seed=0, scale=0.05))[0]
+
+HELD_OUT = {
+    "one-scene-short-lines": lambda: long_scene(7, 8000, 12),
+    "one-scene-long-lines": lambda: long_scene(8, 3000, 40),
+    "many-scenes": lambda: generate_script(9, scenes=300),
+    "action-heavy": lambda: generate_script(10, scenes=150, dialogue_rate=0.1),
+}
+
+@pytest.fixture(scope="module", params=list(HELD_OUT))
+def measured(request):
+    lines = HELD_OUT[request.param]()
+    return input_shape(lines), _measured_peaks(lines)
+
+def test_calibrated_projection_covers_held_out_inputs(calibrated, measured):
+    shape, peaks = measured
+    projected = project_footprint(shape, calibrated)
+    for name in REPRESENTATIONS:
+        assert projected[name] >= peaks[name], name
+
+def test_default_models_are_in_range(measured):
+    shape, peaks = measured
+    projected = project_footprint(shape)
+    for name in REPRESENTATIONS:
+        ratio = projected[name] / peaks[name]
+        assert 1 / DEFAULT_MODEL_TOLERANCE <= ratio <= DEFAULT_MODEL_TOLERANCE, (name, ratio)
+
+def test_saved_models_round_trip(calibrated, tmp_path):
+    path = str(tmp_path / "footprint.json")
+    save_footprint_models(calibrated, path)
+    assert load_footprint_models(path) == calibrated
+
+@pytest.mark.slow
+@pytest.mark.parametrize("lines,max_words", LONG_SCENES)
+def test_default_projection_covers_one_long_scene(lines, max_words):
+    script = long_scene(1, lines, max_words)
+    shape = input_shape(script)
+    assert shape.scenes == 1 and shape.max_scene_lines == shape.lines == lines + 1
+    assert shape.max_scene_chars == shape.chars
+    projected = project_footprint(shape, FOOTPRINT_MODELS)
+    peaks = _measured_peaks(script)
+    for name in REPRESENTATIONS:
+        assert projected[name] >= peaks[name], name
+
+@pytest.mark.parametrize("name", REPRESENTATIONS)
+def test_run_within_budget_matches_run_scriptpulse(name, well_formed_corpus):
+    for lines in well_formed_corpus[:20]:
+        assert run_within_budget(lines, 2 ** 40, allowed=(name,)) == run_scriptpulse(lines)
+
+def test_budget_exceeded(calibrated):
+    lines = generate_script(0, scenes=200)
+    with pytest.raises(MemoryBudgetExceeded) as e:
+        run_within_budget(lines, 1024, models=calibrated)
+    assert e.value.to_dict()["max_scene_lines"] == input_shape(lines).max_scene_lines
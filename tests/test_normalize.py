@@ -0,0 +1,153 @@
+import json
+import random
+from functools import reduce
+
+import numpy as np
+import pytest
+
+from scriptpulse.engine.features import extract_scene_feature_arrays
+from scriptpulse.engine.normalize import (
+    NormalizationStats, QuantileSketch, min_max_normalize, normalization_inputs
+)
+from scriptpulse.engine.preprocess import preprocess_lines
+from scriptpulse.engine.segment import segment_scenes
+from scriptpulse.reference import build_reference
+
+@pytest.fixture(scope="module")
+def inputs(corpus):
+    # Normalization inputs of every script in the corpus that segments
+    out = []
+    for lines in corpus:
+        try:
+            features = extract_scene_feature_arrays(segment_scenes(preprocess_lines(lines)))
+        except ValueError:
+            continue
+        out.append(normalization_inputs(features))
+    return out
+
+@pytest.fixture(scope="module")
+def partials(inputs):
+    return [NormalizationStats.from_inputs(raw, quantiles=True) for raw in inputs]
+
+def merge_all(parts):
+    return reduce(NormalizationStats.merge, parts, NormalizationStats.empty(quantiles=True))
+
+def merge_tree(parts, rng):
+    # Merges random neighbours until one is left
+    parts = list(parts)
+    while len(parts) > 1:
+        k = rng.randrange(len(parts) - 1)
+        parts[k:k + 2] = [parts[k].merge(parts[k + 1])]
+    return parts[0]
+
+def test_merge_is_associative_and_commutative(partials):
+    expected = merge_all(partials).to_dict()
+    assert reduce(lambda a, b: b.merge(a), reversed(partials)).to_dict() == expected
+    rng = random.Random(0)
+    for _ in range(5):
+        assert merge_tree(partials, rng).to_dict() == expected
+        shuffled = list(partials)
+        rng.shuffle(shuffled)
+        assert merge_all(shuffled).to_dict() == expected
+
+def test_merge_equals_statistics_of_the_union(inputs, partials):
+    merged = merge_all(partials)
+    union = NormalizationStats.from_inputs(np.vstack(inputs), quantiles=True)
+    assert merged.scripts == len(inputs)
+    assert {**merged.to_dict(), "scripts": 1} == union.to_dict()
+
+    # Identity, and inputs are left as they were
+    first = partials[0].to_dict()
+    assert NormalizationStats.empty(quantiles=True).merge(partials[0]).to_dict() == first
+    assert partials[0].merge(NormalizationStats.empty(quantiles=True)).to_dict() == first
+    partials[0].merge(partials[1])
+    assert partials[0].to_dict() == first
+
+    # Sketches survive only when both sides have them
+    plain = NormalizationStats.from_inputs(inputs[1])
+    assert partials[0].merge(plain).sketches is None
+    assert partials[0].merge(plain).maximum == merge_all(partials[:2]).maximum
+
+def test_save_load_round_trip(tmp_path, partials):
+    for stats in (merge_all(partials), merge_all(partials[:3]), NormalizationStats(), NormalizationStats.empty(quantiles=True)):
+        path = str(tmp_path / "stats.json")
+        stats.save(path)
+        loaded = NormalizationStats.load(path)
+        assert loaded.to_dict() == stats.to_dict()
+        if stats.count:
+            for q in ((0.0, 1.0), (0.05, 0.95)):
+                a, b = loaded.reference(*q), stats.reference(*q)
+                assert np.array_equal(a.lower, b.lower) and np.array_equal(a.upper, b.upper)
+
+    data = merge_all(partials).to_dict()
+    for broken in ({**data, "format": "other"}, {**data, "keys": data["keys"][::-1]}):
+        with open(tmp_path / "broken.json", "w") as f:
+            json.dump(broken, f)
+        with pytest.raises(ValueError):
+            NormalizationStats.load(str(tmp_path / "broken.json"))
+
+def test_reference_bounds(inputs, partials):
+    raw = inputs[0]
+    # A script normalized against its own statistics is normalized as before
+    own = NormalizationStats.from_inputs(raw).reference(clip=False)
+    assert np.array_equal(min_max_normalize(raw, own), min_max_normalize(raw))
+
+    merged = merge_all(partials)
+    reference = merged.reference(0.05, 0.95)
+    assert np.all(reference.lower >= merged.minimum) and np.all(reference.upper <= merged.maximum)
+    scaled = min_max_normalize(raw, reference)
+    assert scaled.min() >= 0.0 and scaled.max() <= 1.0
+    with pytest.raises(ValueError, match="quantiles=True"):
+        NormalizationStats.from_inputs(raw).reference(0.05, 0.95)
+    with pytest.raises(ValueError, match="no scenes"):
+        NormalizationStats.empty().reference()
+    with pytest.raises(ValueError):
+        merged.reference(0.5, 0.5)
+
+def test_quantile_sketch_accuracy_and_merge():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([
+        rng.lognormal(0.0, 2.0, 3000), -rng.lognormal(1.0, 1.0, 1000), np.zeros(200), rng.uniform(-1e-10, 1e-10, 50)
+    ])
+    rng.shuffle(values)
+    ordered = np.sort(values)
+    for accuracy in (0.01, 0.05):
+        whole = QuantileSketch(accuracy)
+        whole.add(values)
+        parts = [QuantileSketch(accuracy) for _ in range(4)]
+        for part, chunk in zip(parts, np.array_split(values, 4)):
+            part.add(chunk)
+        merged = QuantileSketch(accuracy)
+        for part in reversed(parts):
+            merged.merge(part)
+        assert merged.to_dict() == whole.to_dict()
+        assert QuantileSketch.from_dict(json.loads(json.dumps(whole.to_dict()))).to_dict() == whole.to_dict()
+
+        for q in np.linspace(0, 1, 101):
+            exact = ordered[int(q * (len(values) - 1))]
+            estimate = whole.quantile(q)
+            if abs(exact) < QuantileSketch.MIN_MAGNITUDE:
+                assert estimate == 0.0
+            else:
+                assert abs(estimate - exact) <= accuracy * abs(exact) * (1 + 1e-9), q
+
+    with pytest.raises(ValueError):
+        QuantileSketch(0.01).merge(QuantileSketch(0.02))
+    with pytest.raises(ValueError):
+        QuantileSketch(0.01).quantile(0.5)
+    with pytest.raises(ValueError):
+        whole.quantile(1.5)
+    with pytest.raises(ValueError):
+        QuantileSketch(0.0)
+
+def test_build_reference_does_not_depend_on_workers(tmp_path, corpus):
+    paths = []
+    for k, lines in enumerate(corpus[:60]):
+        path = tmp_path / f"s{k:02d}.txt"
+        path.write_text("\n".join(lines), encoding="utf-8")
+        paths.append(str(path))
+    serial, failed = build_reference(paths, workers=1, chunk_size=7, quantiles=True)
+    pooled, pooled_failed = build_reference(paths, workers=2, chunk_size=3, quantiles=True)
+    assert pooled.to_dict() == serial.to_dict()
+    assert sorted(pooled_failed) == sorted(failed)
+    assert serial.scripts + len(failed) == len(paths)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from run_scriptpulse import score_detailed
+from scriptpulse.corpus import generate_script
+from scriptpulse.engine.features import extract_scene_feature_arrays
+from scriptpulse.engine.normalize import NormalizationStats, normalization_inputs
+from scriptpulse.engine.preprocess import preprocess_lines
+from scriptpulse.engine.ragged import score_feature_batch
+from scriptpulse.engine.segment import segment_scenes
+from test_temporal_graph import sequential_temporal_graph
+
+@pytest.fixture(scope="module")
+def features(well_formed_corpus):
+    # The corpus plus very short and long scripts (shorter than every window,
+    # and running long after the others in the decay scan)
+    scripts = well_formed_corpus + [generate_script(k, scenes=n) for k, n in enumerate((1, 2, 3, 4, 5, 8, 9, 10, 1500, 4000))]
+    return [extract_scene_feature_arrays(segment_scenes(preprocess_lines(lines))) for lines in scripts]
+
+def corpus_reference(features):
+    stats = NormalizationStats.empty()
+    for f in features[::2]:
+        stats = stats.merge(NormalizationStats.from_inputs(normalization_inputs(f)))
+    return stats.reference()
+
+@pytest.mark.parametrize("with_reference", [False, True], ids=["per-script", "reference"])
+def test_ragged_batch_matches_score_detailed(features, with_reference):
+    reference = corpus_reference(features) if with_reference else None
+    batch = score_feature_batch(features, reference)
+    messages = batch.messages()
+    for k, f in enumerate(features):
+        expected = score_detailed(None, features=f, reference=reference)
+        got = batch.result(k)
+        # Bit for bit
+        for name in ("normalization_inputs", "features_norm", "effort", "decayed", "probabilities"):
+            assert np.array_equal(np.asarray(getattr(got, name)), np.asarray(getattr(expected, name))), f"script {k}: {name}"
+        assert got.temporal == expected.temporal == sequential_temporal_graph(expected.effort.tolist())
+        assert got.signals == expected.signals
+        assert got.alerts == expected.alerts
+        assert got.messages == expected.messages == messages[k]
+
+def test_empty_script_is_rejected(features):
+    with pytest.raises(ValueError):
+        score_feature_batch([features[0], extract_scene_feature_arrays([])])
@@ -0,0 +1,18 @@
+from scriptpulse.engine.preprocess import preprocess_lines
+from scriptpulse.engine.scanner import scan_scenes
+from scriptpulse.engine.segment import segment_scenes
+from scriptpulse.engine.validator import validate_script
+
+def outcome(fn, lines):
+    try:
+        return fn(lines)
+    except ValueError as e:
+        return ("ValueError", str(e))
+
+def staged(lines):
+    validate_script(lines)
+    return segment_scenes(preprocess_lines(lines))
+
+def test_fused_front_end_matches_stages(corpus):
+    for i, lines in enumerate(corpus):
+        assert outcome(scan_scenes, lines) == outcome(staged, lines), f"script {i}"
@@ -0,0 +1,223 @@
+import asyncio
+import contextlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from run_scriptpulse import run_scriptpulse_detailed
+from scriptpulse.batch import _warm_up
+from scriptpulse.service import AnalysisService, ServiceConfig
+
+# Scripts starting with this line make the worker fail with an unexpected error
+FAULT = "FAULT INJECTED"
+
+def _warm_up_with_fault() -> None:
+    _warm_up()
+    import run_scriptpulse
+
+    original = run_scriptpulse.run_scriptpulse_detailed
+
+    def detailed(lines, **kwargs):
+        if lines and lines[0] == FAULT:
+            raise RuntimeError("worker fault")
+        return original(lines, **kwargs)
+
+    run_scriptpulse.run_scriptpulse_detailed = detailed
+
+class FaultyService(AnalysisService):
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up_with_fault)
+
+CONFIG = dict(
+    workers=1, max_queue=8, max_body_bytes=1 << 20, max_scripts_per_request=4, max_header_bytes=1024
+)
+
+@contextlib.asynccontextmanager
+async def running(**overrides):
+    # The service on an ephemeral port, like serve() but without signal handling
+    config = ServiceConfig(port=0, **{**CONFIG, **overrides})
+    service = FaultyService(config)
+    await service.start()
+    server = await asyncio.start_server(
+        service.handle_connection, config.host, 0, limit=config.max_header_bytes
+    )
+    try:
+        async with server:
+            yield server.sockets[0].getsockname()[1]
+    finally:
+        await service.stop()
+
+class Client:
+    def __init__(self, port):
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=b"", headers=None, raw=None):
+        """
+        (status, headers, body); reuses the connection while the server keeps it open.
+        """
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+        if raw is None:
+            head = [f"{method} {path} HTTP/1.1", "Host: localhost", f"Content-Length: {len(body)}"]
+            head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+            raw = ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+        self.writer.write(raw)
+        await self.writer.drain()
+
+        status_line, *lines = (await self.reader.readuntil(b"\r\n\r\n"))[:-4].decode("latin-1").split("\r\n")
+        response_headers = {}
+        for line in lines:
+            name, _, value = line.partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+        payload = await self.reader.readexactly(int(response_headers["content-length"]))
+        if response_headers["connection"] == "close":
+            assert await self.reader.read() == b""
+            await self.close()
+        return int(status_line.split(" ")[1]), response_headers, payload
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+def expected_entry(lines):
+    # What the service returns for one script, through JSON
+    try:
+        result = run_scriptpulse_detailed(lines).to_dict()
+    except ValueError as e:
+        return {"error": {"type": type(e).__name__, "message": str(e)}}
+    return json.loads(json.dumps(result))
+
+def without_stage(entry):
+    if "error" in entry:
+        entry = {**entry, "error": {k: v for k, v in entry["error"].items() if k != "stage"}}
+    return entry
+
+def ndjson(items):
+    return "\n".join(json.dumps(item) for item in items).encode("utf-8")
+
+@pytest.fixture(scope="module")
+def scripts(corpus):
+    # Two valid scripts and one the engine rejects
+    valid, invalid = [], []
+    for lines in corpus:
+        (valid if "error" not in expected_entry(lines) else invalid).append(lines)
+    return valid[:2] + invalid[:1]
+
+def test_analyze_and_health(scripts):
+    async def scenario():
+        async with running() as port:
+            client = Client(port)
+            # One connection, kept alive across every request
+            for lines in scripts:
+                status, headers, body = await client.request(
+                    "POST", "/analyze", "\n".join(lines).encode("utf-8"), {"Content-Type": "text/plain"}
+                )
+                entry = json.loads(body)
+                if "error" in entry:
+                    assert status == 422
+                    assert entry["error"]["stage"]
+                else:
+                    assert status == 200
+                assert headers["connection"] == "keep-alive"
+                assert without_stage(entry) == expected_entry(lines)
+
+            items = [{"id": f"s{k}", "lines": lines} for k, lines in enumerate(scripts)]
+            items.append({"text": "\n".join(scripts[0])})
+            status, headers, body = await client.request(
+                "POST", "/analyze", ndjson(items), {"Content-Type": "application/x-ndjson"}
+            )
+            assert status == 200
+            assert headers["content-type"].startswith("application/x-ndjson")
+            entries = [json.loads(line) for line in body.decode("utf-8").splitlines()]
+            assert [e.pop("id") for e in entries] == ["s0", "s1", "s2", 3]
+            assert [without_stage(e) for e in entries] == [expected_entry(lines) for lines in scripts + scripts[:1]]
+
+            status, _, body = await client.request("GET", "/healthz")
+            health = json.loads(body)
+            await client.close()
+        return status, health
+
+    status, health = asyncio.run(scenario())
+    assert status == 200
+    assert health["status"] == "ok"
+    assert health["workers"] == 1 and health["queued"] == 0
+    assert health["requests"] == 5 and health["scripts"] == 7 and health["rejected"] == 0
+    assert health["batched_scripts"] == 7 and health["in_flight_batches"] == 0
+
+def test_internal_error_is_isolated(scripts):
+    async def scenario():
+        async with running() as port:
+            client = Client(port)
+            fault = [FAULT, "INT. HOUSE - DAY"]
+            status, _, body = await client.request("POST", "/analyze", "\n".join(fault).encode("utf-8"))
+            single = (status, json.loads(body))
+
+            # The failing script shares a batch with the others and fails alone
+            items = [{"id": 0, "lines": scripts[0]}, {"id": 1, "lines": fault}, {"id": 2, "lines": scripts[2]}]
+            status, _, body = await client.request(
+                "POST", "/analyze", ndjson(items), {"Content-Type": "application/x-ndjson"}
+            )
+            entries = [json.loads(line) for line in body.decode("utf-8").splitlines()]
+
+            # The worker and the connection are still usable
+            status_after, _, body_after = await client.request("POST", "/analyze", "\n".join(scripts[1]).encode("utf-8"))
+            _, _, health = await client.request("GET", "/healthz")
+            await client.close()
+        return single, status, entries, status_after, json.loads(body_after), json.loads(health)
+
+    single, status, entries, status_after, after, health = asyncio.run(scenario())
+    assert single[0] == 500
+    assert single[1] == {"error": {"stage": "engine", "type": "RuntimeError", "message": "worker fault", "internal": True}}
+    assert status == 200
+    assert without_stage(entries[0]) == {"id": 0, **expected_entry(scripts[0])}
+    assert entries[1] == {"id": 1, **single[1]}
+    assert without_stage(entries[2]) == {"id": 2, **expected_entry(scripts[2])}
+    assert "internal" not in entries[2]["error"]
+    assert status_after == 200 and after == expected_entry(scripts[1])
+    assert health["batches"] == 3 and health["pool_restarts"] == 0
+
+def test_rejected_requests(scripts):
+    async def scenario():
+        async with running(max_queue=2) as port:
+            out = {}
+            # Content-Length over max_body_bytes: answered before the body is sent
+            out["too_large"] = await Client(port).request(
+                "POST", "/analyze", raw=b"POST /analyze HTTP/1.1\r\nContent-Length: 1048577\r\n\r\n"
+            )
+            out["chunked"] = await Client(port).request(
+                "POST", "/analyze", raw=b"POST /analyze HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+            )
+            out["header"] = await Client(port).request(
+                "GET", "/healthz", raw=b"GET /healthz HTTP/1.1\r\nX-Padding: " + b"x" * 4096 + b"\r\n\r\n"
+            )
+
+            client = Client(port)
+            items = [{"lines": scripts[0]}] * 5
+            out["too_many"] = await client.request("POST", "/analyze", ndjson(items), {"Content-Type": "application/x-ndjson"})
+            # Three scripts are within the request limit but never fit the queue of two
+            out["queue_full"] = await client.request(
+                "POST", "/analyze", ndjson(items[:3]), {"Content-Type": "application/x-ndjson"}
+            )
+            out["not_found"] = await client.request("GET", "/nowhere")
+            out["method"] = await client.request("POST", "/healthz")
+            out["health"] = await client.request("GET", "/healthz")
+            await client.close()
+        return out
+
+    out = asyncio.run(scenario())
+    status = {name: response[0] for name, response in out.items()}
+    assert status == {
+        "too_large": 413, "chunked": 411, "header": 431, "too_many": 413,
+        "queue_full": 429, "not_found": 404, "method": 405, "health": 200
+    }
+    for name in ("too_large", "chunked", "header"):
+        assert out[name][1]["connection"] == "close"
+    assert out["queue_full"][1]["retry-after"] == "1"
+    assert out["too_many"][1]["connection"] == "keep-alive"
+    assert out["queue_full"][1]["connection"] == "keep-alive"
+    assert "error" in json.loads(out["queue_full"][2])
+    health = json.loads(out["health"][2])
+    assert health["rejected"] == 1 and health["scripts"] == 0
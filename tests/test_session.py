@@ -0,0 +1,81 @@
+import random
+
+import numpy as np
+import pytest
+
+from run_scriptpulse import run_scriptpulse
+from scriptpulse.corpus import BAD_LINES, generate_script
+from scriptpulse.engine.features import FEATURE_KEYS, extract_scene_feature_arrays
+from scriptpulse.engine.preprocess import preprocess_lines
+from scriptpulse.engine.segment import segment_scenes
+from scriptpulse.session import AnalysisSession
+
+HEADERS = ["INT. NEW ROOM", "EXT. FIELD - DAY", "INT.", "EXT. lower case"]
+
+def cold(lines):
+    # (messages, None) or (None, error message) of a cold run
+    try:
+        return run_scriptpulse(list(lines)), None
+    except ValueError as e:
+        return None, str(e)
+
+def random_edit(r, lines, donor):
+    # Insert, delete or replace a range, often across a scene header
+    a = r.randint(0, len(lines))
+    kind = r.choice(["insert", "delete", "replace"])
+    b = a if kind == "insert" else min(len(lines), a + r.randint(1, 8))
+    new_lines = []
+    if kind != "delete":
+        for _ in range(r.randint(1, 6)):
+            pool = r.choice([donor, donor, HEADERS, BAD_LINES, ["", "  ", "\t"]])
+            new_lines.append(r.choice(pool))
+    return (a, b), new_lines
+
+@pytest.mark.parametrize("seed", range(30))
+def test_edits_match_cold_run(seed):
+    r = random.Random(seed)
+    lines = generate_script(seed, scenes=r.randint(1, 40))
+    donor = generate_script(seed + 1000, scenes=10)
+    session = AnalysisSession(lines)
+    assert session.messages == run_scriptpulse(lines)
+    for step in range(25):
+        line_range, new_lines = random_edit(r, session.lines, donor)
+        edited = session.lines[:line_range[0]] + new_lines + session.lines[line_range[1]:]
+        expected, error = cold(edited)
+        before = (list(session.lines), list(session.messages))
+        if error is not None:
+            with pytest.raises(ValueError) as e:
+                session.apply_edit(line_range, new_lines)
+            assert str(e.value) == error, f"step {step}"
+            # Left unchanged; later edits start from the last valid script
+            assert (session.lines, session.messages) == before
+            continue
+        assert session.apply_edit(line_range, new_lines) == expected, f"step {step}"
+        assert session.lines == edited
+        features = extract_scene_feature_arrays(segment_scenes(preprocess_lines(edited)))
+        for key in FEATURE_KEYS:
+            assert np.array_equal(session.features[key], features[key]), (step, key)
+
+@pytest.mark.parametrize("seed", range(10))
+def test_repairs_after_failed_edits(seed):
+    # Break the script, then undo: the session keeps matching a cold run
+    r = random.Random(seed)
+    lines = generate_script(seed, scenes=20)
+    session = AnalysisSession(lines)
+    headers = [i for i, line in enumerate(lines) if line.startswith(("INT.", "EXT."))]
+    with pytest.raises(ValueError):
+        session.apply_edit((0, headers[0] + 1), ["some text before the header"])
+    # Merging two scenes
+    a = r.choice(headers[1:])
+    assert session.apply_edit((a, a + 1), []) == cold(lines[:a] + lines[a + 1:])[0]
+    assert session.apply_edit((a, a), [lines[a]]) == run_scriptpulse(lines)
+
+def test_malformed_scripts_fail_like_cold_run(corpus):
+    for lines in corpus:
+        expected, error = cold(lines)
+        if error is None:
+            assert AnalysisSession(lines).messages == expected
+        else:
+            with pytest.raises(ValueError) as e:
+                AnalysisSession(lines)
+            assert str(e.value) == error
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from run_scriptpulse import run_scriptpulse_detailed
+from scriptpulse.shard import plan_line_shards, run_file_sharded, run_scriptpulse_sharded_detailed
+
+def outcome(fn, *args, **kwargs):
+    try:
+        return fn(*args, **kwargs)
+    except ValueError as e:
+        return ("error", str(e))
+
+@pytest.fixture(scope="module")
+def expected(corpus):
+    return [outcome(run_scriptpulse_detailed, lines) for lines in corpus]
+
+@pytest.mark.parametrize("shards", [2, 3, 7])
+def test_line_shards_match_sequential_run(corpus, expected, shards):
+    for i, (lines, want) in enumerate(zip(corpus, expected)):
+        got = outcome(run_scriptpulse_sharded_detailed, lines, workers=1, shards=shards, keep_scenes=True, min_shard_lines=1)
+        if isinstance(want, tuple):
+            assert got == want, f"script {i}"
+            continue
+        assert got.messages == want.messages, f"script {i}"
+        assert all(np.array_equal(got.features[k], want.features[k]) for k in want.features.columns), f"script {i}"
+        assert [s.scene_index for s in got.scenes] == list(range(len(want.scenes)))
+        assert [s.raw_lines for s in got.scenes] == [s.raw_lines for s in want.scenes]
+
+@pytest.mark.parametrize("separator", ["\n", "\r\n", "\r"], ids=["lf", "crlf", "cr"])
+@pytest.mark.parametrize("shards", [2, 3, 7])
+def test_file_shards_match_sequential_run(corpus, expected, tmp_path, shards, separator):
+    path = tmp_path / "script.txt"
+    for i, (lines, want) in enumerate(zip(corpus, expected)):
+        # Every line terminated, so a trailing empty line survives
+        path.write_bytes("".join(line + separator for line in lines).encode("utf-8"))
+        got = outcome(run_file_sharded, str(path), workers=1, shards=shards, min_shard_bytes=1)
+        assert got == (want if isinstance(want, tuple) else want.messages), f"script {i}"
+
+def test_short_script_is_one_shard(corpus):
+    assert plan_line_shards(corpus[0], 8) == [0]
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from run_scriptpulse import run_scriptpulse, run_scriptpulse_detailed
+from scriptpulse.engine.effort import compute_effort_matrix
+from scriptpulse.engine.normalize import normalization_inputs, scale
+from scriptpulse.engine.temporal_graph import LAMBDA, RHO, TAU
+from scriptpulse.stream import ScriptPulseStream, run_scriptpulse_streaming
+
+def cold(lines):
+    try:
+        return run_scriptpulse(list(lines)), None
+    except ValueError as e:
+        return None, str(e)
+
+@pytest.mark.parametrize("batch_scenes", [1, 3, 256])
+def test_final_messages_and_errors_match(corpus, batch_scenes):
+    for k, lines in enumerate(corpus):
+        expected, error = cold(lines)
+        if error is None:
+            assert run_scriptpulse_streaming(iter(lines), batch_scenes=batch_scenes) == expected, k
+        else:
+            with pytest.raises(ValueError) as e:
+                run_scriptpulse_streaming(iter(lines), batch_scenes=batch_scenes)
+            assert str(e.value) == error, k
+
+def test_iteration_raises_like_cold_run(corpus):
+    for k, lines in enumerate(corpus):
+        _, error = cold(lines)
+        if error is not None:
+            with pytest.raises(ValueError) as e:
+                list(ScriptPulseStream(iter(lines)))
+            assert str(e.value) == error, k
+
+def provisional_signals(raw):
+    # Scene k normalized against the min/max of scenes 0..k, then the decay
+    # recurrence over those efforts
+    efforts, decayed = [], []
+    for k in range(len(raw)):
+        norm = scale(raw[k], raw[:k + 1].min(axis=0), raw[:k + 1].max(axis=0))
+        effort = float(compute_effort_matrix(norm[None, :])[0])
+        if k == 0:
+            value = effort
+        else:
+            value = effort + (LAMBDA * decayed[-1])
+            if effort < (efforts[-1] - TAU):
+                value = value - RHO
+        efforts.append(effort)
+        decayed.append(value)
+    return efforts, decayed
+
+def test_updates_are_emitted_per_scene(well_formed_corpus):
+    for lines in well_formed_corpus[:60]:
+        consumed = 0
+
+        def source():
+            nonlocal consumed
+            for line in lines:
+                consumed += 1
+                yield line
+
+        result = run_scriptpulse_detailed(lines)
+        headers = [i for i, line in enumerate(lines) if line.startswith(("INT.", "EXT."))]
+        stream = ScriptPulseStream(source())
+        updates = []
+        for update in stream:
+            k = len(updates)
+            # Scene k is closed by the next header (or the end of input), not later
+            assert consumed <= (headers[k + 1] + 1 if k + 1 < len(headers) else len(lines))
+            updates.append(update)
+
+        assert [u.scene.scene_index for u in updates] == list(range(len(result.effort)))
+        assert [u.features for u in updates] == result.features.to_dicts()
+        efforts, decayed = provisional_signals(normalization_inputs(result.features))
+        assert [u.provisional_effort for u in updates] == efforts
+        assert [u.provisional_decayed for u in updates] == decayed
+        # The last scene has seen the script's min/max
+        assert updates[-1].provisional_effort == result.effort[-1]
+        assert stream.finalize() == result.messages
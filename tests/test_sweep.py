@@ -0,0 +1,65 @@
+import math
+
+import numpy as np
+import pytest
+
+from run_scriptpulse import run_scriptpulse_detailed
+from scriptpulse.engine.calibration import calibrate_strain_array
+from scriptpulse.engine.accumulate import accumulate_signals
+from scriptpulse.engine.decision import PROB_THRESHOLD, THRESHOLD_MEDIUM, decide_alerts
+from scriptpulse.engine.temporal_graph import LAMBDA, RHO, TAU, WINDOW_LONG, WINDOW_SHORT, decay_accumulate
+from scriptpulse.experimental.sweep import PARAMETERS, SweepGrid, _aligned_windows, sweep_script
+from test_temporal_graph import sequential_temporal_graph
+
+GRID = SweepGrid(
+    lam=(0.5, LAMBDA, 0.97), tau=(0.0, TAU), rho=(RHO, 0.5),
+    window_short=(2, WINDOW_SHORT), window_long=(WINDOW_LONG, 12),
+    prob_threshold=(0.5, PROB_THRESHOLD), threshold_medium=(2.0, THRESHOLD_MEDIUM)
+)
+
+def reference_alerts(effort: np.ndarray, config: dict) -> np.ndarray:
+    # One configuration evaluated scene by scene with the production formulas
+    # (decay_accumulate, windowed sums, the decide_alerts rule)
+    x = np.asarray(effort, dtype=np.float64)
+    decayed = decay_accumulate(x, config["lam"], config["tau"], config["rho"])
+    probs = calibrate_strain_array(decayed)
+    widths = [int(config["window_short"]), int(config["window_medium"]), int(config["window_long"])]
+    aligned = _aligned_windows(x, widths)
+    out = []
+    for i in range(len(x)):
+        s, m, l = (aligned[w][i] for w in widths)
+        agreement = (
+            (not math.isnan(s) and s > config["threshold_short"])
+            and (not math.isnan(m) and m > config["threshold_medium"])
+            and (not math.isnan(l) and l > config["threshold_long"])
+        )
+        out.append(bool(probs[i] > config["prob_threshold"] and agreement))
+    return np.array(out, dtype=bool)
+
+@pytest.fixture(scope="module")
+def swept(well_formed_corpus):
+    # (pipeline result, sweep) for the scripts of up to 100 scenes
+    out = []
+    for lines in well_formed_corpus[:100]:
+        result = run_scriptpulse_detailed(lines)
+        out.append((result, sweep_script(result.effort, GRID)))
+    return out
+
+def test_frozen_configuration_matches_pipeline(swept):
+    frozen = GRID.frozen_index()
+    assert frozen is not None
+    # Row of SweepResult.decayed: (lam, tau, rho) vary slowest
+    temporal = frozen // (len(GRID) // (len(GRID.lam) * len(GRID.tau) * len(GRID.rho)))
+    for result, sweep in swept:
+        # Stages 7-10 from the sequential definition
+        signals = accumulate_signals(sequential_temporal_graph(result.effort.tolist()))
+        assert sweep.decayed[temporal].tolist() == signals["decayed"]
+        alerts = decide_alerts(calibrate_strain_array(np.array(signals["decayed"])).tolist(), signals)
+        assert sweep.alerts[frozen].tolist() == alerts == list(result.alerts)
+
+def test_every_configuration_matches_reference(swept):
+    configs = GRID.configs()
+    for c in range(len(GRID)):
+        config = {name: configs[name][c] for name in PARAMETERS}
+        for k, (result, sweep) in enumerate(swept):
+            assert np.array_equal(sweep.alerts[c], reference_alerts(result.effort, config)), f"script {k}, {config}"
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from scriptpulse.engine.temporal_graph import (
+    LAMBDA, RHO, TAU, WINDOW_LONG, WINDOW_MEDIUM, WINDOW_SHORT,
+    build_temporal_graph, decay_accumulate, decay_scan, recovery_credit
+)
+
+def sequential_temporal_graph(effort):
+    # The v1.3.1-final definition: a sequential recurrence and windows summed
+    # left to right from 0 (what sum() does over floats on the frozen
+    # interpreter)
+    decayed = [effort[0]] if effort else []
+    for i in range(1, len(effort)):
+        acc = effort[i] + (LAMBDA * decayed[i - 1])
+        if effort[i] < (effort[i - 1] - TAU):
+            acc = acc - RHO
+        decayed.append(acc)
+
+    def windows(w):
+        out = []
+        for i in range(w - 1, len(effort)):
+            total = 0
+            for value in effort[i - w + 1:i + 1]:
+                total = total + value
+            out.append(total)
+        return out
+
+    return {
+        "decayed": decayed,
+        "window_short": windows(WINDOW_SHORT),
+        "window_medium": windows(WINDOW_MEDIUM),
+        "window_long": windows(WINDOW_LONG)
+    }
+
+def random_efforts(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 3000))
+    if seed % 2:
+        # Multiples of 0.1: window sums land on the decision thresholds and
+        # drops on exactly TAU
+        return (rng.integers(0, 13, n) / 10).tolist()
+    return (rng.random(n) * rng.choice([0.5, 1.0, 3.0])).tolist()
+
+def test_threshold_boundary_example():
+    effort = [0.4, 0.7, 0.9, 0.7, 0.7, 1.2, 1.1, 0.1, 1.0, 0.4]
+    graph = build_temporal_graph(effort)
+    assert graph == sequential_temporal_graph(effort)
+    assert 3.0 in graph["window_short"]
+
+@pytest.mark.parametrize("seed", range(60))
+def test_matches_sequential_definition(seed):
+    effort = random_efforts(seed)
+    assert build_temporal_graph(effort) == sequential_temporal_graph(effort)
+    assert build_temporal_graph(np.array(effort)) == sequential_temporal_graph(effort)
+
+def test_empty_and_extra_windows():
+    assert build_temporal_graph([]) == {"decayed": [], "window_short": [], "window_medium": [], "window_long": []}
+    effort = random_efforts(1)
+    graph = build_temporal_graph(effort, windows={"window_short": 3, "window_25": 25})
+    assert graph["window_25"] == [sum(effort[i - 24:i + 1]) for i in range(24, len(effort))]
+
+@pytest.mark.parametrize("seed", range(10))
+def test_packed_series_match_one_at_a_time(seed):
+    rng = np.random.default_rng(seed)
+    parts = [np.array(random_efforts(int(s))) for s in rng.integers(0, 1000, 8)]
+    lengths = np.array([len(p) for p in parts])
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    lams = rng.random(len(parts))
+    x = np.concatenate(parts)
+    credit = np.concatenate([recovery_credit(p) for p in parts])
+    out = decay_scan(x, credit, starts, lengths, lams)
+    for p, a, lam in zip(parts, starts, lams):
+        assert np.array_equal(out[a:a + len(p)], decay_accumulate(p, lam))
+
+@pytest.mark.parametrize("seed", range(10))
+def test_fast_path_is_close(seed):
+    effort = random_efforts(seed)
+    exact, fast = build_temporal_graph(effort), build_temporal_graph(effort, fast=True)
+    for key in exact:
+        assert np.allclose(fast[key], exact[key], rtol=1e-12, atol=1e-12)
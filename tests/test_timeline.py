@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from scriptpulse.timeline import build_timeline, render_timeline_png, tick_positions
+
+def random_series(rng):
+    n = int(rng.integers(1, 50000))
+    # Half with many ties
+    values = np.round(rng.random(n).cumsum() % 7, 1) if rng.random() < 0.5 else rng.random(n)
+    alerts = np.flatnonzero(rng.random(n) < rng.random())
+    return values, alerts
+
+def random_views(rng, n, count=5):
+    for _ in range(count):
+        start = int(rng.integers(0, n))
+        yield start, int(rng.integers(start + 1, n + 1)), int(rng.integers(4, 2000))
+
+@pytest.mark.parametrize("seed", range(40))
+def test_view_keeps_ends_and_bucket_extremes(seed):
+    rng = np.random.default_rng(seed)
+    values, alerts = random_series(rng)
+    timeline = build_timeline(values, alerts)
+    for start, stop, points in random_views(rng, len(values)):
+        x, y = timeline.view(start, stop, points)
+        segment = values[start:stop]
+        assert x[0] == start and x[-1] == stop - 1
+        assert np.all(np.diff(x) > 0)
+        assert len(x) <= points + 6
+        assert np.array_equal(y, values[x])
+        assert y.min() == segment.min() and y.max() == segment.max()
+        if stop - start > points:
+            # Every 2**k-aligned bucket of the level used keeps its extremes
+            size = 1
+            while (stop - start) > (points // 2) * size:
+                size *= 2
+            for a in range(start - start % size, stop, size):
+                lo, hi = max(a, start), min(a + size, stop)
+                inside = (x >= lo) & (x < hi)
+                assert y[inside].min() == values[lo:hi].min() and y[inside].max() == values[lo:hi].max()
+
+@pytest.mark.parametrize("seed", range(40))
+def test_alerts_are_thinned_only_beyond_points(seed):
+    rng = np.random.default_rng(seed)
+    values, alerts = random_series(rng)
+    timeline = build_timeline(values, alerts)
+    for start, stop, points in random_views(rng, len(values)):
+        shown = timeline.alerts_in(start, stop, points)
+        expected = alerts[(alerts >= start) & (alerts < stop)]
+        assert len(shown) <= points
+        assert np.all(np.isin(shown, expected))
+        if len(expected) <= points:
+            assert np.array_equal(shown, expected)
+
+@pytest.mark.parametrize("start,stop,expected", [
+    (0, 1, [0]),
+    (0, 13, [0, 2, 4, 6, 8, 10, 12]),
+    (0, 100, list(range(0, 100, 10))),
+    (37, 5012, list(range(500, 5012, 500))),
+    (0, 123456, list(range(0, 123456, 20000)))
+])
+def test_tick_positions(start, stop, expected):
+    assert tick_positions(start, stop).tolist() == expected
+
+def test_render_is_png():
+    pytest.importorskip("matplotlib")
+    values = np.random.default_rng(0).random(10000).cumsum() % 5
+    png = render_timeline_png(build_timeline(values, np.flatnonzero(values > 4)), 100, 9000)
+    assert png.startswith(b"\x89PNG")